@@ -3,22 +3,109 @@ Base agent implementation using Pydantic AI.
 This serves as the foundation for all specialized agents in the system.
 """
 from pydantic import BaseModel, Field
-from typing import Generic, TypeVar, Type, Dict, Any, Optional, List, ClassVar
+from typing import Generic, TypeVar, Type, Dict, Any, Optional, List, ClassVar, Tuple
 from sqlmodel import Session
+from sqlalchemy import update, func
 from pydantic_ai import Agent, RunContext
 from dataclasses import dataclass
-from httpx import AsyncClient
+from httpx import AsyncClient, AsyncHTTPTransport, Limits, Timeout
 
 import sys
 import os
+import asyncio
+import re
+import string
+import orjson
+from collections import OrderedDict
+from functools import lru_cache
+from contextlib import contextmanager
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from backend.models.agent import Agent, AgentTypeEnum
 from backend.schemas import AgentConfigUnion, parse_agent_config, ToolNameEnum
-from backend.ai_agents.tools import AVAILABLE_TOOLS_MAP
+from backend.ai_agents.tools import AVAILABLE_TOOLS_MAP, get_enabled_tools_for_instructor
+from backend.ai_agents.llm_clients import get_llm_client
+from backend.database import engine
 
 InputSchema = TypeVar('InputSchema', bound='AgentTaskInput')
 OutputSchema = TypeVar('OutputSchema', bound='AgentTaskOutput')
 
+# Escaped braces ({{ / }}) or a {placeholder}, matched left to right like str.format does
+_PROMPT_FIELD_RE = re.compile(r"\{\{|\}\}|\{(\w+)\}")
+
+def _to_template_field(match: "re.Match[str]") -> str:
+    name = match.group(1)
+    return f"${{{name}}}" if name else match.group(0)[0]
+
+@lru_cache(maxsize=128)
+def compile_prompt_template(prompt: str) -> Tuple[str, string.Template]:
+    """
+    Compile a `{placeholder}` style prompt once, at agent build time.
+    Results are memoized on the prompt text, so agents built from the same config
+    share the compiled template and an edited prompt simply compiles anew.
+
+    The prompt is split at the start of the first line containing a placeholder:
+    the static prefix is returned as-is (so it can be sent as a stable system
+    prompt), and the remainder is converted into a `string.Template`. As with
+    `str.format`, `{{` and `}}` stand for literal braces; any other brace (e.g. in
+    example code) is kept verbatim instead of raising.
+
+    Args:
+        prompt: The prompt using `str.format` style placeholders
+
+    Returns:
+        A tuple of (static prefix, template for the dynamic tail)
+    """
+    first_field = next((m for m in _PROMPT_FIELD_RE.finditer(prompt) if m.group(1)), None)
+    split_at = prompt.rfind("\n", 0, first_field.start()) + 1 if first_field else len(prompt)
+    prefix = _PROMPT_FIELD_RE.sub(lambda m: m.group(0)[0], prompt[:split_at])
+    tail = _PROMPT_FIELD_RE.sub(_to_template_field, prompt[split_at:].replace("$", "$$"))
+    return prefix, string.Template(tail)
+
+try:
+    import h2  # noqa: F401  # Enables HTTP/2 in httpx
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+# Process-wide HTTP client shared by agent runs, so the keep-alive pool survives between runs
+_http_client: Optional[AsyncClient] = None
+
+def get_http_client() -> AsyncClient:
+    """
+    Get the shared HTTP client for agent API requests, creating it on first use.
+    Callers must not close it; it is closed on application shutdown via close_http_client().
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        # HTTP/2 multiplexes concurrent requests to the same host over one connection
+        # The transport retries failed connection attempts, so transient outages are not surfaced as errors
+        _http_client = AsyncClient(
+            transport=AsyncHTTPTransport(
+                http2=_HTTP2_AVAILABLE,
+                limits=Limits(max_connections=100, max_keepalive_connections=100),
+                retries=2
+            ),
+            timeout=Timeout(30.0)
+        )
+    return _http_client
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client, if it was created."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+# Severity order of the LogLevelEnum values used by agent configs
+_LOG_LEVEL_ORDER = {"debug": 10, "info": 20, "warn": 30, "error": 40}
+
+# Agent instances reused across requests (see PydanticAIAgent.get_cached_agent_instance)
+_AGENT_INSTANCE_CACHE_SIZE = 256
+_agent_instance_cache: OrderedDict = OrderedDict()
+
+# Strong references to fire-and-forget tasks so they are not garbage collected before finishing
+_background_tasks: set = set()
+
 class AgentTaskInput(BaseModel):
     """Base class for inputs to an agent task."""
     pass
@@ -30,16 +117,35 @@ class AgentTaskOutput(BaseModel):
     error_details: Optional[str] = None
     data: Optional[Dict[str, Any]] = None
 
+@dataclass
+class AgentStats:
+    """Task outcomes collected by one batch run (see PydanticAIAgent.deferred_agent_stats)."""
+    completed: int = 0
+    errors: int = 0
+
+    def record(self, success: bool) -> None:
+        if success:
+            self.completed += 1
+        else:
+            self.errors += 1
+
 @dataclass
 class AgentDependencies:
     """Dependencies for agents, including LLM client and other services."""
-    client: AsyncClient
     # Add other dependencies as needed, such as:
     database_session: Optional[Session] = None
     api_keys: Optional[Dict[str, str]] = None
     # broker_client: Optional[Any] = None
     # market_data_provider: Optional[Any] = None
 
+    @property
+    def client(self) -> AsyncClient:
+        """
+        The process-wide HTTP client, looked up on each access: cached agents outlive
+        close_http_client(), so they must not hold on to the client they were built with.
+        """
+        return get_http_client()
+
 class PydanticAIAgent(Generic[InputSchema, OutputSchema]):
     """
     Base class for agents using the Pydantic AI framework.
@@ -66,7 +172,7 @@ class PydanticAIAgent(Generic[InputSchema, OutputSchema]):
         self.agent_model = agent_model
         try:
             # Config should already be parsed into a Pydantic model by the API layer or CRUD
-            if isinstance(agent_model.config, dict): # If it's still a dict, parse it
+            if isinstance(agent_model.config, dict): # If it's still a dict, parse it (memoized per config content)
                  self.config = parse_agent_config(agent_model.type.value, agent_model.config)
             elif isinstance(agent_model.config, AgentConfigUnion):
                  self.config = agent_model.config
@@ -95,8 +201,8 @@ class PydanticAIAgent(Generic[InputSchema, OutputSchema]):
             raise ConnectionError(f"Could not initialize LLM for agent {self.agent_model.name}: {e}") from e
             
         # Initialize dependencies
+        # All agents share one pooled HTTP client instead of opening connections per task
         self.dependencies = AgentDependencies(
-            llm_client=self.llm_client,
             # Add other dependencies as needed
         )
             
@@ -150,19 +256,24 @@ class PydanticAIAgent(Generic[InputSchema, OutputSchema]):
         """
         raise NotImplementedError("The 'run' method must be implemented by subclasses.")
 
-    def _update_agent_stats(self, success: bool, session: Session):
+    def _update_agent_stats(self, success: bool, session: Session, stats: Optional[AgentStats] = None):
         """
         Helper to update agent's tasksCompleted or errors count.
         
         Args:
             success: Whether the task was successful
             session: Database session for persistence
+            stats: The run's accumulator when stats are deferred; the outcome is only recorded there
         """
         # Ensure agent_model is loaded in the current session if it's not already
         # This is a common pattern if the agent_model was passed from a different session context.
         # However, if session management is handled carefully, this might not be strictly necessary.
         # For now, assuming session handling is correct upstream or agent_model is session-agnostic for this update.
         
+        if stats is not None:
+            stats.record(success)
+            return
+
         # Fetch the agent from the provided session to ensure it's attached
         db_agent = session.get(Agent, self.agent_model.id)
         if not db_agent:
@@ -181,6 +292,53 @@ class PydanticAIAgent(Generic[InputSchema, OutputSchema]):
         self.agent_model.tasksCompleted = db_agent.tasksCompleted
         self.agent_model.errors = db_agent.errors
 
+    def _update_agent_stats_in_background(self, success: bool, stats: Optional[AgentStats] = None) -> None:
+        """
+        Record a task outcome without making the caller wait for the database.
+        The update runs in a worker thread with its own short-lived session.
+        """
+        if stats is not None:
+            stats.record(success)
+            return
+        task = asyncio.get_running_loop().create_task(asyncio.to_thread(self._update_agent_stats_own_session, success))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+    @contextmanager
+    def deferred_agent_stats(self, session: Session):
+        """
+        Yield an AgentStats for the batch run to pass to the stats helpers instead of committing
+        each outcome, then apply them all with a single UPDATE when the block exits.
+        The accumulator belongs to the run, not the (possibly shared) agent instance, so
+        concurrent runs of the same agent keep separate counts.
+        """
+        stats = AgentStats()
+        try:
+            yield stats
+        finally:
+            self._add_agent_stats(stats.completed, stats.errors, session)
+
+    def _add_agent_stats(self, completed: int, errors: int, session: Session) -> None:
+        """Increment tasksCompleted/errors by the given counts in one statement and one commit."""
+        if not completed and not errors:
+            return
+        session.execute(
+            update(Agent)
+            .where(Agent.id == self.agent_model.id)
+            .values(
+                tasksCompleted=func.coalesce(Agent.tasksCompleted, 0) + completed,
+                errors=func.coalesce(Agent.errors, 0) + errors,
+            )
+        )
+        session.commit()
+
+    def _update_agent_stats_own_session(self, success: bool) -> None:
+        try:
+            with Session(engine) as session:
+                self._update_agent_stats(success=success, session=session)
+        except Exception as e:
+            self.log_message(f"Failed to update agent stats: {e}", level="error")
+
     def log_message(self, message: str, level: str = "info"):
         """
         Log a message with the appropriate level.
@@ -189,8 +347,19 @@ class PydanticAIAgent(Generic[InputSchema, OutputSchema]):
             message: The message to log
             level: The log level (info, warn, error, debug)
         """
+        if not self.is_log_enabled(level):
+            return
         print(f"[{level.upper()}] Agent {self.agent_model.name}: {message}")
 
+    def is_log_enabled(self, level: str) -> bool:
+        """
+        Whether a message at this level passes the agent's configured logLevel.
+        Check it before building expensive log messages.
+        """
+        configured = getattr(getattr(self, "config", None), "logLevel", "info")
+        configured = getattr(configured, "value", configured)
+        return _LOG_LEVEL_ORDER.get(level, 20) >= _LOG_LEVEL_ORDER.get(configured, 20)
+
     @classmethod
     def get_agent_instance(cls, agent_id: int, session: Session) -> 'PydanticAIAgent':
         """
@@ -208,9 +377,38 @@ class PydanticAIAgent(Generic[InputSchema, OutputSchema]):
             NotImplementedError: If the agent type is not supported
         """
         db_agent = session.get(Agent, agent_id) # Use session.get for direct PK lookup
+        if not db_agent:
+            raise ValueError(f"Agent with ID {agent_id} not found.")
+        return cls._create_agent_instance(db_agent, session)
+
+    @classmethod
+    def get_cached_agent_instance(cls, agent_id: int, session: Session) -> 'PydanticAIAgent':
+        """
+        Like get_agent_instance, but reuses the instance built for the same agent row, so repeated
+        tasks skip config parsing and client setup. The key covers every field the instance is built
+        from, so an updated agent gets a new instance; stale ones age out of the LRU.
+        """
+        db_agent = session.get(Agent, agent_id) # Use session.get for direct PK lookup
         if not db_agent:
             raise ValueError(f"Agent with ID {agent_id} not found.")
 
+        key = (agent_id, db_agent.type.value, db_agent.name, orjson.dumps(db_agent.config, option=orjson.OPT_SORT_KEYS))
+        instance = _agent_instance_cache.get(key)
+        if instance is not None:
+            _agent_instance_cache.move_to_end(key)
+            return instance
+
+        # The instance outlives this request's session, so it gets its own detached copy of the row
+        # instead of one that expires on the session's next commit and can't be refreshed after it closes
+        instance = cls._create_agent_instance(Agent.model_validate(db_agent), session)
+        _agent_instance_cache[key] = instance
+        if len(_agent_instance_cache) > _AGENT_INSTANCE_CACHE_SIZE:
+            _agent_instance_cache.popitem(last=False)
+        return instance
+
+    @classmethod
+    def _create_agent_instance(cls, db_agent: Agent, session: Session) -> 'PydanticAIAgent':
+        """Build the agent implementation for the agent row's type."""
         # Ensure config is parsed before passing to agent constructor
         # The API layer or CRUD should ideally handle this.
         # If db_agent.config is a dict, it needs to be parsed.
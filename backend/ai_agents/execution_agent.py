@@ -441,179 +441,177 @@ class ExecutionAIAgent(PydanticAIAgent[ExecutionInput, ExecutionOutput]):
         self.log_message(f"Starting execution of {len(task_input.trade_signals)} trade signals")
         
         try:
-            # Create HTTP client for API requests
-            async with httpx.AsyncClient() as client:
-                # Set up dependencies
-                deps = ExecutionDeps(
-                    client=client,
-                    broker_api_key=os.getenv("BROKER_API_KEY"),
-                    lumibot_config={
-                        "api_secret": os.getenv("BROKER_API_SECRET"),
-                        "paper": True  # Use paper trading by default
-                    }
+            # Set up dependencies; the process-wide HTTP client keeps its connection pool across runs
+            deps = ExecutionDeps(
+                client=self.dependencies.client,
+                broker_api_key=os.getenv("BROKER_API_KEY"),
+                lumibot_config={
+                    "api_secret": os.getenv("BROKER_API_SECRET"),
+                    "paper": True  # Use paper trading by default
+                }
+            )
+            
+            # Process each trade signal
+            executed_trades = []
+            rejected_trades = []
+            modified_trades = []
+            warnings = []
+            
+            for signal in task_input.trade_signals:
+                signal_dict = signal.model_dump()
+                
+                # Convert datetime to string for JSON serialization
+                if isinstance(signal_dict.get("timestamp"), datetime):
+                    signal_dict["timestamp"] = signal_dict["timestamp"].isoformat()
+                
+                # Evaluate the trade signal
+                evaluation = await self.pydantic_agent.evaluate_trade_signal(
+                    RunContext(deps=deps),
+                    trade_signal=signal_dict,
+                    market_context=task_input.market_context.model_dump() if task_input.market_context else None,
+                    portfolio_status=task_input.portfolio_status.model_dump() if task_input.portfolio_status else None
                 )
                 
-                # Process each trade signal
-                executed_trades = []
-                rejected_trades = []
-                modified_trades = []
-                warnings = []
+                # Add any warnings
+                warnings.extend(evaluation.get("warnings", []))
                 
-                for signal in task_input.trade_signals:
-                    signal_dict = signal.model_dump()
+                # Process based on evaluation
+                if evaluation.get("action") == "reject":
+                    self.log_message(f"Rejecting trade signal for {signal.symbol}: {evaluation.get('reasoning')}")
+                    rejected_trades.append({
+                        "signal": signal_dict,
+                        "reason": evaluation.get("reasoning")
+                    })
+                elif evaluation.get("action") == "modify":
+                    self.log_message(f"Modifying trade signal for {signal.symbol}: {evaluation.get('reasoning')}")
+                    modified_signal = evaluation.get("modified_signal", signal_dict)
                     
-                    # Convert datetime to string for JSON serialization
-                    if isinstance(signal_dict.get("timestamp"), datetime):
-                        signal_dict["timestamp"] = signal_dict["timestamp"].isoformat()
+                    # Get confirmations if required
+                    confirmations = []
+                    if task_input.require_confirmation:
+                        risk_confirmation = await self.pydantic_agent.get_agent_confirmation(
+                            RunContext(deps=deps),
+                            trade_signal=modified_signal,
+                            agent_type="risk"
+                        )
+                        
+                        portfolio_confirmation = await self.pydantic_agent.get_agent_confirmation(
+                            RunContext(deps=deps),
+                            trade_signal=modified_signal,
+                            agent_type="portfolio"
+                        )
+                        
+                        research_confirmation = await self.pydantic_agent.get_agent_confirmation(
+                            RunContext(deps=deps),
+                            trade_signal=modified_signal,
+                            agent_type="research"
+                        )
+                        
+                        confirmations = [risk_confirmation, portfolio_confirmation, research_confirmation]
+                        
+                        # Add any warnings from confirmations
+                        for confirmation in confirmations:
+                            warnings.extend(confirmation.get("warnings", []))
+                        
+                        # Check if all confirmations are positive
+                        all_confirmed = all(confirmation.get("confirmed", False) for confirmation in confirmations)
+                        
+                        if not all_confirmed:
+                            self.log_message(f"Trade signal for {signal.symbol} rejected by one or more agents")
+                            rejected_trades.append({
+                                "signal": modified_signal,
+                                "reason": "Rejected by one or more agents during confirmation"
+                            })
+                            continue
                     
-                    # Evaluate the trade signal
-                    evaluation = await self.pydantic_agent.evaluate_trade_signal(
+                    # Execute the modified trade
+                    execution_result = await self.pydantic_agent.execute_trade(
                         RunContext(deps=deps),
-                        trade_signal=signal_dict,
-                        market_context=task_input.market_context.model_dump() if task_input.market_context else None,
-                        portfolio_status=task_input.portfolio_status.model_dump() if task_input.portfolio_status else None
+                        trade_signal=modified_signal,
+                        dry_run=task_input.dry_run
                     )
                     
-                    # Add any warnings
-                    warnings.extend(evaluation.get("warnings", []))
+                    modified_trades.append({
+                        "original_signal": signal_dict,
+                        "modified_signal": modified_signal,
+                        "reason": evaluation.get("reasoning"),
+                        "execution_result": execution_result
+                    })
+                else:  # "execute"
+                    self.log_message(f"Executing trade signal for {signal.symbol}")
                     
-                    # Process based on evaluation
-                    if evaluation.get("action") == "reject":
-                        self.log_message(f"Rejecting trade signal for {signal.symbol}: {evaluation.get('reasoning')}")
-                        rejected_trades.append({
-                            "signal": signal_dict,
-                            "reason": evaluation.get("reasoning")
-                        })
-                    elif evaluation.get("action") == "modify":
-                        self.log_message(f"Modifying trade signal for {signal.symbol}: {evaluation.get('reasoning')}")
-                        modified_signal = evaluation.get("modified_signal", signal_dict)
-                        
-                        # Get confirmations if required
-                        confirmations = []
-                        if task_input.require_confirmation:
-                            risk_confirmation = await self.pydantic_agent.get_agent_confirmation(
-                                RunContext(deps=deps),
-                                trade_signal=modified_signal,
-                                agent_type="risk"
-                            )
-                            
-                            portfolio_confirmation = await self.pydantic_agent.get_agent_confirmation(
-                                RunContext(deps=deps),
-                                trade_signal=modified_signal,
-                                agent_type="portfolio"
-                            )
-                            
-                            research_confirmation = await self.pydantic_agent.get_agent_confirmation(
-                                RunContext(deps=deps),
-                                trade_signal=modified_signal,
-                                agent_type="research"
-                            )
-                            
-                            confirmations = [risk_confirmation, portfolio_confirmation, research_confirmation]
-                            
-                            # Add any warnings from confirmations
-                            for confirmation in confirmations:
-                                warnings.extend(confirmation.get("warnings", []))
-                            
-                            # Check if all confirmations are positive
-                            all_confirmed = all(confirmation.get("confirmed", False) for confirmation in confirmations)
-                            
-                            if not all_confirmed:
-                                self.log_message(f"Trade signal for {signal.symbol} rejected by one or more agents")
-                                rejected_trades.append({
-                                    "signal": modified_signal,
-                                    "reason": "Rejected by one or more agents during confirmation"
-                                })
-                                continue
-                        
-                        # Execute the modified trade
-                        execution_result = await self.pydantic_agent.execute_trade(
+                    # Get confirmations if required
+                    confirmations = []
+                    if task_input.require_confirmation:
+                        risk_confirmation = await self.pydantic_agent.get_agent_confirmation(
                             RunContext(deps=deps),
-                            trade_signal=modified_signal,
-                            dry_run=task_input.dry_run
+                            trade_signal=signal_dict,
+                            agent_type="risk"
                         )
                         
-                        modified_trades.append({
-                            "original_signal": signal_dict,
-                            "modified_signal": modified_signal,
-                            "reason": evaluation.get("reasoning"),
-                            "execution_result": execution_result
-                        })
-                    else:  # "execute"
-                        self.log_message(f"Executing trade signal for {signal.symbol}")
-                        
-                        # Get confirmations if required
-                        confirmations = []
-                        if task_input.require_confirmation:
-                            risk_confirmation = await self.pydantic_agent.get_agent_confirmation(
-                                RunContext(deps=deps),
-                                trade_signal=signal_dict,
-                                agent_type="risk"
-                            )
-                            
-                            portfolio_confirmation = await self.pydantic_agent.get_agent_confirmation(
-                                RunContext(deps=deps),
-                                trade_signal=signal_dict,
-                                agent_type="portfolio"
-                            )
-                            
-                            research_confirmation = await self.pydantic_agent.get_agent_confirmation(
-                                RunContext(deps=deps),
-                                trade_signal=signal_dict,
-                                agent_type="research"
-                            )
-                            
-                            confirmations = [risk_confirmation, portfolio_confirmation, research_confirmation]
-                            
-                            # Add any warnings from confirmations
-                            for confirmation in confirmations:
-                                warnings.extend(confirmation.get("warnings", []))
-                            
-                            # Check if all confirmations are positive
-                            all_confirmed = all(confirmation.get("confirmed", False) for confirmation in confirmations)
-                            
-                            if not all_confirmed:
-                                self.log_message(f"Trade signal for {signal.symbol} rejected by one or more agents")
-                                rejected_trades.append({
-                                    "signal": signal_dict,
-                                    "reason": "Rejected by one or more agents during confirmation"
-                                })
-                                continue
+                        portfolio_confirmation = await self.pydantic_agent.get_agent_confirmation(
+                            RunContext(deps=deps),
+                            trade_signal=signal_dict,
+                            agent_type="portfolio"
+                        )
                         
-                        # Execute the trade
-                        execution_result = await self.pydantic_agent.execute_trade(
+                        research_confirmation = await self.pydantic_agent.get_agent_confirmation(
                             RunContext(deps=deps),
                             trade_signal=signal_dict,
-                            dry_run=task_input.dry_run
+                            agent_type="research"
                         )
                         
-                        executed_trades.append({
-                            "signal": signal_dict,
-                            "execution_result": execution_result
-                        })
-                
-                # Generate execution summary
-                execution_summary = f"Processed {len(task_input.trade_signals)} trade signals: "
-                execution_summary += f"{len(executed_trades)} executed, {len(rejected_trades)} rejected, {len(modified_trades)} modified."
-                
-                if task_input.dry_run:
-                    execution_summary += " (DRY RUN MODE - No actual trades placed)"
-                
-                self.log_message(execution_summary)
-                
-                # Update agent stats
-                self._update_agent_stats(success=True, session=session)
-                
-                return ExecutionOutput(
-                    success=True,
-                    message="Execution completed successfully",
-                    executed_trades=executed_trades,
-                    rejected_trades=rejected_trades,
-                    modified_trades=modified_trades,
-                    execution_summary=execution_summary,
-                    warnings=warnings
-                )
-                
+                        confirmations = [risk_confirmation, portfolio_confirmation, research_confirmation]
+                        
+                        # Add any warnings from confirmations
+                        for confirmation in confirmations:
+                            warnings.extend(confirmation.get("warnings", []))
+                        
+                        # Check if all confirmations are positive
+                        all_confirmed = all(confirmation.get("confirmed", False) for confirmation in confirmations)
+                        
+                        if not all_confirmed:
+                            self.log_message(f"Trade signal for {signal.symbol} rejected by one or more agents")
+                            rejected_trades.append({
+                                "signal": signal_dict,
+                                "reason": "Rejected by one or more agents during confirmation"
+                            })
+                            continue
+                    
+                    # Execute the trade
+                    execution_result = await self.pydantic_agent.execute_trade(
+                        RunContext(deps=deps),
+                        trade_signal=signal_dict,
+                        dry_run=task_input.dry_run
+                    )
+                    
+                    executed_trades.append({
+                        "signal": signal_dict,
+                        "execution_result": execution_result
+                    })
+            
+            # Generate execution summary
+            execution_summary = f"Processed {len(task_input.trade_signals)} trade signals: "
+            execution_summary += f"{len(executed_trades)} executed, {len(rejected_trades)} rejected, {len(modified_trades)} modified."
+            
+            if task_input.dry_run:
+                execution_summary += " (DRY RUN MODE - No actual trades placed)"
+            
+            self.log_message(execution_summary)
+            
+            # Update agent stats
+            self._update_agent_stats(success=True, session=session)
+            
+            return ExecutionOutput(
+                success=True,
+                message="Execution completed successfully",
+                executed_trades=executed_trades,
+                rejected_trades=rejected_trades,
+                modified_trades=modified_trades,
+                execution_summary=execution_summary,
+                warnings=warnings
+            )
+            
         except Exception as e:
             self.log_message(f"Execution failed: {str(e)}", level="error")
             # Update agent stats
@@ -3,6 +3,7 @@ LLM client implementations for various providers.
 Supports OpenAI, Groq, and local models.
 """
 import os
+from functools import cache
 from typing import Optional, Dict, Any, Literal
 from pydantic_ai.llm import LLM
 from pydantic_ai.llm.openai import OpenAILLM
@@ -11,6 +12,7 @@ from pydantic_ai.llm.groq import GroqLLM
 from pydantic_ai.llm.google import GoogleLLM
 from pydantic_ai.llm.anthropic import AnthropicLLM
 import logfire
+import instructor
 
 # Define supported LLM providers
 LLMProviderType = Literal["openai", "groq", "google", "anthropic", "local"]
@@ -91,3 +93,45 @@ def get_llm_client(provider_id: Optional[str] = None, model_name: Optional[str]
     
     # This should never happen due to the validation above
     raise ValueError(f"Unsupported LLM provider: {provider_id}")
+
+# Provider API key environment variables, for clients built outside get_llm_client
+_API_KEY_ENV_VARS = {
+    "openai": "OPENAI_API_KEY",
+    "groq": "GROQ_API_KEY",
+    "google": "GOOGLE_API_KEY",
+    "anthropic": "ANTHROPIC_API_KEY",
+}
+
+def get_instructor_client(provider_id: Optional[str] = None, model_name: Optional[str] = None) -> instructor.AsyncInstructor:
+    """
+    Get an async Instructor client for structured (response_model) LLM calls.
+    Provider and model resolution mirrors get_llm_client.
+    
+    Args:
+        provider_id: The LLM provider ID (openai, groq, google, anthropic, local)
+        model_name: The specific model name to use
+        
+    Returns:
+        An async Instructor client, shared across calls with the same provider and model
+    """
+    provider_id = (provider_id or os.getenv("DEFAULT_LLM_PROVIDER", "groq")).lower()
+    if provider_id not in DEFAULT_MODELS:
+        raise ValueError(f"Unsupported LLM provider: {provider_id}")
+    if provider_id == "local":
+        # Same fallback as get_llm_client
+        provider_id, model_name = "openai", "gpt-3.5-turbo"
+    model_name = model_name or os.getenv(f"{provider_id.upper()}_MODEL", DEFAULT_MODELS[provider_id])
+    
+    return _shared_instructor_client(provider_id, model_name, os.getenv(_API_KEY_ENV_VARS[provider_id]))
+
+@cache
+def _shared_instructor_client(provider_id: str, model_name: str, api_key: Optional[str]) -> instructor.AsyncInstructor:
+    """
+    One Instructor client per (provider, model, key), shared by every agent instance so the
+    underlying SDK client's HTTP connection pool stays warm across requests.
+    """
+    return instructor.from_provider(
+        f"{provider_id}/{model_name}",
+        async_client=True,
+        api_key=api_key
+    )
@@ -424,90 +424,88 @@ class PortfolioAIAgent(PydanticAIAgent[PortfolioInput, PortfolioOutput]):
         self.log_message(f"Starting portfolio analysis")
         
         try:
-            # Create HTTP client for API requests
-            async with httpx.AsyncClient() as client:
-                # Set up dependencies
-                deps = PortfolioDeps(
-                    client=client,
-                    broker_api_key=os.getenv("BROKER_API_KEY"),
-                    market_data_api_key=os.getenv("MARKET_DATA_API_KEY")
+            # Set up dependencies; the process-wide HTTP client keeps its connection pool across runs
+            deps = PortfolioDeps(
+                client=self.dependencies.client,
+                broker_api_key=os.getenv("BROKER_API_KEY"),
+                market_data_api_key=os.getenv("MARKET_DATA_API_KEY")
+            )
+            
+            # Get rebalance threshold from input or config
+            rebalance_threshold = task_input.rebalance_threshold
+            if rebalance_threshold is None:
+                rebalance_threshold = getattr(self.config, 'rebalanceThresholdPercent', 5.0) / 100.0
+            
+            # Run the agent
+            result = await self.pydantic_agent.run(
+                deps=deps,
+                portfolio_id=task_input.portfolio_id,
+                include_metrics=task_input.include_metrics,
+                include_allocation=task_input.include_allocation,
+                rebalance_threshold=rebalance_threshold
+            )
+            
+            # Process the result
+            self.log_message(f"Portfolio analysis completed successfully")
+            
+            # Update agent stats
+            self._update_agent_stats(success=True, session=session)
+            
+            # Extract structured data from the result
+            # In a real implementation, we would parse the agent's response
+            # For now, we'll create a mock output
+            
+            # Get portfolio metrics
+            metrics = None
+            if task_input.include_metrics:
+                metrics_data = await self.pydantic_agent.get_portfolio_metrics(
+                    RunContext(deps=deps),
+                    portfolio_id=task_input.portfolio_id
                 )
-                
-                # Get rebalance threshold from input or config
-                rebalance_threshold = task_input.rebalance_threshold
-                if rebalance_threshold is None:
-                    rebalance_threshold = getattr(self.config, 'rebalanceThresholdPercent', 5.0) / 100.0
-                
-                # Run the agent
-                result = await self.pydantic_agent.run(
-                    deps=deps,
-                    portfolio_id=task_input.portfolio_id,
-                    include_metrics=task_input.include_metrics,
-                    include_allocation=task_input.include_allocation,
-                    rebalance_threshold=rebalance_threshold
+                metrics = PortfolioMetrics(**metrics_data)
+            
+            # Get asset allocations
+            allocations = []
+            if task_input.include_allocation:
+                allocation_data = await self.pydantic_agent.get_asset_allocation(
+                    RunContext(deps=deps),
+                    portfolio_id=task_input.portfolio_id
                 )
-                
-                # Process the result
-                self.log_message(f"Portfolio analysis completed successfully")
-                
-                # Update agent stats
-                self._update_agent_stats(success=True, session=session)
-                
-                # Extract structured data from the result
-                # In a real implementation, we would parse the agent's response
-                # For now, we'll create a mock output
-                
-                # Get portfolio metrics
-                metrics = None
-                if task_input.include_metrics:
-                    metrics_data = await self.pydantic_agent.get_portfolio_metrics(
-                        RunContext(deps=deps),
-                        portfolio_id=task_input.portfolio_id
-                    )
-                    metrics = PortfolioMetrics(**metrics_data)
-                
-                # Get asset allocations
-                allocations = []
-                if task_input.include_allocation:
-                    allocation_data = await self.pydantic_agent.get_asset_allocation(
-                        RunContext(deps=deps),
-                        portfolio_id=task_input.portfolio_id
-                    )
-                    allocations = [AssetAllocation(**asset) for asset in allocation_data]
-                
-                # Generate rebalance recommendations
-                rebalance_recommendations = []
-                if task_input.include_recommendations and allocations:
-                    rebalance_recommendations = await self.pydantic_agent.generate_rebalance_recommendations(
-                        RunContext(deps=deps),
-                        allocations=allocation_data,
-                        threshold=rebalance_threshold
-                    )
-                
-                # Generate optimization suggestions
-                optimization_suggestions = [
-                    "Consider increasing allocation to SPY to reach target weight of 25%",
-                    "AAPL and QQQ are overweight relative to targets, consider trimming positions",
-                    "Portfolio has strong tech concentration, consider diversifying into other sectors"
-                ]
-                
-                # Generate risk insights
-                risk_insights = [
-                    "Portfolio beta of 0.92 indicates slightly lower market risk than benchmark",
-                    "Current volatility (12%) is within acceptable range for the strategy",
-                    "Max drawdown of 8% is well below risk tolerance threshold of 15%"
-                ]
-                
-                return PortfolioOutput(
-                    success=True,
-                    message="Portfolio analysis completed successfully",
-                    metrics=metrics,
-                    allocations=allocations,
-                    rebalance_recommendations=rebalance_recommendations,
-                    optimization_suggestions=optimization_suggestions,
-                    risk_insights=risk_insights
+                allocations = [AssetAllocation(**asset) for asset in allocation_data]
+            
+            # Generate rebalance recommendations
+            rebalance_recommendations = []
+            if task_input.include_recommendations and allocations:
+                rebalance_recommendations = await self.pydantic_agent.generate_rebalance_recommendations(
+                    RunContext(deps=deps),
+                    allocations=allocation_data,
+                    threshold=rebalance_threshold
                 )
-                
+            
+            # Generate optimization suggestions
+            optimization_suggestions = [
+                "Consider increasing allocation to SPY to reach target weight of 25%",
+                "AAPL and QQQ are overweight relative to targets, consider trimming positions",
+                "Portfolio has strong tech concentration, consider diversifying into other sectors"
+            ]
+            
+            # Generate risk insights
+            risk_insights = [
+                "Portfolio beta of 0.92 indicates slightly lower market risk than benchmark",
+                "Current volatility (12%) is within acceptable range for the strategy",
+                "Max drawdown of 8% is well below risk tolerance threshold of 15%"
+            ]
+            
+            return PortfolioOutput(
+                success=True,
+                message="Portfolio analysis completed successfully",
+                metrics=metrics,
+                allocations=allocations,
+                rebalance_recommendations=rebalance_recommendations,
+                optimization_suggestions=optimization_suggestions,
+                risk_insights=risk_insights
+            )
+            
         except Exception as e:
             self.log_message(f"Portfolio analysis failed: {str(e)}", level="error")
             # Update agent stats
@@ -2,33 +2,46 @@
 Research & News Agent implementation using Pydantic AI.
 This agent specializes in market/news analysis and indicator extraction.
 """
-from typing import Dict, List, Any, Optional, ClassVar, Type
-from pydantic import BaseModel, Field
+from typing import Dict, List, Any, Optional, ClassVar, Type, Tuple
+from pydantic import BaseModel, ConfigDict, Field, field_serializer
 from sqlmodel import Session
-from pydantic_ai import Agent, RunContext
+from pydantic_ai import Agent, RunContext, Tool
 from pydantic_ai.mode import Mode
 from dataclasses import dataclass
 import httpx
 import asyncio
+import msgspec
 import logfire
 import os
+import functools
 from datetime import datetime, timedelta
 
+try:
+    import hyperscan
+except ImportError:  # Optional, x86-only; fall back to plain substring checks
+    hyperscan = None
+
 from backend import schemas, models
-from backend.ai_agents.base_agent import PydanticAIAgent, AgentTaskInput, AgentTaskOutput
+from backend.ai_agents.base_agent import PydanticAIAgent, AgentTaskInput, AgentTaskOutput, compile_prompt_template
 from backend.ai_agents.llm_clients import get_llm_client
 
 # --- Input/Output Models ---
 
 class ResearchInput(AgentTaskInput):
     """Input for the Research & News Agent."""
+    model_config = ConfigDict(frozen=True)
+
     symbols: List[str] = Field(description="List of asset symbols to research")
     timeframe: str = Field(default="1d", description="Timeframe for market data (e.g., 1h, 1d, 1w)")
     focus_areas: Optional[List[str]] = Field(default=None, description="Specific areas to focus on (e.g., earnings, macro trends)")
     max_news_age_days: int = Field(default=7, description="Maximum age of news articles to consider in days")
 
-class NewsArticle(BaseModel):
-    """Model representing a news article."""
+# NewsArticle and MarketData are built internally by the agent and only ever
+# serialized, so they are msgspec structs (slotted, no per-field validation)
+# rather than Pydantic models.
+
+class NewsArticle(msgspec.Struct, frozen=True, gc=False):
+    """Struct representing a news article."""
     title: str
     source: str
     published_date: str
@@ -36,27 +49,39 @@ class NewsArticle(BaseModel):
     url: Optional[str] = None
     sentiment: Optional[str] = None
 
-class MarketData(BaseModel):
-    """Model representing market data for an asset."""
+class MarketData(msgspec.Struct, frozen=True, gc=False):
+    """Struct representing market data for an asset."""
     symbol: str
     price: float
     change_percent: float
     volume: float
     high: float
     low: float
-    indicators: Dict[str, float] = Field(default_factory=dict)
+    indicators: Dict[str, float] = msgspec.field(default_factory=dict)
+
+class SentimentResult(BaseModel):
+    """Model representing the sentiment of a single text, as returned by the LLM."""
+    sentiment: str = Field(description="One of positive, negative or neutral")
+    score: float = Field(ge=0, le=1, description="Sentiment score from 0 (very negative) to 1 (very positive)")
 
 class ResearchOutput(AgentTaskOutput):
     """Output from the Research & News Agent."""
+    model_config = ConfigDict(arbitrary_types_allowed=True, frozen=True)
+
     market_data: Dict[str, MarketData] = Field(default_factory=dict)
     news_articles: List[NewsArticle] = Field(default_factory=list)
     key_insights: List[str] = Field(default_factory=list)
     trading_opportunities: List[Dict[str, Any]] = Field(default_factory=list)
     relevant_indicators: Dict[str, List[str]] = Field(default_factory=dict)
 
+    @field_serializer('market_data', 'news_articles')
+    def _serialize_structs(self, value: Any) -> Any:
+        """Convert msgspec structs to builtins so model_dump/JSON responses keep working."""
+        return msgspec.to_builtins(value)
+
 # --- Agent Dependencies ---
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ResearchDeps:
     """Dependencies for the Research & News Agent."""
     client: httpx.AsyncClient
@@ -64,6 +89,277 @@ class ResearchDeps:
     news_api_key: Optional[str] = None
     serp_api_key: Optional[str] = None
 
+# --- Agent Tools ---
+
+@functools.lru_cache(maxsize=2048)
+def _slug(text: str) -> str:
+    """URL slug for a symbol or query; memoized since the same symbols recur across runs."""
+    return text.lower().replace(' ', '-')
+
+async def fetch_market_data(ctx: RunContext[ResearchDeps], symbol: str, timeframe: str = "1d") -> Dict[str, Any]:
+    """
+    Fetch market data for a specific symbol.
+    
+    Args:
+        ctx: The context.
+        symbol: The asset symbol to fetch data for.
+        timeframe: The timeframe for the data (e.g., 1h, 1d, 1w).
+        
+    Returns:
+        A dictionary containing market data.
+    """
+    api_key = ctx.deps.market_data_api_key
+    
+    # Mock implementation for demo purposes
+    if not api_key:
+        logfire.warning("No market data API key provided, returning mock data")
+        return {
+            "symbol": symbol,
+            "price": 150.25,
+            "change_percent": 2.5,
+            "volume": 1000000,
+            "high": 152.30,
+            "low": 148.75,
+            "indicators": {
+                "rsi": 65.4,
+                "macd": 0.75,
+                "sma_50": 145.20,
+                "sma_200": 140.50
+            }
+        }
+    
+    # Real implementation would use the API key to fetch data
+    # For example:
+    # async with ctx.deps.client.get(
+    #     f"https://api.marketdata.com/v1/quotes/{symbol}",
+    #     headers={"Authorization": f"Bearer {api_key}"}
+    # ) as response:
+    #     data = await response.json()
+    #     return data
+    
+    # For now, return mock data
+    return {
+        "symbol": symbol,
+        "price": 150.25,
+        "change_percent": 2.5,
+        "volume": 1000000,
+        "high": 152.30,
+        "low": 148.75,
+        "indicators": {
+            "rsi": 65.4,
+            "macd": 0.75,
+            "sma_50": 145.20,
+            "sma_200": 140.50
+        }
+    }
+
+async def search_news(ctx: RunContext[ResearchDeps], query: str, max_age_days: int = 7) -> List[Dict[str, Any]]:
+    """
+    Search for news articles related to the query.
+    
+    Args:
+        ctx: The context.
+        query: The search query.
+        max_age_days: Maximum age of news articles in days.
+        
+    Returns:
+        A list of news articles.
+    """
+    api_key = ctx.deps.news_api_key
+    serp_api_key = ctx.deps.serp_api_key
+    now = datetime.now()
+    query_slug = _slug(query)
+    
+    # Mock implementation for demo purposes
+    if not api_key and not serp_api_key:
+        logfire.warning("No news API key provided, returning mock data")
+        return [
+            {
+                "title": f"Market Update: {query}",
+                "source": "Financial Times",
+                "published_date": (now - timedelta(days=1)).isoformat(),
+                "summary": f"Recent developments in {query} show promising trends for investors.",
+                "url": f"https://example.com/news/{query_slug}",
+                "sentiment": "positive"
+            },
+            {
+                "title": f"Analyst Insights: {query}",
+                "source": "Bloomberg",
+                "published_date": (now - timedelta(days=3)).isoformat(),
+                "summary": f"Analysts provide mixed outlook for {query} in the coming quarter.",
+                "url": f"https://example.com/analysis/{query_slug}",
+                "sentiment": "neutral"
+            }
+        ]
+    
+    # Real implementation would use the API key to fetch news
+    # For example:
+    # async with ctx.deps.client.get(
+    #     "https://newsapi.org/v2/everything",
+    #     params={
+    #         "q": query,
+    #         "from": (datetime.now() - timedelta(days=max_age_days)).isoformat(),
+    #         "sortBy": "publishedAt",
+    #         "apiKey": api_key
+    #     }
+    # ) as response:
+    #     data = await response.json()
+    #     articles = data.get("articles", [])
+    #     return [
+    #         {
+    #             "title": article["title"],
+    #             "source": article["source"]["name"],
+    #             "published_date": article["publishedAt"],
+    #             "summary": article["description"],
+    #             "url": article["url"]
+    #         }
+    #         for article in articles[:5]  # Limit to 5 articles
+    #     ]
+    
+    # For now, return mock data
+    return [
+        {
+            "title": f"Market Update: {query}",
+            "source": "Financial Times",
+            "published_date": (now - timedelta(days=1)).isoformat(),
+            "summary": f"Recent developments in {query} show promising trends for investors.",
+            "url": f"https://example.com/news/{query_slug}",
+            "sentiment": "positive"
+        },
+        {
+            "title": f"Analyst Insights: {query}",
+            "source": "Bloomberg",
+            "published_date": (now - timedelta(days=3)).isoformat(),
+            "summary": f"Analysts provide mixed outlook for {query} in the coming quarter.",
+            "url": f"https://example.com/analysis/{query_slug}",
+            "sentiment": "neutral"
+        }
+    ]
+
+_POSITIVE_WORDS = ("growth", "profit", "increase", "positive", "bullish", "up", "gain", "success")
+_NEGATIVE_WORDS = ("decline", "loss", "decrease", "negative", "bearish", "down", "fail", "risk")
+
+def _compile_sentiment_database():
+    """Compile all sentiment keywords into a single Hyperscan database, if available."""
+    if hyperscan is None:
+        return None
+    words = _POSITIVE_WORDS + _NEGATIVE_WORDS
+    database = hyperscan.Database()
+    # SINGLEMATCH reports each keyword at most once, matching the substring-presence semantics below
+    database.compile(
+        expressions=[word.encode() for word in words],
+        ids=list(range(len(words))),
+        elements=len(words),
+        flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(words)
+    )
+    return database
+
+_SENTIMENT_DATABASE = _compile_sentiment_database()
+
+def _count_sentiment_words(text: str) -> Tuple[int, int]:
+    """Count how many distinct positive and negative keywords occur in a text."""
+    if _SENTIMENT_DATABASE is None:
+        text_lower = text.lower()
+        positive_count = sum(1 for word in _POSITIVE_WORDS if word in text_lower)
+        negative_count = sum(1 for word in _NEGATIVE_WORDS if word in text_lower)
+        return positive_count, negative_count
+    
+    # Single pass over the text for both polarities
+    counts = [0, 0]
+    def on_match(word_id, start, end, flags, context):
+        counts[word_id >= len(_POSITIVE_WORDS)] += 1
+    _SENTIMENT_DATABASE.scan(text.encode(), match_event_handler=on_match)
+    return counts[0], counts[1]
+
+def _keyword_sentiment(text: str) -> Dict[str, Any]:
+    """Score the sentiment of a text by counting positive and negative keywords."""
+    positive_count, negative_count = _count_sentiment_words(text)
+    
+    if positive_count > negative_count:
+        sentiment = "positive"
+        score = 0.5 + (positive_count - negative_count) * 0.1
+    elif negative_count > positive_count:
+        sentiment = "negative"
+        score = 0.5 - (negative_count - positive_count) * 0.1
+    else:
+        sentiment = "neutral"
+        score = 0.5
+    
+    # Ensure score is between 0 and 1
+    score = max(0, min(1, score))
+    
+    return {
+        "sentiment": sentiment,
+        "score": score,
+        "positive_aspects": positive_count,
+        "negative_aspects": negative_count
+    }
+
+async def analyze_sentiment(ctx: RunContext[ResearchDeps], text: str) -> Dict[str, Any]:
+    """
+    Analyze the sentiment of a text.
+    
+    Args:
+        ctx: The context.
+        text: The text to analyze.
+        
+    Returns:
+        A dictionary containing sentiment analysis results.
+    """
+    # This could use the LLM directly or a specialized sentiment analysis API
+    # For now, we'll use a simple mock implementation
+    return _keyword_sentiment(text)
+
+# Sub-agent used for batched sentiment analysis; the model is supplied per run
+_sentiment_agent = Agent(
+    output_type=List[SentimentResult],
+    system_prompt=(
+        "You are a financial news sentiment classifier.\n"
+        "For each numbered text, return one result in the same order with a sentiment "
+        "(positive, negative or neutral) and a score between 0 (very negative) and 1 (very positive)."
+    ),
+    retries=1,
+)
+
+async def analyze_sentiment_batch(ctx: RunContext[ResearchDeps], texts: List[str]) -> List[Dict[str, Any]]:
+    """
+    Analyze the sentiment of several texts with a single LLM call.
+    Prefer this over calling analyze_sentiment once per article.
+    
+    Args:
+        ctx: The context.
+        texts: The texts to analyze, e.g. all news article summaries.
+        
+    Returns:
+        A list of sentiment analysis results, in the same order as the texts.
+    """
+    if not texts:
+        return []
+    
+    numbered_texts = "\n".join(f"{i}. {text}" for i, text in enumerate(texts, start=1))
+    try:
+        result = await _sentiment_agent.run(
+            f"Classify the sentiment of the following {len(texts)} texts:\n{numbered_texts}",
+            model=ctx.model,
+            usage=ctx.usage
+        )
+        if len(result.output) == len(texts):
+            return [sentiment.model_dump() for sentiment in result.output]
+        logfire.warning("Batched sentiment result count mismatch, falling back to keyword scoring",
+                        expected=len(texts), received=len(result.output))
+    except Exception as e:
+        logfire.warning("Batched sentiment analysis failed, falling back to keyword scoring", error=str(e))
+    
+    return [_keyword_sentiment(text) for text in texts]
+
+# Tool schemas are extracted once at import time instead of on every agent build
+_RESEARCH_TOOLS = (
+    Tool(fetch_market_data, takes_ctx=True),
+    Tool(search_news, takes_ctx=True),
+    Tool(analyze_sentiment, takes_ctx=True),
+    Tool(analyze_sentiment_batch, takes_ctx=True),
+)
+
 # --- Agent Implementation ---
 
 class ResearchAIAgent(PydanticAIAgent[ResearchInput, ResearchOutput]):
@@ -81,202 +377,25 @@ class ResearchAIAgent(PydanticAIAgent[ResearchInput, ResearchOutput]):
             "Focus on {watchedAssets} with particular attention to {focusAreas}.\n"
             "Market Data: {marketData}\nRecent News: {recentNews}"
         )
+        # Lex the prompt once; only the dynamic tail is rendered per run
+        self._prompt_prefix, self._prompt_template = compile_prompt_template(system_prompt)
         
         # Create the agent
         research_agent = Agent(
             self.llm_client,
-            system_prompt=system_prompt,
+            system_prompt=self._prompt_prefix,
             deps_type=ResearchDeps,
+            tools=_RESEARCH_TOOLS,
             retries=2,
             instrument=True
         )
         
-        # Define tools
-        
-        @research_agent.tool
-        async def fetch_market_data(ctx: RunContext[ResearchDeps], symbol: str, timeframe: str = "1d") -> Dict[str, Any]:
-            """
-            Fetch market data for a specific symbol.
-            
-            Args:
-                ctx: The context.
-                symbol: The asset symbol to fetch data for.
-                timeframe: The timeframe for the data (e.g., 1h, 1d, 1w).
-                
-            Returns:
-                A dictionary containing market data.
-            """
-            api_key = ctx.deps.market_data_api_key
-            
-            # Mock implementation for demo purposes
-            if not api_key:
-                logfire.warning("No market data API key provided, returning mock data")
-                return {
-                    "symbol": symbol,
-                    "price": 150.25,
-                    "change_percent": 2.5,
-                    "volume": 1000000,
-                    "high": 152.30,
-                    "low": 148.75,
-                    "indicators": {
-                        "rsi": 65.4,
-                        "macd": 0.75,
-                        "sma_50": 145.20,
-                        "sma_200": 140.50
-                    }
-                }
-            
-            # Real implementation would use the API key to fetch data
-            # For example:
-            # async with ctx.deps.client.get(
-            #     f"https://api.marketdata.com/v1/quotes/{symbol}",
-            #     headers={"Authorization": f"Bearer {api_key}"}
-            # ) as response:
-            #     data = await response.json()
-            #     return data
-            
-            # For now, return mock data
-            return {
-                "symbol": symbol,
-                "price": 150.25,
-                "change_percent": 2.5,
-                "volume": 1000000,
-                "high": 152.30,
-                "low": 148.75,
-                "indicators": {
-                    "rsi": 65.4,
-                    "macd": 0.75,
-                    "sma_50": 145.20,
-                    "sma_200": 140.50
-                }
-            }
-        
-        @research_agent.tool
-        async def search_news(ctx: RunContext[ResearchDeps], query: str, max_age_days: int = 7) -> List[Dict[str, Any]]:
-            """
-            Search for news articles related to the query.
-            
-            Args:
-                ctx: The context.
-                query: The search query.
-                max_age_days: Maximum age of news articles in days.
-                
-            Returns:
-                A list of news articles.
-            """
-            api_key = ctx.deps.news_api_key
-            serp_api_key = ctx.deps.serp_api_key
-            
-            # Mock implementation for demo purposes
-            if not api_key and not serp_api_key:
-                logfire.warning("No news API key provided, returning mock data")
-                return [
-                    {
-                        "title": f"Market Update: {query}",
-                        "source": "Financial Times",
-                        "published_date": (datetime.now() - timedelta(days=1)).isoformat(),
-                        "summary": f"Recent developments in {query} show promising trends for investors.",
-                        "url": f"https://example.com/news/{query.lower().replace(' ', '-')}",
-                        "sentiment": "positive"
-                    },
-                    {
-                        "title": f"Analyst Insights: {query}",
-                        "source": "Bloomberg",
-                        "published_date": (datetime.now() - timedelta(days=3)).isoformat(),
-                        "summary": f"Analysts provide mixed outlook for {query} in the coming quarter.",
-                        "url": f"https://example.com/analysis/{query.lower().replace(' ', '-')}",
-                        "sentiment": "neutral"
-                    }
-                ]
-            
-            # Real implementation would use the API key to fetch news
-            # For example:
-            # async with ctx.deps.client.get(
-            #     "https://newsapi.org/v2/everything",
-            #     params={
-            #         "q": query,
-            #         "from": (datetime.now() - timedelta(days=max_age_days)).isoformat(),
-            #         "sortBy": "publishedAt",
-            #         "apiKey": api_key
-            #     }
-            # ) as response:
-            #     data = await response.json()
-            #     articles = data.get("articles", [])
-            #     return [
-            #         {
-            #             "title": article["title"],
-            #             "source": article["source"]["name"],
-            #             "published_date": article["publishedAt"],
-            #             "summary": article["description"],
-            #             "url": article["url"]
-            #         }
-            #         for article in articles[:5]  # Limit to 5 articles
-            #     ]
-            
-            # For now, return mock data
-            return [
-                {
-                    "title": f"Market Update: {query}",
-                    "source": "Financial Times",
-                    "published_date": (datetime.now() - timedelta(days=1)).isoformat(),
-                    "summary": f"Recent developments in {query} show promising trends for investors.",
-                    "url": f"https://example.com/news/{query.lower().replace(' ', '-')}",
-                    "sentiment": "positive"
-                },
-                {
-                    "title": f"Analyst Insights: {query}",
-                    "source": "Bloomberg",
-                    "published_date": (datetime.now() - timedelta(days=3)).isoformat(),
-                    "summary": f"Analysts provide mixed outlook for {query} in the coming quarter.",
-                    "url": f"https://example.com/analysis/{query.lower().replace(' ', '-')}",
-                    "sentiment": "neutral"
-                }
-            ]
-        
-        @research_agent.tool
-        async def analyze_sentiment(ctx: RunContext[ResearchDeps], text: str) -> Dict[str, Any]:
-            """
-            Analyze the sentiment of a text.
-            
-            Args:
-                ctx: The context.
-                text: The text to analyze.
-                
-            Returns:
-                A dictionary containing sentiment analysis results.
-            """
-            # This could use the LLM directly or a specialized sentiment analysis API
-            # For now, we'll use a simple mock implementation
-            
-            positive_words = ["growth", "profit", "increase", "positive", "bullish", "up", "gain", "success"]
-            negative_words = ["decline", "loss", "decrease", "negative", "bearish", "down", "fail", "risk"]
-            
-            text_lower = text.lower()
-            positive_count = sum(1 for word in positive_words if word in text_lower)
-            negative_count = sum(1 for word in negative_words if word in text_lower)
-            
-            if positive_count > negative_count:
-                sentiment = "positive"
-                score = 0.5 + (positive_count - negative_count) * 0.1
-            elif negative_count > positive_count:
-                sentiment = "negative"
-                score = 0.5 - (negative_count - positive_count) * 0.1
-            else:
-                sentiment = "neutral"
-                score = 0.5
-            
-            # Ensure score is between 0 and 1
-            score = max(0, min(1, score))
-            
-            return {
-                "sentiment": sentiment,
-                "score": score,
-                "positive_aspects": positive_count,
-                "negative_aspects": negative_count
-            }
-        
         return research_agent
 
+    def _render_prompt(self, **variables: Any) -> str:
+        """Render the dynamic part of the research prompt for a single run."""
+        return self._prompt_template.safe_substitute(variables)
+
     async def run(self, task_input: ResearchInput, session: Session) -> ResearchOutput:
         """
         Run the Research & News Agent to analyze market data and news.
@@ -291,98 +410,100 @@ class ResearchAIAgent(PydanticAIAgent[ResearchInput, ResearchOutput]):
         self.log_message(f"Starting research for symbols: {task_input.symbols}")
         
         try:
-            # Create HTTP client for API requests
-            async with httpx.AsyncClient() as client:
-                # Set up dependencies
-                deps = ResearchDeps(
-                    client=client,
-                    market_data_api_key=os.getenv("MARKET_DATA_API_KEY"),
-                    news_api_key=os.getenv("NEWS_API_KEY"),
-                    serp_api_key=os.getenv("SERP_API_KEY")
+            # Set up dependencies; the process-wide HTTP client keeps its connection pool across runs
+            deps = ResearchDeps(
+                client=self.dependencies.client,
+                market_data_api_key=os.getenv("MARKET_DATA_API_KEY"),
+                news_api_key=os.getenv("NEWS_API_KEY"),
+                serp_api_key=os.getenv("SERP_API_KEY")
+            )
+            
+            # Prepare the prompt variables
+            watched_assets = ", ".join(task_input.symbols)
+            focus_areas = ", ".join(task_input.focus_areas) if task_input.focus_areas else "general market trends"
+            
+            # Run the agent
+            prompt = self._render_prompt(
+                watchedAssets=watched_assets,
+                focusAreas=focus_areas,
+                marketData="Not provided, use the fetch_market_data tool.",
+                recentNews="Not provided, use the search_news tool.",
+                timeframe=task_input.timeframe,
+                max_news_age=task_input.max_news_age_days
+            )
+            result = await self.pydantic_agent.run(prompt, deps=deps)
+            
+            # Process the result
+            self.log_message(f"Research completed successfully")
+            
+            # Update agent stats
+            self._update_agent_stats(success=True, session=session)
+            
+            # Extract structured data from the result
+            # In a real implementation, we would parse the agent's response
+            # For now, we'll create a mock output
+            
+            market_data = {}
+            for symbol in task_input.symbols:
+                market_data[symbol] = MarketData(
+                    symbol=symbol,
+                    price=150.25 + (hash(symbol) % 100),
+                    change_percent=2.5 + (hash(symbol) % 5),
+                    volume=1000000 + (hash(symbol) % 500000),
+                    high=152.30 + (hash(symbol) % 10),
+                    low=148.75 - (hash(symbol) % 5),
+                    indicators={
+                        "rsi": 65.4 + (hash(symbol) % 10),
+                        "macd": 0.75 + (hash(symbol[:2]) % 1),
+                        "sma_50": 145.20 + (hash(symbol) % 20),
+                        "sma_200": 140.50 + (hash(symbol) % 30)
+                    }
                 )
-                
-                # Prepare the prompt variables
-                watched_assets = ", ".join(task_input.symbols)
-                focus_areas = ", ".join(task_input.focus_areas) if task_input.focus_areas else "general market trends"
-                
-                # Run the agent
-                result = await self.pydantic_agent.run(
-                    deps=deps,
-                    watchedAssets=watched_assets,
-                    focusAreas=focus_areas,
-                    timeframe=task_input.timeframe,
-                    max_news_age=task_input.max_news_age_days
+            
+            one_day_ago_iso = (datetime.now() - timedelta(days=1)).isoformat()
+            news_articles = [
+                NewsArticle(
+                    title=f"Market Update: {symbol}",
+                    source="Financial Times",
+                    published_date=one_day_ago_iso,
+                    summary=f"Recent developments in {symbol} show promising trends for investors.",
+                    url=f"https://example.com/news/{_slug(symbol)}",
+                    sentiment="positive"
                 )
-                
-                # Process the result
-                self.log_message(f"Research completed successfully")
-                
-                # Update agent stats
-                self._update_agent_stats(success=True, session=session)
-                
-                # Extract structured data from the result
-                # In a real implementation, we would parse the agent's response
-                # For now, we'll create a mock output
-                
-                market_data = {}
-                for symbol in task_input.symbols:
-                    market_data[symbol] = MarketData(
-                        symbol=symbol,
-                        price=150.25 + (hash(symbol) % 100),
-                        change_percent=2.5 + (hash(symbol) % 5),
-                        volume=1000000 + (hash(symbol) % 500000),
-                        high=152.30 + (hash(symbol) % 10),
-                        low=148.75 - (hash(symbol) % 5),
-                        indicators={
-                            "rsi": 65.4 + (hash(symbol) % 10),
-                            "macd": 0.75 + (hash(symbol[:2]) % 1),
-                            "sma_50": 145.20 + (hash(symbol) % 20),
-                            "sma_200": 140.50 + (hash(symbol) % 30)
-                        }
-                    )
-                
-                news_articles = [
-                    NewsArticle(
-                        title=f"Market Update: {symbol}",
-                        source="Financial Times",
-                        published_date=(datetime.now() - timedelta(days=1)).isoformat(),
-                        summary=f"Recent developments in {symbol} show promising trends for investors.",
-                        url=f"https://example.com/news/{symbol.lower().replace(' ', '-')}",
-                        sentiment="positive"
-                    )
-                    for symbol in task_input.symbols
-                ]
-                
-                key_insights = [
-                    f"Strong momentum observed in {task_input.symbols[0]} based on RSI and volume patterns",
-                    f"Recent news sentiment for {task_input.symbols[-1]} is predominantly positive",
-                    "Market volatility has decreased over the past week, suggesting potential stability"
-                ]
-                
-                trading_opportunities = [
-                    {
-                        "symbol": task_input.symbols[0],
-                        "direction": "long",
-                        "confidence": 0.75,
-                        "rationale": "Strong technical indicators and positive news sentiment"
-                    }
-                ]
-                
-                relevant_indicators = {
-                    symbol: ["RSI", "MACD", "Volume", "SMA-50/200 Crossover"]
-                    for symbol in task_input.symbols
+                for symbol in task_input.symbols
+            ]
+            
+            key_insights = [
+                f"Strong momentum observed in {task_input.symbols[0]} based on RSI and volume patterns",
+                f"Recent news sentiment for {task_input.symbols[-1]} is predominantly positive",
+                "Market volatility has decreased over the past week, suggesting potential stability"
+            ]
+            
+            trading_opportunities = [
+                {
+                    "symbol": task_input.symbols[0],
+                    "direction": "long",
+                    "confidence": 0.75,
+                    "rationale": "Strong technical indicators and positive news sentiment"
                 }
-                
-                return ResearchOutput(
-                    success=True,
-                    message="Research completed successfully",
-                    market_data=market_data,
-                    news_articles=news_articles,
-                    key_insights=key_insights,
-                    trading_opportunities=trading_opportunities,
-                    relevant_indicators=relevant_indicators
-                )
-                
+            ]
+            
+            relevant_indicators = {
+                symbol: ["RSI", "MACD", "Volume", "SMA-50/200 Crossover"]
+                for symbol in task_input.symbols
+            }
+            
+            # Everything below was built internally, so skip re-validation
+            return ResearchOutput.model_construct(
+                success=True,
+                message="Research completed successfully",
+                market_data=market_data,
+                news_articles=news_articles,
+                key_insights=key_insights,
+                trading_opportunities=trading_opportunities,
+                relevant_indicators=relevant_indicators
+            )
+            
         except Exception as e:
             self.log_message(f"Research failed: {str(e)}", level="error")
             # Update agent stats
@@ -2,26 +2,37 @@
 Risk Manager Agent implementation using Pydantic AI.
 This agent specializes in risk metrics, compliance, and risk management.
 """
-from typing import Dict, List, Any, Optional, ClassVar, Type, Union
-from pydantic import BaseModel, Field
+from collections import deque
+from collections.abc import Sequence
+from typing import Any, ClassVar, Type
+from pydantic import BaseModel, ConfigDict, Field
 from sqlmodel import Session
-from pydantic_ai import Agent, RunContext
+from pydantic_ai import Agent
 from pydantic_ai.mode import Mode
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+import numpy as np
 import httpx
 import asyncio
-import logfire
+import logging
 import os
+import orjson
 from datetime import datetime, timedelta
 
 from backend import schemas, models
-from backend.ai_agents.base_agent import PydanticAIAgent, AgentTaskInput, AgentTaskOutput
+from backend.ai_agents.base_agent import PydanticAIAgent, AgentTaskInput, AgentTaskOutput, compile_prompt_template
 from backend.ai_agents.llm_clients import get_llm_client
 
+logger = logging.getLogger(__name__)
+
+# Logfire spans on every tool and LLM call are opt-in; they are costly under load
+_INSTRUMENT = os.getenv("PYDANTIC_AI_INSTRUMENT", "0") == "1"
+
 # --- Input/Output Models ---
 
 class RiskMetric(BaseModel):
     """Model representing a risk metric."""
+    model_config = ConfigDict(frozen=True, extra='ignore')
+
     name: str
     value: float
     threshold: float
@@ -30,35 +41,472 @@ class RiskMetric(BaseModel):
 
 class ComplianceRule(BaseModel):
     """Model representing a compliance rule."""
+    model_config = ConfigDict(frozen=True, extra='ignore')
+
     name: str
     description: str
     status: str  # "compliant", "non-compliant", "warning"
-    details: Optional[str] = None
+    details: str | None = None
 
 class RiskInput(AgentTaskInput):
     """Input for the Risk Manager Agent."""
-    portfolio_id: Optional[str] = Field(default=None, description="ID of the portfolio to analyze")
+    portfolio_id: str | None = Field(default=None, description="ID of the portfolio to analyze")
     include_var: bool = Field(default=True, description="Whether to include Value at Risk (VaR) analysis")
     include_stress_tests: bool = Field(default=True, description="Whether to include stress test scenarios")
     include_compliance: bool = Field(default=True, description="Whether to include compliance checks")
-    custom_scenarios: Optional[List[Dict[str, Any]]] = Field(default=None, description="Custom stress test scenarios")
+    custom_scenarios: list[dict[str, Any]] | None = Field(default=None, description="Custom stress test scenarios")
 
 class RiskOutput(AgentTaskOutput):
     """Output from the Risk Manager Agent."""
-    risk_metrics: List[RiskMetric] = Field(default_factory=list)
-    compliance_status: List[ComplianceRule] = Field(default_factory=list)
-    stress_test_results: Dict[str, Any] = Field(default_factory=dict)
-    risk_warnings: List[str] = Field(default_factory=list)
-    mitigation_recommendations: List[str] = Field(default_factory=list)
+    risk_metrics: list[RiskMetric] = Field(default_factory=list)
+    compliance_status: list[ComplianceRule] = Field(default_factory=list)
+    stress_test_results: dict[str, Any] = Field(default_factory=dict)
+    risk_warnings: list[str] = Field(default_factory=list)
+    mitigation_recommendations: list[str] = Field(default_factory=list)
+
+# --- Mock Data ---
+# Shared, module-level mock payloads returned by the tools until real broker
+# integrations are wired in. They are returned as-is, so callers must not mutate them.
+
+_MOCK_RISK_METRICS: list[dict[str, Any]] = [
+    {
+        "name": "Value at Risk (95%)",
+        "value": 0.025,
+        "threshold": 0.03,
+        "status": "ok",
+        "description": "Maximum expected loss at 95% confidence level over a 1-day period"
+    },
+    {
+        "name": "Value at Risk (99%)",
+        "value": 0.042,
+        "threshold": 0.05,
+        "status": "ok",
+        "description": "Maximum expected loss at 99% confidence level over a 1-day period"
+    },
+    {
+        "name": "Volatility (30d)",
+        "value": 0.12,
+        "threshold": 0.15,
+        "status": "ok",
+        "description": "30-day annualized volatility"
+    },
+    {
+        "name": "Maximum Drawdown",
+        "value": 0.08,
+        "threshold": 0.15,
+        "status": "ok",
+        "description": "Maximum observed loss from peak to trough"
+    },
+    {
+        "name": "Beta",
+        "value": 0.92,
+        "threshold": 1.2,
+        "status": "ok",
+        "description": "Portfolio beta relative to S&P 500"
+    },
+    {
+        "name": "Concentration Risk",
+        "value": 0.18,
+        "threshold": 0.20,
+        "status": "warning",
+        "description": "Highest single asset concentration"
+    },
+    {
+        "name": "Sector Concentration",
+        "value": 0.45,
+        "threshold": 0.40,
+        "status": "critical",
+        "description": "Highest sector concentration (Technology)"
+    }
+]
+
+_MOCK_COMPLIANCE: list[dict[str, Any]] = [
+    {
+        "name": "Diversification Rule",
+        "description": "No single asset should exceed 20% of portfolio value",
+        "status": "warning",
+        "details": "AAPL is approaching the limit at 18%"
+    },
+    {
+        "name": "Sector Exposure Rule",
+        "description": "No single sector should exceed 40% of portfolio value",
+        "status": "non-compliant",
+        "details": "Technology sector is at 45%, exceeding the 40% limit"
+    },
+    {
+        "name": "Leverage Rule",
+        "description": "Portfolio leverage should not exceed 1.5x",
+        "status": "compliant",
+        "details": "Current leverage is 1.0x"
+    },
+    {
+        "name": "Liquidity Rule",
+        "description": "At least 80% of assets should be liquidatable within 1 trading day",
+        "status": "compliant",
+        "details": "95% of assets can be liquidated within 1 trading day"
+    },
+    {
+        "name": "Options Exposure Rule",
+        "description": "Options exposure should not exceed 10% of portfolio value",
+        "status": "compliant",
+        "details": "Current options exposure is 5%"
+    }
+]
+
+
+# Validated once at import; run() reuses these when a tool returns the mock payload itself
+_MOCK_RISK_METRIC_MODELS: list[RiskMetric] = [RiskMetric(**metric) for metric in _MOCK_RISK_METRICS]
+_MOCK_COMPLIANCE_MODELS: list[ComplianceRule] = [ComplianceRule(**rule) for rule in _MOCK_COMPLIANCE]
+
+_MOCK_SCENARIOS: dict[str, dict[str, Any]] = {
+    "market_crash_2008": {
+        "description": "2008 Financial Crisis Scenario",
+        "expected_loss": -0.28,
+        "var_impact": 0.12,
+        "most_affected_assets": ["SPY", "QQQ", "AAPL"]
+    },
+    "tech_bubble_2000": {
+        "description": "2000 Tech Bubble Burst Scenario",
+        "expected_loss": -0.35,
+        "var_impact": 0.15,
+        "most_affected_assets": ["AAPL", "MSFT", "AMZN"]
+    },
+    "covid_crash_2020": {
+        "description": "COVID-19 Market Crash Scenario",
+        "expected_loss": -0.22,
+        "var_impact": 0.09,
+        "most_affected_assets": ["SPY", "AAPL", "MSFT"]
+    },
+    "interest_rate_hike": {
+        "description": "100 bps Interest Rate Hike Scenario",
+        "expected_loss": -0.12,
+        "var_impact": 0.05,
+        "most_affected_assets": ["BONDS", "SPY", "AAPL"]
+    },
+    "inflation_surge": {
+        "description": "Sudden Inflation Surge Scenario",
+        "expected_loss": -0.18,
+        "var_impact": 0.08,
+        "most_affected_assets": ["BONDS", "SPY", "BRK.B"]
+    }
+}
+
+# Stress summary fields not derived from the scenario losses
+_MOCK_STRESS_ASSET_SUMMARY: dict[str, Any] = {
+    "most_vulnerable_assets": ["AAPL", "SPY", "BONDS"],
+    "most_resilient_assets": ["BRK.B", "GOOGL"]
+}
+
+# Defaults for fields missing from a custom scenario; the tuple avoids a list allocation per scenario
+_CUSTOM_SCENARIO_DEFAULTS: dict[str, Any] = {
+    "description": "Custom Scenario",
+    "expected_loss": -0.15,
+    "var_impact": 0.07,
+    "most_affected_assets": ("SPY", "AAPL")
+}
+
+@dataclass(slots=True, frozen=True)
+class ScenarioTable:
+    """
+    Stress test scenarios stored column-wise (structure of arrays), so summaries
+    are vectorized NumPy reductions. Converted to the API's dict-of-dicts only
+    once, by to_dict().
+    """
+    ids: tuple[str, ...] = ()
+    descriptions: tuple[str, ...] = ()
+    expected_loss: np.ndarray = field(default_factory=lambda: np.empty(0))
+    var_impact: np.ndarray = field(default_factory=lambda: np.empty(0))
+    most_affected_assets: tuple[Sequence[str], ...] = ()
+
+    def with_scenarios(self, scenarios: dict[str, dict[str, Any]]) -> "ScenarioTable":
+        """Return a new table with the given scenarios added, replacing any with the same ID."""
+        ids = list(self.ids)
+        descriptions = list(self.descriptions)
+        expected_loss = self.expected_loss.tolist()
+        var_impact = self.var_impact.tolist()
+        most_affected_assets = list(self.most_affected_assets)
+        index = {scenario_id: i for i, scenario_id in enumerate(ids)}
+        
+        for scenario_id, scenario in scenarios.items():
+            i = index.get(scenario_id)
+            if i is None:
+                index[scenario_id] = len(ids)
+                ids.append(scenario_id)
+                descriptions.append(scenario["description"])
+                expected_loss.append(scenario["expected_loss"])
+                var_impact.append(scenario["var_impact"])
+                most_affected_assets.append(scenario["most_affected_assets"])
+            else:
+                descriptions[i] = scenario["description"]
+                expected_loss[i] = scenario["expected_loss"]
+                var_impact[i] = scenario["var_impact"]
+                most_affected_assets[i] = scenario["most_affected_assets"]
+        
+        return ScenarioTable(
+            ids=tuple(ids),
+            descriptions=tuple(descriptions),
+            expected_loss=np.asarray(expected_loss, dtype=np.float64),
+            var_impact=np.asarray(var_impact, dtype=np.float64),
+            most_affected_assets=tuple(most_affected_assets)
+        )
+
+    def loss_summary(self) -> dict[str, float]:
+        """Worst-case and average expected loss across all scenarios."""
+        if not self.ids:
+            return {"worst_case_loss": 0.0, "average_loss": 0.0}
+        return {
+            "worst_case_loss": round(float(np.min(self.expected_loss)), 4),
+            "average_loss": round(float(np.mean(self.expected_loss)), 4)
+        }
+
+    def to_dict(self) -> dict[str, dict[str, Any]]:
+        """Serialize to the {scenario_id: {...}} format returned by the API."""
+        return {
+            scenario_id: {
+                "description": description,
+                "expected_loss": loss,
+                "var_impact": impact,
+                "most_affected_assets": assets
+            }
+            for scenario_id, description, loss, impact, assets in zip(
+                self.ids, self.descriptions, self.expected_loss.tolist(),
+                self.var_impact.tolist(), self.most_affected_assets
+            )
+        }
+
+def _stress_test_results(table: ScenarioTable) -> dict[str, Any]:
+    """Build the stress test tool result for a scenario table."""
+    return {"scenarios": table.to_dict(), "summary": {**table.loss_summary(), **_MOCK_STRESS_ASSET_SUMMARY}}
+
+_MOCK_SCENARIO_TABLE = ScenarioTable().with_scenarios(_MOCK_SCENARIOS)
+_MOCK_STRESS_RESULTS = _stress_test_results(_MOCK_SCENARIO_TABLE)
+
+def _mock_stress_test_results(custom_scenarios: list[dict[str, Any]] | None = None) -> dict[str, Any]:
+    """Build mock stress test results, adding any custom scenarios to the standard ones."""
+    if not custom_scenarios:
+        return _MOCK_STRESS_RESULTS
+    
+    base_count = len(_MOCK_SCENARIO_TABLE.ids)
+    custom_rows = {}
+    for i, scenario in enumerate(custom_scenarios, start=1):
+        scenario_id = scenario.get("id") or f"custom_{base_count + i}"
+        custom_rows[scenario_id] = {
+            **_CUSTOM_SCENARIO_DEFAULTS,
+            **{key: scenario[key] for key in _CUSTOM_SCENARIO_DEFAULTS.keys() & scenario.keys()}
+        }
+    return _stress_test_results(_MOCK_SCENARIO_TABLE.with_scenarios(custom_rows))
 
 # --- Agent Dependencies ---
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class RiskDeps:
     """Dependencies for the Risk Manager Agent."""
     client: httpx.AsyncClient
-    broker_api_key: Optional[str] = None
-    market_data_api_key: Optional[str] = None
+    broker_api_key: str | None = None
+    broker_api_url: str | None = None
+    market_data_api_key: str | None = None
+    # Custom stress test scenarios for this run, sent with every bundle request
+    custom_scenarios: list[dict[str, Any]] | None = None
+
+# --- Broker API ---
+
+async def _request_bundle(deps: RiskDeps, portfolio_id: str | None, sections: list[str]) -> dict[str, Any]:
+    """Request the given sections ("risk", "compliance", "stress") for a portfolio in one broker call."""
+    response = await deps.client.post(
+        f"{deps.broker_api_url}/v1/portfolios/{portfolio_id or 'default'}/bundle",
+        content=orjson.dumps({"sections": sections, "custom_scenarios": deps.custom_scenarios}),
+        headers={"Authorization": f"Bearer {deps.broker_api_key}", "Content-Type": "application/json"}
+    )
+    response.raise_for_status()
+    return orjson.loads(await response.aread())
+
+# --- Risk Data ---
+
+async def calculate_risk_metrics(
+    deps: RiskDeps, portfolio_id: str | None = None, bundle: dict[str, Any] | None = None
+) -> list[dict[str, Any]]:
+    """
+    Calculate risk metrics for the specified portfolio.
+    
+    Args:
+        deps: The run's dependencies.
+        portfolio_id: Optional ID of the portfolio to analyze. If not provided, the default portfolio is used.
+        bundle: The run's broker bundle, if it was already fetched; otherwise only the "risk" section is requested.
+        
+    Returns:
+        A list of risk metrics.
+    """
+    if bundle is not None:
+        return bundle["risk"]
+    
+    api_key = deps.broker_api_key
+    
+    # Mock implementation for demo purposes
+    if not api_key:
+        logger.warning("No broker API key provided, returning mock data")
+        return _MOCK_RISK_METRICS
+    
+    if deps.broker_api_url:
+        bundle = await _request_bundle(deps, portfolio_id, ["risk"])
+        return bundle["risk"]
+    
+    # For now, return mock data
+    return _MOCK_RISK_METRICS
+
+async def check_compliance(
+    deps: RiskDeps, portfolio_id: str | None = None, bundle: dict[str, Any] | None = None
+) -> list[dict[str, Any]]:
+    """
+    Check compliance rules for the specified portfolio.
+    
+    Args:
+        deps: The run's dependencies.
+        portfolio_id: Optional ID of the portfolio to analyze. If not provided, the default portfolio is used.
+        bundle: The run's broker bundle, if it was already fetched; otherwise only the "compliance" section is requested.
+        
+    Returns:
+        A list of compliance rule statuses.
+    """
+    if bundle is not None:
+        return bundle["compliance"]
+    
+    api_key = deps.broker_api_key
+    
+    # Mock implementation for demo purposes
+    if not api_key:
+        logger.warning("No broker API key provided, returning mock data")
+        return _MOCK_COMPLIANCE
+    
+    if deps.broker_api_url:
+        bundle = await _request_bundle(deps, portfolio_id, ["compliance"])
+        return bundle["compliance"]
+    
+    # For now, return mock data
+    return _MOCK_COMPLIANCE
+
+async def run_stress_tests(
+    deps: RiskDeps, portfolio_id: str | None = None, bundle: dict[str, Any] | None = None
+) -> dict[str, Any]:
+    """
+    Run stress tests on the specified portfolio, including the run's custom scenarios.
+    
+    Args:
+        deps: The run's dependencies.
+        portfolio_id: Optional ID of the portfolio to analyze. If not provided, the default portfolio is used.
+        bundle: The run's broker bundle, if it was already fetched; otherwise only the "stress" section is requested.
+        
+    Returns:
+        Stress test results.
+    """
+    if bundle is not None:
+        return bundle["stress"]
+    
+    api_key = deps.broker_api_key
+    
+    # Mock implementation for demo purposes
+    if not api_key:
+        logger.warning("No broker API key provided, returning mock data")
+        return _mock_stress_test_results(deps.custom_scenarios)
+    
+    if deps.broker_api_url:
+        bundle = await _request_bundle(deps, portfolio_id, ["stress"])
+        return bundle["stress"]
+    
+    # For now, return mock data
+    return _mock_stress_test_results(deps.custom_scenarios)
+
+# Issues that trigger each specific mitigation recommendation
+_STRESS_VULNERABILITY_ISSUE = "Portfolio shows high vulnerability in stress test scenarios"
+_SECTOR_TRIGGERS = frozenset({"Sector Concentration is critical", "Sector Exposure Rule is non-compliant"})
+_CONCENTRATION_TRIGGERS = frozenset({"Concentration Risk is warning", "Diversification Rule is warning"})
+
+# Mitigation rules in output order: (trigger issues, recommendations added when any trigger fires)
+_MITIGATION_RULES: tuple[tuple[frozenset[str], tuple[str, ...]], ...] = (
+    (_SECTOR_TRIGGERS, (
+        "Reduce technology sector exposure by 5-10% to comply with sector concentration limits",
+    )),
+    (_CONCENTRATION_TRIGGERS, (
+        "Consider trimming AAPL position to reduce single-asset concentration risk",
+    )),
+    (frozenset({_STRESS_VULNERABILITY_ISSUE}), (
+        "Increase allocation to defensive assets to improve portfolio resilience in stress scenarios",
+        "Consider adding hedging positions (e.g., put options or inverse ETFs) to protect against severe market downturns",
+    )),
+)
+
+# All triggers compiled into one lookup table: issue -> index of the rule it fires
+_ISSUE_TO_RULE: dict[str, int] = {
+    issue: rule_index
+    for rule_index, (triggers, _) in enumerate(_MITIGATION_RULES)
+    for issue in triggers
+}
+
+# Recommendations used when no specific issue was found
+_GENERAL_RECOMMENDATIONS = (
+    "Maintain current risk management approach as no critical issues were identified",
+    "Consider regular stress testing to monitor portfolio resilience to changing market conditions",
+    "Review compliance rules quarterly to ensure continued adherence to risk management framework"
+)
+_RISK_REVIEW_RECOMMENDATION = "Schedule a comprehensive risk review to address identified issues and improve overall risk profile"
+
+def generate_mitigation_recommendations(
+    risk_metrics: list[dict[str, Any]],
+    compliance_status: list[dict[str, Any]],
+    stress_test_results: dict[str, Any]
+) -> list[str]:
+    """
+    Generate risk mitigation recommendations based on risk analysis.
+    
+    Args:
+        risk_metrics: Risk metrics data.
+        compliance_status: Compliance status data.
+        stress_test_results: Stress test results data.
+        
+    Returns:
+        A list of risk mitigation recommendations.
+    """
+    # Identify issues
+    issues: set[str] = set()
+    
+    # Check risk metrics for warnings or critical issues (empty when VaR analysis was skipped)
+    for metric in risk_metrics:
+        if metric.get("status") in ("warning", "critical"):
+            issues.add(f"{metric.get('name')} is {metric.get('status')}")
+    
+    # Check compliance for non-compliant or warning issues (empty when compliance checks were skipped)
+    for rule in compliance_status:
+        if rule.get("status") in ("non-compliant", "warning"):
+            issues.add(f"{rule.get('name')} is {rule.get('status')}")
+    
+    # Check stress test results for significant vulnerabilities
+    if stress_test_results and stress_test_results.get("summary", {}).get("worst_case_loss", 0) < -0.30:
+        issues.add(_STRESS_VULNERABILITY_ISSUE)
+    
+    # Generate recommendations based on issues, matching all triggers in a single pass
+    fired_rules = {_ISSUE_TO_RULE[issue] for issue in issues if issue in _ISSUE_TO_RULE}
+    recommendations = deque()
+    for rule_index in sorted(fired_rules):
+        recommendations.extend(_MITIGATION_RULES[rule_index][1])
+    
+    # Add general recommendations if specific issues weren't found
+    if not recommendations:
+        recommendations.extend(_GENERAL_RECOMMENDATIONS)
+    else:
+        # Add additional general recommendations
+        recommendations.append(_RISK_REVIEW_RECOMMENDATION)
+    
+    # Collapse duplicates (several rules can share a recommendation), keeping first-seen order
+    return list(dict.fromkeys(recommendations))
+
+# Risk warning formatters, keyed by the status that triggers them
+_METRIC_WARNINGS = {
+    "critical": lambda metric: f"CRITICAL: {metric.name} ({metric.value:.2%}) exceeds threshold ({metric.threshold:.2%})",
+    "warning": lambda metric: f"WARNING: {metric.name} ({metric.value:.2%}) is approaching threshold ({metric.threshold:.2%})",
+}
+_COMPLIANCE_WARNINGS = {
+    "non-compliant": lambda rule: f"NON-COMPLIANT: {rule.name} - {rule.details}",
+    "warning": lambda rule: f"WARNING: {rule.name} - {rule.details}",
+}
 
 # --- Agent Implementation ---
 
@@ -69,6 +517,16 @@ class RiskAIAgent(PydanticAIAgent[RiskInput, RiskOutput]):
     input_schema: ClassVar[Type[RiskInput]] = RiskInput
     output_schema: ClassVar[Type[RiskOutput]] = RiskOutput
 
+    def __init__(self, agent_model: models.Agent, session: Session):
+        super().__init__(agent_model, session)
+        self.reload_env()
+
+    def reload_env(self):
+        """(Re)read the broker and market data settings from the environment."""
+        self._broker_api_key = os.getenv("BROKER_API_KEY")
+        self._broker_api_url = os.getenv("BROKER_API_URL")
+        self._market_data_api_key = os.getenv("MARKET_DATA_API_KEY")
+
     def _create_pydantic_agent(self):
         """Create the Pydantic AI agent instance."""
         system_prompt = getattr(self.config, 'riskAnalysisPrompt', 
@@ -77,450 +535,23 @@ class RiskAIAgent(PydanticAIAgent[RiskInput, RiskOutput]):
             "Provide actionable risk mitigation recommendations.\n"
             "Risk Metrics: {riskMetrics}\nMarket Conditions: {marketConditions}\nCompliance Status: {complianceStatus}"
         )
+        # Lex the prompt once; only the dynamic tail is rendered per run
+        self._prompt_prefix, self._prompt_template = compile_prompt_template(system_prompt)
         
-        # Create the agent
+        # The agent only summarizes data gathered beforehand, so it has no tools (and no deps)
         risk_agent = Agent(
             self.llm_client,
-            system_prompt=system_prompt,
-            deps_type=RiskDeps,
+            system_prompt=self._prompt_prefix,
             retries=2,
-            instrument=True
+            instrument=_INSTRUMENT
         )
         
-        # Define tools
-        
-        @risk_agent.tool
-        async def calculate_risk_metrics(ctx: RunContext[RiskDeps], portfolio_id: Optional[str] = None) -> List[Dict[str, Any]]:
-            """
-            Calculate risk metrics for the specified portfolio.
-            
-            Args:
-                ctx: The context.
-                portfolio_id: Optional ID of the portfolio to analyze. If not provided, the default portfolio is used.
-                
-            Returns:
-                A list of risk metrics.
-            """
-            api_key = ctx.deps.broker_api_key
-            
-            # Mock implementation for demo purposes
-            if not api_key:
-                logfire.warning("No broker API key provided, returning mock data")
-                return [
-                    {
-                        "name": "Value at Risk (95%)",
-                        "value": 0.025,
-                        "threshold": 0.03,
-                        "status": "ok",
-                        "description": "Maximum expected loss at 95% confidence level over a 1-day period"
-                    },
-                    {
-                        "name": "Value at Risk (99%)",
-                        "value": 0.042,
-                        "threshold": 0.05,
-                        "status": "ok",
-                        "description": "Maximum expected loss at 99% confidence level over a 1-day period"
-                    },
-                    {
-                        "name": "Volatility (30d)",
-                        "value": 0.12,
-                        "threshold": 0.15,
-                        "status": "ok",
-                        "description": "30-day annualized volatility"
-                    },
-                    {
-                        "name": "Maximum Drawdown",
-                        "value": 0.08,
-                        "threshold": 0.15,
-                        "status": "ok",
-                        "description": "Maximum observed loss from peak to trough"
-                    },
-                    {
-                        "name": "Beta",
-                        "value": 0.92,
-                        "threshold": 1.2,
-                        "status": "ok",
-                        "description": "Portfolio beta relative to S&P 500"
-                    },
-                    {
-                        "name": "Concentration Risk",
-                        "value": 0.18,
-                        "threshold": 0.20,
-                        "status": "warning",
-                        "description": "Highest single asset concentration"
-                    },
-                    {
-                        "name": "Sector Concentration",
-                        "value": 0.45,
-                        "threshold": 0.40,
-                        "status": "critical",
-                        "description": "Highest sector concentration (Technology)"
-                    }
-                ]
-            
-            # Real implementation would use the API key to fetch data
-            # For example:
-            # async with ctx.deps.client.get(
-            #     f"https://api.broker.com/v1/portfolios/{portfolio_id}/risk",
-            #     headers={"Authorization": f"Bearer {api_key}"}
-            # ) as response:
-            #     data = await response.json()
-            #     return data
-            
-            # For now, return mock data
-            return [
-                {
-                    "name": "Value at Risk (95%)",
-                    "value": 0.025,
-                    "threshold": 0.03,
-                    "status": "ok",
-                    "description": "Maximum expected loss at 95% confidence level over a 1-day period"
-                },
-                {
-                    "name": "Value at Risk (99%)",
-                    "value": 0.042,
-                    "threshold": 0.05,
-                    "status": "ok",
-                    "description": "Maximum expected loss at 99% confidence level over a 1-day period"
-                },
-                {
-                    "name": "Volatility (30d)",
-                    "value": 0.12,
-                    "threshold": 0.15,
-                    "status": "ok",
-                    "description": "30-day annualized volatility"
-                },
-                {
-                    "name": "Maximum Drawdown",
-                    "value": 0.08,
-                    "threshold": 0.15,
-                    "status": "ok",
-                    "description": "Maximum observed loss from peak to trough"
-                },
-                {
-                    "name": "Beta",
-                    "value": 0.92,
-                    "threshold": 1.2,
-                    "status": "ok",
-                    "description": "Portfolio beta relative to S&P 500"
-                },
-                {
-                    "name": "Concentration Risk",
-                    "value": 0.18,
-                    "threshold": 0.20,
-                    "status": "warning",
-                    "description": "Highest single asset concentration"
-                },
-                {
-                    "name": "Sector Concentration",
-                    "value": 0.45,
-                    "threshold": 0.40,
-                    "status": "critical",
-                    "description": "Highest sector concentration (Technology)"
-                }
-            ]
-        
-        @risk_agent.tool
-        async def check_compliance(ctx: RunContext[RiskDeps], portfolio_id: Optional[str] = None) -> List[Dict[str, Any]]:
-            """
-            Check compliance rules for the specified portfolio.
-            
-            Args:
-                ctx: The context.
-                portfolio_id: Optional ID of the portfolio to analyze. If not provided, the default portfolio is used.
-                
-            Returns:
-                A list of compliance rule statuses.
-            """
-            api_key = ctx.deps.broker_api_key
-            
-            # Mock implementation for demo purposes
-            if not api_key:
-                logfire.warning("No broker API key provided, returning mock data")
-                return [
-                    {
-                        "name": "Diversification Rule",
-                        "description": "No single asset should exceed 20% of portfolio value",
-                        "status": "warning",
-                        "details": "AAPL is approaching the limit at 18%"
-                    },
-                    {
-                        "name": "Sector Exposure Rule",
-                        "description": "No single sector should exceed 40% of portfolio value",
-                        "status": "non-compliant",
-                        "details": "Technology sector is at 45%, exceeding the 40% limit"
-                    },
-                    {
-                        "name": "Leverage Rule",
-                        "description": "Portfolio leverage should not exceed 1.5x",
-                        "status": "compliant",
-                        "details": "Current leverage is 1.0x"
-                    },
-                    {
-                        "name": "Liquidity Rule",
-                        "description": "At least 80% of assets should be liquidatable within 1 trading day",
-                        "status": "compliant",
-                        "details": "95% of assets can be liquidated within 1 trading day"
-                    },
-                    {
-                        "name": "Options Exposure Rule",
-                        "description": "Options exposure should not exceed 10% of portfolio value",
-                        "status": "compliant",
-                        "details": "Current options exposure is 5%"
-                    }
-                ]
-            
-            # Real implementation would use the API key to fetch data
-            # For example:
-            # async with ctx.deps.client.get(
-            #     f"https://api.broker.com/v1/portfolios/{portfolio_id}/compliance",
-            #     headers={"Authorization": f"Bearer {api_key}"}
-            # ) as response:
-            #     data = await response.json()
-            #     return data
-            
-            # For now, return mock data
-            return [
-                {
-                    "name": "Diversification Rule",
-                    "description": "No single asset should exceed 20% of portfolio value",
-                    "status": "warning",
-                    "details": "AAPL is approaching the limit at 18%"
-                },
-                {
-                    "name": "Sector Exposure Rule",
-                    "description": "No single sector should exceed 40% of portfolio value",
-                    "status": "non-compliant",
-                    "details": "Technology sector is at 45%, exceeding the 40% limit"
-                },
-                {
-                    "name": "Leverage Rule",
-                    "description": "Portfolio leverage should not exceed 1.5x",
-                    "status": "compliant",
-                    "details": "Current leverage is 1.0x"
-                },
-                {
-                    "name": "Liquidity Rule",
-                    "description": "At least 80% of assets should be liquidatable within 1 trading day",
-                    "status": "compliant",
-                    "details": "95% of assets can be liquidated within 1 trading day"
-                },
-                {
-                    "name": "Options Exposure Rule",
-                    "description": "Options exposure should not exceed 10% of portfolio value",
-                    "status": "compliant",
-                    "details": "Current options exposure is 5%"
-                }
-            ]
-        
-        @risk_agent.tool
-        async def run_stress_tests(
-            ctx: RunContext[RiskDeps], 
-            portfolio_id: Optional[str] = None,
-            custom_scenarios: Optional[List[Dict[str, Any]]] = None
-        ) -> Dict[str, Any]:
-            """
-            Run stress tests on the specified portfolio.
-            
-            Args:
-                ctx: The context.
-                portfolio_id: Optional ID of the portfolio to analyze. If not provided, the default portfolio is used.
-                custom_scenarios: Optional list of custom stress test scenarios.
-                
-            Returns:
-                Stress test results.
-            """
-            api_key = ctx.deps.broker_api_key
-            
-            # Mock implementation for demo purposes
-            if not api_key:
-                logfire.warning("No broker API key provided, returning mock data")
-                
-                # Standard scenarios
-                scenarios = {
-                    "market_crash_2008": {
-                        "description": "2008 Financial Crisis Scenario",
-                        "expected_loss": -0.28,
-                        "var_impact": 0.12,
-                        "most_affected_assets": ["SPY", "QQQ", "AAPL"]
-                    },
-                    "tech_bubble_2000": {
-                        "description": "2000 Tech Bubble Burst Scenario",
-                        "expected_loss": -0.35,
-                        "var_impact": 0.15,
-                        "most_affected_assets": ["AAPL", "MSFT", "AMZN"]
-                    },
-                    "covid_crash_2020": {
-                        "description": "COVID-19 Market Crash Scenario",
-                        "expected_loss": -0.22,
-                        "var_impact": 0.09,
-                        "most_affected_assets": ["SPY", "AAPL", "MSFT"]
-                    },
-                    "interest_rate_hike": {
-                        "description": "100 bps Interest Rate Hike Scenario",
-                        "expected_loss": -0.12,
-                        "var_impact": 0.05,
-                        "most_affected_assets": ["BONDS", "SPY", "AAPL"]
-                    },
-                    "inflation_surge": {
-                        "description": "Sudden Inflation Surge Scenario",
-                        "expected_loss": -0.18,
-                        "var_impact": 0.08,
-                        "most_affected_assets": ["BONDS", "SPY", "BRK.B"]
-                    }
-                }
-                
-                # Add custom scenarios if provided
-                if custom_scenarios:
-                    for scenario in custom_scenarios:
-                        scenario_id = scenario.get("id", f"custom_{len(scenarios) + 1}")
-                        scenarios[scenario_id] = {
-                            "description": scenario.get("description", "Custom Scenario"),
-                            "expected_loss": scenario.get("expected_loss", -0.15),
-                            "var_impact": scenario.get("var_impact", 0.07),
-                            "most_affected_assets": scenario.get("most_affected_assets", ["SPY", "AAPL"])
-                        }
-                
-                return {
-                    "scenarios": scenarios,
-                    "summary": {
-                        "worst_case_loss": -0.35,
-                        "average_loss": -0.23,
-                        "most_vulnerable_assets": ["AAPL", "SPY", "BONDS"],
-                        "most_resilient_assets": ["BRK.B", "GOOGL"]
-                    }
-                }
-            
-            # Real implementation would use the API key to fetch data
-            # For example:
-            # async with ctx.deps.client.post(
-            #     f"https://api.broker.com/v1/portfolios/{portfolio_id}/stress-tests",
-            #     json={"custom_scenarios": custom_scenarios},
-            #     headers={"Authorization": f"Bearer {api_key}"}
-            # ) as response:
-            #     data = await response.json()
-            #     return data
-            
-            # For now, return mock data
-            # Standard scenarios
-            scenarios = {
-                "market_crash_2008": {
-                    "description": "2008 Financial Crisis Scenario",
-                    "expected_loss": -0.28,
-                    "var_impact": 0.12,
-                    "most_affected_assets": ["SPY", "QQQ", "AAPL"]
-                },
-                "tech_bubble_2000": {
-                    "description": "2000 Tech Bubble Burst Scenario",
-                    "expected_loss": -0.35,
-                    "var_impact": 0.15,
-                    "most_affected_assets": ["AAPL", "MSFT", "AMZN"]
-                },
-                "covid_crash_2020": {
-                    "description": "COVID-19 Market Crash Scenario",
-                    "expected_loss": -0.22,
-                    "var_impact": 0.09,
-                    "most_affected_assets": ["SPY", "AAPL", "MSFT"]
-                },
-                "interest_rate_hike": {
-                    "description": "100 bps Interest Rate Hike Scenario",
-                    "expected_loss": -0.12,
-                    "var_impact": 0.05,
-                    "most_affected_assets": ["BONDS", "SPY", "AAPL"]
-                },
-                "inflation_surge": {
-                    "description": "Sudden Inflation Surge Scenario",
-                    "expected_loss": -0.18,
-                    "var_impact": 0.08,
-                    "most_affected_assets": ["BONDS", "SPY", "BRK.B"]
-                }
-            }
-            
-            # Add custom scenarios if provided
-            if custom_scenarios:
-                for scenario in custom_scenarios:
-                    scenario_id = scenario.get("id", f"custom_{len(scenarios) + 1}")
-                    scenarios[scenario_id] = {
-                        "description": scenario.get("description", "Custom Scenario"),
-                        "expected_loss": scenario.get("expected_loss", -0.15),
-                        "var_impact": scenario.get("var_impact", 0.07),
-                        "most_affected_assets": scenario.get("most_affected_assets", ["SPY", "AAPL"])
-                    }
-            
-            return {
-                "scenarios": scenarios,
-                "summary": {
-                    "worst_case_loss": -0.35,
-                    "average_loss": -0.23,
-                    "most_vulnerable_assets": ["AAPL", "SPY", "BONDS"],
-                    "most_resilient_assets": ["BRK.B", "GOOGL"]
-                }
-            }
-        
-        @risk_agent.tool
-        async def generate_mitigation_recommendations(
-            ctx: RunContext[RiskDeps],
-            risk_metrics: List[Dict[str, Any]],
-            compliance_status: List[Dict[str, Any]],
-            stress_test_results: Dict[str, Any]
-        ) -> List[str]:
-            """
-            Generate risk mitigation recommendations based on risk analysis.
-            
-            Args:
-                ctx: The context.
-                risk_metrics: Risk metrics data.
-                compliance_status: Compliance status data.
-                stress_test_results: Stress test results data.
-                
-            Returns:
-                A list of risk mitigation recommendations.
-            """
-            # Identify issues
-            issues = []
-            
-            # Check risk metrics for warnings or critical issues
-            for metric in risk_metrics:
-                if metric.get("status") in ["warning", "critical"]:
-                    issues.append(f"{metric.get('name')} is {metric.get('status')}")
-            
-            # Check compliance for non-compliant or warning issues
-            for rule in compliance_status:
-                if rule.get("status") in ["non-compliant", "warning"]:
-                    issues.append(f"{rule.get('name')} is {rule.get('status')}")
-            
-            # Check stress test results for significant vulnerabilities
-            if stress_test_results.get("summary", {}).get("worst_case_loss", 0) < -0.30:
-                issues.append("Portfolio shows high vulnerability in stress test scenarios")
-            
-            # Generate recommendations based on issues
-            recommendations = []
-            
-            if "Sector Concentration is critical" in issues or "Sector Exposure Rule is non-compliant" in issues:
-                recommendations.append("Reduce technology sector exposure by 5-10% to comply with sector concentration limits")
-            
-            if "Concentration Risk is warning" in issues or "Diversification Rule is warning" in issues:
-                recommendations.append("Consider trimming AAPL position to reduce single-asset concentration risk")
-            
-            if "Portfolio shows high vulnerability in stress test scenarios" in issues:
-                recommendations.append("Increase allocation to defensive assets to improve portfolio resilience in stress scenarios")
-                recommendations.append("Consider adding hedging positions (e.g., put options or inverse ETFs) to protect against severe market downturns")
-            
-            # Add general recommendations if specific issues weren't found
-            if not recommendations:
-                recommendations = [
-                    "Maintain current risk management approach as no critical issues were identified",
-                    "Consider regular stress testing to monitor portfolio resilience to changing market conditions",
-                    "Review compliance rules quarterly to ensure continued adherence to risk management framework"
-                ]
-            else:
-                # Add additional general recommendations
-                recommendations.append("Schedule a comprehensive risk review to address identified issues and improve overall risk profile")
-            
-            return recommendations
-        
         return risk_agent
 
+    def _render_prompt(self, **variables: Any) -> str:
+        """Render the dynamic part of the risk analysis prompt for a single run."""
+        return self._prompt_template.safe_substitute(variables)
+
     async def run(self, task_input: RiskInput, session: Session) -> RiskOutput:
         """
         Run the Risk Manager Agent to analyze portfolio risk and compliance.
@@ -535,89 +566,99 @@ class RiskAIAgent(PydanticAIAgent[RiskInput, RiskOutput]):
         self.log_message(f"Starting risk analysis")
         
         try:
-            # Create HTTP client for API requests
-            async with httpx.AsyncClient() as client:
-                # Set up dependencies
-                deps = RiskDeps(
-                    client=client,
-                    broker_api_key=os.getenv("BROKER_API_KEY"),
-                    market_data_api_key=os.getenv("MARKET_DATA_API_KEY")
-                )
-                
-                # Run the agent
-                result = await self.pydantic_agent.run(
-                    deps=deps,
-                    portfolio_id=task_input.portfolio_id,
-                    include_var=task_input.include_var,
-                    include_stress_tests=task_input.include_stress_tests,
-                    include_compliance=task_input.include_compliance
-                )
-                
-                # Process the result
-                self.log_message(f"Risk analysis completed successfully")
-                
-                # Update agent stats
-                self._update_agent_stats(success=True, session=session)
-                
-                # Extract structured data from the result
-                # In a real implementation, we would parse the agent's response
-                # For now, we'll create a structured output using the tool functions
-                
-                # Get risk metrics
-                risk_metrics_data = await self.pydantic_agent.calculate_risk_metrics(
-                    RunContext(deps=deps),
-                    portfolio_id=task_input.portfolio_id
-                )
+            # Set up dependencies; the process-wide HTTP client keeps its connection pool across runs
+            deps = RiskDeps(
+                client=self.dependencies.client,
+                broker_api_key=self._broker_api_key,
+                broker_api_url=self._broker_api_url,
+                market_data_api_key=self._market_data_api_key,
+                custom_scenarios=task_input.custom_scenarios
+            )
+            
+            # Gather each requested section exactly once; the LLM only synthesizes a summary from the results
+            sections = [
+                section for section, requested in (
+                    ("risk", task_input.include_var),
+                    ("compliance", task_input.include_compliance),
+                    ("stress", task_input.include_stress_tests),
+                ) if requested
+            ]
+            # With a broker configured, one call returns every requested section (and only those)
+            bundle = None
+            if sections and deps.broker_api_key and deps.broker_api_url:
+                bundle = await _request_bundle(deps, task_input.portfolio_id, sections)
+            # The sections are otherwise independent, so they are gathered concurrently
+            tool_calls = {}
+            if task_input.include_var:
+                tool_calls["risk_metrics"] = calculate_risk_metrics(deps, task_input.portfolio_id, bundle)
+            if task_input.include_compliance:
+                tool_calls["compliance"] = check_compliance(deps, task_input.portfolio_id, bundle)
+            if task_input.include_stress_tests:
+                tool_calls["stress_tests"] = run_stress_tests(deps, task_input.portfolio_id, bundle)
+            tool_results = dict(zip(tool_calls, await asyncio.gather(*tool_calls.values())))
+            risk_metrics_data = tool_results.get("risk_metrics", [])
+            compliance_status_data = tool_results.get("compliance", [])
+            stress_test_results = tool_results.get("stress_tests", {})
+            
+            # Skip validation for the known-good mock payloads; real API data is always validated
+            if risk_metrics_data is _MOCK_RISK_METRICS:
+                risk_metrics = list(_MOCK_RISK_METRIC_MODELS)
+            else:
                 risk_metrics = [RiskMetric(**metric) for metric in risk_metrics_data]
-                
-                # Get compliance status
-                compliance_status_data = await self.pydantic_agent.check_compliance(
-                    RunContext(deps=deps),
-                    portfolio_id=task_input.portfolio_id
-                )
+            if compliance_status_data is _MOCK_COMPLIANCE:
+                compliance_status = list(_MOCK_COMPLIANCE_MODELS)
+            else:
                 compliance_status = [ComplianceRule(**rule) for rule in compliance_status_data]
-                
-                # Run stress tests
-                stress_test_results = {}
-                if task_input.include_stress_tests:
-                    stress_test_results = await self.pydantic_agent.run_stress_tests(
-                        RunContext(deps=deps),
-                        portfolio_id=task_input.portfolio_id,
-                        custom_scenarios=task_input.custom_scenarios
-                    )
-                
-                # Generate risk warnings
-                risk_warnings = []
-                for metric in risk_metrics:
-                    if metric.status == "critical":
-                        risk_warnings.append(f"CRITICAL: {metric.name} ({metric.value:.2%}) exceeds threshold ({metric.threshold:.2%})")
-                    elif metric.status == "warning":
-                        risk_warnings.append(f"WARNING: {metric.name} ({metric.value:.2%}) is approaching threshold ({metric.threshold:.2%})")
-                
-                for rule in compliance_status:
-                    if rule.status == "non-compliant":
-                        risk_warnings.append(f"NON-COMPLIANT: {rule.name} - {rule.details}")
-                    elif rule.status == "warning":
-                        risk_warnings.append(f"WARNING: {rule.name} - {rule.details}")
-                
-                # Generate mitigation recommendations
-                mitigation_recommendations = await self.pydantic_agent.generate_mitigation_recommendations(
-                    RunContext(deps=deps),
-                    risk_metrics=risk_metrics_data,
-                    compliance_status=compliance_status_data,
-                    stress_test_results=stress_test_results
-                )
-                
-                return RiskOutput(
-                    success=True,
-                    message="Risk analysis completed successfully",
-                    risk_metrics=risk_metrics,
-                    compliance_status=compliance_status,
-                    stress_test_results=stress_test_results,
-                    risk_warnings=risk_warnings,
-                    mitigation_recommendations=mitigation_recommendations
+            
+            # Generate risk warnings, one pass per source dispatching on status
+            risk_warnings = [
+                _METRIC_WARNINGS[metric.status](metric)
+                for metric in risk_metrics if metric.status in _METRIC_WARNINGS
+            ] + [
+                _COMPLIANCE_WARNINGS[rule.status](rule)
+                for rule in compliance_status if rule.status in _COMPLIANCE_WARNINGS
+            ]
+            
+            # Generate mitigation recommendations
+            mitigation_recommendations = generate_mitigation_recommendations(
+                risk_metrics=risk_metrics_data,
+                compliance_status=compliance_status_data,
+                stress_test_results=stress_test_results
+            )
+            
+            # Let the LLM summarize the findings; the data is passed in, so it needs no tool calls
+            prompt = self._render_prompt(
+                riskMetrics=orjson.dumps(risk_metrics_data).decode() if task_input.include_var else "Not requested.",
+                marketConditions=(
+                    f"Stress Test Results: {orjson.dumps(stress_test_results).decode()}"
+                    if stress_test_results else "Not provided."
+                ),
+                complianceStatus=(
+                    orjson.dumps(compliance_status_data).decode()
+                    if task_input.include_compliance else "Not requested."
                 )
-                
+            )
+            result = await self.pydantic_agent.run(
+                f"{prompt}\nRisk Warnings: {orjson.dumps(risk_warnings).decode()}\n"
+                "Summarize the portfolio's risk position and the most important actions to take."
+            )
+            
+            # Process the result
+            self.log_message(f"Risk analysis completed successfully")
+            
+            # Update agent stats
+            self._update_agent_stats(success=True, session=session)
+            
+            return RiskOutput(
+                success=True,
+                message=result.output or "Risk analysis completed successfully",
+                risk_metrics=risk_metrics,
+                compliance_status=compliance_status,
+                stress_test_results=stress_test_results,
+                risk_warnings=risk_warnings,
+                mitigation_recommendations=mitigation_recommendations
+            )
+            
         except Exception as e:
             self.log_message(f"Risk analysis failed: {str(e)}", level="error")
             # Update agent stats
@@ -1,18 +1,300 @@
 # backend/ai_agents/strategy_coding_agent.py
-from pydantic import BaseModel, Field
-from typing import Dict, Any, Optional, List
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Dict, Any, Optional, List, Tuple, Callable, AsyncIterator, Union
 from sqlmodel import Session
-import json # For formatting JSON in prompts if needed
+import orjson
+import asyncio
+import multiprocessing
+from contextlib import suppress
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict
+from functools import cached_property
+import ast
+import string
+import py_compile
+import hashlib
+import uuid
+import logging
+from datetime import datetime, timedelta
+import httpx
+from tenacity import AsyncRetrying, stop_after_attempt
+from fastapi import HTTPException
+from openai import AsyncOpenAI
+import instructor
+from instructor.core.exceptions import ConfigurationError
 
-from .base_agent import PydanticAIAgent, AgentTaskInput, AgentTaskOutput # Import base agent components
+from .base_agent import PydanticAIAgent, AgentTaskInput, AgentTaskOutput, AgentStats, compile_prompt_template # Import base agent components
+from .llm_clients import get_instructor_client
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import crud
-from backend.models import StrategyCreate, Agent
+from backend.models import Strategy, StrategyCreate, StrategyUpdate, Agent
+from backend.database import engine
 from backend.schemas import StrategyCodingAgentConfig, parse_agent_config
+
+logger = logging.getLogger(__name__)
+
+# Generated strategy code is written here, one file per strategy, spread over up to 256
+# shard subdirectories so no single directory grows with the number of strategies
+STRATEGIES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "strategies", "generated")
+
+# Why the backtest service refused a job, by HTTP status (other codes fall back to the status class)
+_BACKTEST_STATUS_REASONS = {
+    400: "no usable dataset or invalid strategy ID",
+    404: "strategy not found",
+    422: "invalid backtest request",
+}
+
+# Symbol used to backtest a generated strategy, by target asset class
+_DEFAULT_BACKTEST_SYMBOL = {"stocks": "AAPL", "crypto": "BTC/USD", "forex": "EUR/USD"}
+
+# Fallbacks when the LLM's file name or description can't be used
+_DEFAULT_STRATEGY_NAME = "AI Strategy for %s (%s risk)"
+_DEFAULT_STRATEGY_DESCRIPTION = "AI-Generated strategy (%s) based on: %s, risk: %s."
+
+# Hard cap on structured-output attempts per LLM call, whatever codingRetryAttempts says
+_MAX_LLM_ATTEMPTS = 3
+
+def _llm_retry_policy(attempts: int) -> AsyncRetrying:
+    """
+    Retry budget for one Instructor call: at most `attempts` tries (capped at _MAX_LLM_ATTEMPTS),
+    and stop early once the model repeats a validation error it already made, since another
+    round-trip is unlikely to fix it.
+    """
+    seen_errors = set()
+
+    def repeated_error(retry_state) -> bool:
+        exc = retry_state.outcome.exception() if retry_state.outcome else None
+        if exc is None:
+            return False
+        if callable(getattr(exc, "errors", None)): # pydantic ValidationError: compare error types and locations only
+            key = tuple((err["type"], tuple(err["loc"])) for err in exc.errors())
+        else:
+            key = (type(exc).__name__, str(exc))
+        if key in seen_errors:
+            return True
+        seen_errors.add(key)
+        return False
+
+    return AsyncRetrying(stop=stop_after_attempt(min(max(attempts, 1), _MAX_LLM_ATTEMPTS)) | repeated_error)
+
+_USER_PROMPT_SUFFIX = "\nPlease provide the strategy code and a brief description."
+# User message for a custom generationPrompt without placeholders
+_FALLBACK_USER_PROMPT = (
+    "Generate a Python trading strategy for the '%(asset)s' asset class.\n"
+    "Market conditions are '%(market)s', and my risk tolerance is '%(risk)s'.\n"
+    "Historical data summary: %(history)s.\n"
+    "Custom requirements: %(custom)s." + _USER_PROMPT_SUFFIX
+)
+
+def strategy_relative_path(file_name: str, suffix: Union[int, str]) -> str:
+    """
+    Path of a generated strategy file relative to STRATEGIES_DIR: "shard_<xx>/s<suffix>/<stem>.py".
+    The name comes from the LLM, so only its basename is used and it cannot escape the directory.
+    The module keeps the LLM's stem because the backtester derives the class name from it; the
+    s<suffix> directory (the strategy's id, or a random token for code streamed before its row
+    exists) keeps two strategies given the same name apart.
+    """
+    stem = os.path.basename(file_name).removesuffix(".py")
+    directory = f"s{suffix}"
+    shard = hashlib.blake2b(directory.encode(), digest_size=1).hexdigest()
+    return os.path.join(f"shard_{shard}", directory, f"{stem}.py")
+
+def generated_strategy_id(file_path: str) -> Optional[str]:
+    """
+    Backtest strategy ID for a generated strategy file ("strat-generated.shard_<xx>.s<suffix>.<stem>"),
+    or None if its path is not an importable module.
+    """
+    parts = os.path.relpath(file_path, STRATEGIES_DIR).removesuffix(".py").split(os.sep)
+    if not all(part.isidentifier() for part in parts):
+        return None
+    return "strat-generated." + ".".join(parts)
+
+def _strategy_file_path(relative_path: str) -> str:
+    """Absolute path for a generated strategy file."""
+    return os.path.join(STRATEGIES_DIR, relative_path)
+
+def _open_strategy_file(file_path: str, mode: str = "x"):
+    """
+    Open a generated strategy file for writing, creating STRATEGIES_DIR and its subdirectories if needed (blocking).
+    The default mode creates the file exclusively, so an existing file (another strategy's code) is never truncated.
+    """
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    return open(file_path, mode, encoding="utf-8")
+
+def _write_strategy_code(file_path: str, code: str) -> str:
+    """Write generated code to its file under STRATEGIES_DIR (blocking) and return the file path."""
+    # The path is named after the strategy's id, so a file already there is left from a deleted strategy
+    with _open_strategy_file(file_path, "w") as f:
+        f.write(code)
+    return file_path
+
+async def save_strategy_code(file_path: str, code: str) -> str:
+    """Write generated strategy code in a worker thread and return the file path."""
+    return await asyncio.to_thread(_write_strategy_code, file_path, code)
+
+class StrategyCodeStream:
+    """
+    Writes generated code to its file while the LLM is still streaming it.
+    Each stream creates its own uniquely named file, so discard() only ever removes code it wrote.
+    Each update appends only the new part of the code; file I/O runs in a worker thread.
+    on_write, if given, is called with each appended chunk once it is on disk.
+    """
+
+    def __init__(self, on_write: Optional[Callable[[str], None]] = None):
+        self.file_path: Optional[str] = None
+        self._file = None
+        self._written = 0
+        self._on_write = on_write
+
+    async def update(self, file_name: str, code: str) -> None:
+        """Append whatever part of `code` has not been written yet."""
+        if self._file is None:
+            self.file_path = _strategy_file_path(strategy_relative_path(file_name, uuid.uuid4().hex[:12]))
+            self._file = await asyncio.to_thread(_open_strategy_file, self.file_path)
+        if len(code) > self._written:
+            chunk = code[self._written:]
+            await asyncio.to_thread(self._file.write, chunk)
+            self._written = len(code)
+            if self._on_write is not None:
+                self._on_write(chunk)
+
+    async def close(self) -> None:
+        """Flush and close the file."""
+        if self._file is not None:
+            await asyncio.to_thread(self._file.close)
+            self._file = None
+
+    async def discard(self) -> None:
+        """Close and delete a partially written file (e.g. when the stream failed)."""
+        await self.close()
+        if self.file_path is not None:
+            with suppress(FileNotFoundError):
+                await asyncio.to_thread(os.remove, self.file_path)
  
+def validate_strategy_code(code: str, file_name: str) -> None:
+    """
+    Check that generated code parses and compiles.
+    Compiling the parsed tree also catches errors ast.parse allows (e.g. 'return' outside a function).
+
+    Raises:
+        SyntaxError: If the code is invalid Python
+        ValueError: If the code contains null bytes
+    """
+    compile(ast.parse(code, filename=file_name), file_name, "exec")
+
+# Worker processes for CPU-bound validation of batch-generated code, created on first use.
+# Capped because every server worker process gets its own pool.
+_VALIDATION_POOL_MAX_WORKERS = 4
+_validation_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_validation_pool() -> ProcessPoolExecutor:
+    global _validation_pool
+    if _validation_pool is None:
+        # Spawned, not forked: the server process runs threads (the event loop's executors, the log listener)
+        _validation_pool = ProcessPoolExecutor(
+            max_workers=min(_VALIDATION_POOL_MAX_WORKERS, os.cpu_count() or 1),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _validation_pool
+
+def shutdown_validation_pool() -> None:
+    """Stop the validation worker processes, if they were started (called on application shutdown)."""
+    global _validation_pool
+    if _validation_pool is not None:
+        _validation_pool.shutdown(cancel_futures=True)
+        _validation_pool = None
+
+async def validate_strategy_code_in_pool(code: str, file_name: str) -> None:
+    """
+    Run validate_strategy_code in a worker process, so that validating a batch of generated
+    strategies uses several cores and does not stall the event loop.
+    """
+    await asyncio.get_running_loop().run_in_executor(_get_validation_pool(), validate_strategy_code, code, file_name)
+
+class StrategyInsertBatcher:
+    """
+    Micro-batches strategy INSERTs from concurrent generations into a single commit.
+    A batch is flushed when it reaches max_batch_size or max_delay seconds after its first row,
+    whichever comes first. The commit runs in a worker thread on its own session.
+    """
+
+    def __init__(self, max_batch_size: int = 32, max_delay: float = 0.05):
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self._pending: List[Tuple[StrategyCreate, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_tasks: set = set() # Strong references so in-flight flushes are not garbage collected
+
+    async def submit(self, strategy_in: StrategyCreate) -> Strategy:
+        """Queue a strategy for insertion and wait until its batch is committed."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((strategy_in, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush_pending()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_delay, self._flush_pending)
+        return await future
+
+    def _flush_pending(self) -> None:
+        """Hand the pending rows to a flush task and start a new batch."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._flush(batch))
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush(self, batch: List[Tuple[StrategyCreate, asyncio.Future]]) -> None:
+        try:
+            db_strategies = await asyncio.to_thread(_insert_strategies, [strategy_in for strategy_in, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), db_strategy in zip(batch, db_strategies):
+            if not future.done():
+                future.set_result(db_strategy)
+
+def _insert_strategies(strategies_in: List[StrategyCreate]) -> List[Strategy]:
+    """Insert a batch of strategies in one transaction (blocking)."""
+    with Session(engine, expire_on_commit=False) as session:
+        return crud.create_strategies(session=session, strategies_in=strategies_in)
+
+_strategy_insert_batcher = StrategyInsertBatcher()
+
+# Post-save work (bytecode precompilation) runs after the response is returned;
+# the semaphore bounds how many of those background jobs run at once.
+_post_save_semaphore = asyncio.Semaphore(8)
+_post_save_tasks: set = set()
+
+def _precompile_strategy(file_path: str) -> None:
+    """Write the .pyc now so the backtester imports bytecode instead of compiling on first load."""
+    try:
+        py_compile.compile(file_path, doraise=True)
+    except (py_compile.PyCompileError, OSError):
+        # Not fatal: the backtester compiles the source itself when there is no .pyc
+        logger.warning("Could not precompile %s", file_path, exc_info=True)
+
+async def _precompile_strategy_bounded(file_path: str) -> None:
+    async with _post_save_semaphore:
+        await asyncio.to_thread(_precompile_strategy, file_path)
+
+def precompile_strategy_in_background(file_path: str) -> None:
+    """Schedule _precompile_strategy without making the caller wait for it."""
+    task = asyncio.get_running_loop().create_task(_precompile_strategy_bounded(file_path))
+    _post_save_tasks.add(task)
+    task.add_done_callback(_post_save_tasks.discard)
+
 class GenerateStrategyInput(AgentTaskInput):
+    # Frozen so the input is hashable (it identifies cached generations) and cannot change mid-run
+    model_config = ConfigDict(defer_build=False, frozen=True)
+
     market_conditions: str = Field(description="Current market conditions (e.g., bullish, bearish, volatile).")
     # risk_tolerance field in the frontend AgentConfigurationDialog uses a string enum from schema
     # Ensure this matches. schemas.AgentConfigUnion is too broad.
@@ -28,6 +310,28 @@ class GeneratedStrategyCode(BaseModel):
     python_code: str = Field(description="The generated Python code for the trading strategy, compatible with Lumibot.")
     description: Optional[str] = Field(default=None, description="A brief description of what the strategy does, its logic, and intended use.")
 
+# Structured output schema pinned on Batch API requests, which bypass instructor
+_GENERATED_CODE_JSON_SCHEMA = {"name": "GeneratedStrategyCode", "schema": GeneratedStrategyCode.model_json_schema()}
+
+# Exact-match cache of generations, keyed by _cache_key (LRU, per process). Instructor's own
+# response cache is not used: it would keep replaying a response whose code failed to compile.
+_GENERATION_CACHE_SIZE = 256
+_generation_cache: "OrderedDict[str, GeneratedStrategyCode]" = OrderedDict()
+
+def _generation_cache_get(key: str) -> Optional[GeneratedStrategyCode]:
+    """Look up a cached generation, marking it as recently used."""
+    llm_response = _generation_cache.get(key)
+    if llm_response is not None:
+        _generation_cache.move_to_end(key)
+    return llm_response
+
+def _generation_cache_put(key: str, llm_response: GeneratedStrategyCode) -> None:
+    """Cache a generation. Only call this once its code has been validated; a bad response must not be replayed."""
+    _generation_cache[key] = llm_response
+    _generation_cache.move_to_end(key)
+    if len(_generation_cache) > _GENERATION_CACHE_SIZE:
+        _generation_cache.popitem(last=False)
+
 class GenerateStrategyOutput(AgentTaskOutput):
     generated_code_details: Optional[GeneratedStrategyCode] = Field(default=None, description="Details of the generated strategy code.")
     strategy_name_suggestion: Optional[str] = Field(default=None, description="A suggested name for the new strategy.")
@@ -43,116 +347,558 @@ class StrategyCodingAIAgent(PydanticAIAgent[GenerateStrategyInput, GenerateStrat
         super().__init__(agent_model, session)
         if not isinstance(self.config, StrategyCodingAgentConfig):
            # This check might be redundant if the factory/API layer ensures correct config parsing.
-           # However, it's a good safeguard.
+           # However, it's a good safeguard. With from_attributes, model_validate reads dicts and
+           # other config models directly, without building an intermediate dict.
            try:
-               self.config = StrategyCodingAgentConfig(
-                   **agent_model.config if isinstance(agent_model.config, dict) else dict(agent_model.config)
-               )
+               self.config = StrategyCodingAgentConfig.model_validate(agent_model.config, from_attributes=True)
            except Exception as e:
                 raise ValueError(f"Invalid configuration type for StrategyCodingAIAgent. Expected StrategyCodingAgentConfig, got {type(agent_model.config)}. Error: {e}")
 
+        # Lex the generation prompt once; each request only substitutes its values
+        self._prompt_prefix, self._prompt_template = compile_prompt_template(self.config.generationPrompt)
+        # Built once per agent so the user message is a single substitution with the suffix already in place
+        self._user_template = (
+            string.Template(self._prompt_template.template + _USER_PROMPT_SUFFIX)
+            if self._prompt_template.template else None
+        )
+
+        # Caps concurrent LLM calls made by run_batch (and by concurrent runs of this instance)
+        self._llm_semaphore = asyncio.Semaphore(self.config.maxConcurrentLLMCalls)
+
         self.log_message("StrategyCodingAIAgent (pydantic-ai) initialized.")
 
-    async def run(self, task_input: GenerateStrategyInput, session: Session) -> GenerateStrategyOutput:
-        self.log_message(f"Starting strategy generation task with input: {task_input.model_dump_json(indent=2)}")
+    @cached_property
+    def instructor(self) -> instructor.AsyncInstructor:
+        """
+        Structured-output client for the response_model calls, created on first use.
+        Building it can fail (e.g. the provider's SDK is not installed), which only fails the generation.
+        """
+        try:
+            return get_instructor_client(self.config.llmModelProviderId, self.config.llmModelName)
+        except (ValueError, ImportError, ConfigurationError) as e:
+            raise ConnectionError(f"Could not initialize structured-output LLM client for agent {self.agent_model.name}: {e}") from e
 
-        if not self.config.llmModelProviderId or not self.config.llmModelName:
-            msg = "LLM provider or model name not configured for strategy generation."
-            self.log_message(msg, level="error")
-            self._update_agent_stats(success=False, session=session)
-            return GenerateStrategyOutput(success=False, message=msg)
+    @cached_property
+    def batch_client(self) -> AsyncOpenAI:
+        """OpenAI client for the Batch API, created on first use and shared by submit_batch and collect_batch."""
+        return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-        # Prepare messages for pydantic-ai Instructor
-        # The generationPrompt from config is the system prompt.
-        # We interpolate task_input values into it.
-        
-        system_prompt_template = self.config.generationPrompt
-        # Basic template variable replacement (ensure these placeholders exist in the default prompt)
-        system_prompt = system_prompt_template.format(
-            riskTolerance=task_input.risk_tolerance,
-            marketConditions=task_input.market_conditions,
-            historicalData=task_input.historical_data_summary or "Not provided.",
-            # Add other placeholders if your prompt uses them
-            targetAssetClass=task_input.target_asset_class or "any",
-            customRequirements=task_input.custom_requirements or "None."
-        )
+    def _build_messages(self, task_input: GenerateStrategyInput) -> List[Dict[str, str]]:
+        """Build the chat messages for a single strategy generation request."""
+        # The static part of generationPrompt is the system prompt, identical across requests so
+        # providers can reuse their prompt prefix cache. Every per-request value goes in the user
+        # message, once: the filled-in placeholder lines of generationPrompt.
+        if self._user_template is not None:
+            user_content = self._user_template.safe_substitute(
+                riskTolerance=task_input.risk_tolerance,
+                marketConditions=task_input.market_conditions,
+                historicalData=task_input.historical_data_summary or "Not provided.",
+                # Add other placeholders if your prompt uses them
+                targetAssetClass=task_input.target_asset_class or "any",
+                customRequirements=task_input.custom_requirements or "None."
+            )
+        else:
+            # A custom prompt without placeholders: describe the request in the user message instead
+            user_content = _FALLBACK_USER_PROMPT % {
+                "asset": task_input.target_asset_class,
+                "market": task_input.market_conditions,
+                "risk": task_input.risk_tolerance,
+                "history": task_input.historical_data_summary or "N/A",
+                "custom": task_input.custom_requirements or "N/A",
+            }
+
+        # Fresh dicts each time: client libraries may edit message dicts in place
+        return [
+            {"role": "system", "content": self._prompt_prefix},
+            {"role": "user", "content": user_content}
+        ]
+
+    def _cache_key(self, messages: List[Dict[str, str]]) -> str:
+        """Exact-match cache key for a generation request: the prompts plus the model that answers them."""
+        # orjson writes straight to bytes; sorted keys keep the hash stable for equal requests
+        return hashlib.sha256(orjson.dumps(
+            [messages, self.config.llmModelProviderId, self.config.llmModelName],
+            option=orjson.OPT_SORT_KEYS
+        )).hexdigest()
+
+    async def _call_llm(self, task_input: GenerateStrategyInput) -> GeneratedStrategyCode:
+        """Generate the strategy code for one request, bounded by the concurrent LLM call limit."""
+        messages = self._build_messages(task_input)
+        cached = _generation_cache_get(self._cache_key(messages))
+        if cached is not None:
+            self.log_message("Reusing cached generation for identical request")
+            return cached
+
+        async with self._llm_semaphore:
+            # The response model for the LLM call itself is GeneratedStrategyCode.
+            # The timeout bounds the call including retries; waiting for the semaphore is not counted.
+            llm_response = await asyncio.wait_for(
+                self.instructor.chat.completions.create(
+                    messages=messages,
+                    response_model=GeneratedStrategyCode, # Expecting code and filename
+                    max_retries=_llm_retry_policy(self.config.codingRetryAttempts),
+                ),
+                timeout=self.config.timeoutSeconds
+            )
+        return llm_response
+
+    async def _stream_llm(
+        self, task_input: GenerateStrategyInput, on_code: Optional[Callable[[str], None]] = None
+    ) -> Tuple[GeneratedStrategyCode, Optional[StrategyCodeStream]]:
+        """
+        Generate the strategy code for one request as a stream, writing the code to disk as it arrives.
+        on_code, if given, receives each new chunk of code as it is written.
+        Returns the final response and the closed stream holding its file (None for a cached response,
+        which is saved under the new strategy's own name like a non-streamed one).
+        """
+        messages = self._build_messages(task_input)
+        cached = _generation_cache_get(self._cache_key(messages))
+        if cached is not None:
+            self.log_message("Reusing cached generation for identical request")
+            if on_code is not None:
+                on_code(cached.python_code)
+            return cached, None
+
+        code_stream = StrategyCodeStream(on_write=on_code)
+        partial = None
+        try:
+            async def consume_stream():
+                last = None
+                async for last in self.instructor.chat.completions.create_partial(
+                    messages=messages,
+                    response_model=GeneratedStrategyCode,
+                    max_retries=_llm_retry_policy(self.config.codingRetryAttempts),
+                ):
+                    # file_name precedes python_code in the schema, so it is complete once code starts arriving
+                    if last.python_code:
+                        await code_stream.update(last.file_name, last.python_code)
+                return last
+
+            async with self._llm_semaphore:
+                partial = await asyncio.wait_for(consume_stream(), timeout=self.config.timeoutSeconds)
+            if partial is None:
+                raise ValueError("LLM returned an empty stream.")
+            llm_response = GeneratedStrategyCode.model_validate(partial.model_dump())
+            await code_stream.update(llm_response.file_name, llm_response.python_code)
+            await code_stream.close()
+        except BaseException:
+            await code_stream.discard()
+            raise
+        return llm_response, code_stream
+
+    async def _persist(
+        self,
+        task_input: GenerateStrategyInput,
+        llm_response: GeneratedStrategyCode,
+        session: Session,
+        pending_strategy_id: Optional[int] = None,
+        code_stream: Optional[StrategyCodeStream] = None,
+        stats: Optional[AgentStats] = None,
+        validate_in_pool: bool = False
+    ) -> GenerateStrategyOutput:
+        """
+        Save a generated strategy and build the task output for it.
+        If pending_strategy_id is given (Batch API results), that placeholder row is filled in instead of creating a new one.
+        If code_stream is given, the code was already written to its file while streaming.
+        If stats is given (batch runs), the outcome is recorded there instead of in the database.
+        If validate_in_pool is set (concurrent batch runs), the code is validated in a worker process.
+        """
+        self.log_message(f"LLM generated code for file: {llm_response.file_name}")
+
+        # Reject code that does not compile before it is saved, stored or backtested
+        try:
+            if validate_in_pool:
+                await validate_strategy_code_in_pool(llm_response.python_code, llm_response.file_name)
+            else:
+                validate_strategy_code(llm_response.python_code, llm_response.file_name)
+        except (SyntaxError, ValueError) as e:
+            self.log_message(f"Generated code for {llm_response.file_name} is invalid: {e}", level="error")
+            # Only the streamed file this run created exclusively is removed; nothing else was written yet
+            if code_stream is not None:
+                await code_stream.discard()
+            if pending_strategy_id is not None:
+                crud.update_strategy(session=session, strategy_id=pending_strategy_id, strategy_in=StrategyUpdate(
+                    status='Inactive', description=f"Batch generation produced invalid Python: {e}"
+                ))
+            self._update_agent_stats(success=False, session=session, stats=stats)
+            return GenerateStrategyOutput(
+                success=False,
+                message="LLM produced syntactically invalid Python",
+                generated_code_details=llm_response,
+                error_details=str(e)
+            )
+        # The pool has just validated the code, so the response is safe to replay for an identical request
+        _generation_cache_put(self._cache_key(self._build_messages(task_input)), llm_response)
+
+        # --- Post-processing: Save the generated strategy ---
+        # Suggest a strategy name based on generated file name or task input
+        stem = llm_response.file_name.removesuffix(".py").replace("_", " ")
+        if len(stem) >= 3:
+            suggested_strat_name = stem.title()
+        else:
+            suggested_strat_name = _DEFAULT_STRATEGY_NAME % (task_input.target_asset_class, task_input.risk_tolerance)
         
-        # Construct a user message that encapsulates the core request if needed,
-        # or rely purely on the system prompt if it's comprehensive.
-        # For strategy generation, the system prompt might be enough.
-        # Let's make a user message that summarizes the request.
-        user_prompt_content = (
-            f"Generate a Python trading strategy for the '{task_input.target_asset_class}' asset class. "
-            f"Market conditions are '{task_input.market_conditions}', and my risk tolerance is '{task_input.risk_tolerance}'. "
-            f"Historical data summary: {task_input.historical_data_summary or 'N/A'}. "
-            f"Custom requirements: {task_input.custom_requirements or 'N/A'}. "
-            "Please provide the strategy code and a brief description."
+        strategy_description = llm_response.description or \
+                               _DEFAULT_STRATEGY_DESCRIPTION % (suggested_strat_name, task_input.market_conditions, task_input.risk_tolerance)
+
+        async def start_backtest(path: str) -> Optional[str]:
+            # The backtest runs asynchronously; it only needs the file, not the strategy row
+            return await self._start_backtest(task_input, path, session) if self.config.autoBacktest else None
+
+        # Save the strategy to the database (without PnL/WinRate from backtest yet)
+        if code_stream is not None:
+            file_path = code_stream.file_path
+            # Streamed code is already in its own file, so the insert and the backtest submission overlap.
+            # Concurrent generations share one INSERT transaction instead of one commit each.
+            new_strategy_db, backtest_job_id = await asyncio.gather(
+                _strategy_insert_batcher.submit(StrategyCreate(
+                    name=suggested_strat_name,
+                    description=strategy_description,
+                    status='Inactive', # AI-generated strategies start as inactive for review
+                    source='AI-Generated',
+                    file_name=os.path.relpath(file_path, STRATEGIES_DIR),
+                    # pnl and win_rate will be updated after a separate backtest run
+                    pnl=0.0,
+                    win_rate=0.0,
+                )),
+                start_backtest(file_path),
+            )
+        else:
+            # The file is named after the strategy's id, so the row has to exist first
+            if pending_strategy_id is None:
+                strategy_id = (await _strategy_insert_batcher.submit(StrategyCreate(
+                    name=suggested_strat_name,
+                    description=strategy_description,
+                    status='Inactive',
+                    source='AI-Generated',
+                    pnl=0.0,
+                    win_rate=0.0,
+                ))).id
+                pending_fields = {}
+            else:
+                strategy_id = pending_strategy_id
+                pending_fields = dict(name=suggested_strat_name, description=strategy_description, status='Inactive')
+            relative_path = strategy_relative_path(llm_response.file_name, strategy_id)
+            # Write the code off the event loop so concurrent generations are not blocked on disk I/O
+            file_path = await save_strategy_code(_strategy_file_path(relative_path), llm_response.python_code)
+            new_strategy_db = crud.update_strategy(session=session, strategy_id=strategy_id, strategy_in=StrategyUpdate(
+                file_name=relative_path, **pending_fields
+            ))
+            if not new_strategy_db:
+                raise ValueError(f"Strategy {strategy_id} no longer exists.")
+            backtest_job_id = await start_backtest(file_path)
+        self.log_message(f"Saved code for strategy {new_strategy_db.id} to {file_path}")
+
+        # Precompiling is not needed for the response; the backtester falls back to the source if it runs first
+        precompile_strategy_in_background(file_path)
+
+        # Success counters are not needed by the caller; keep the DB write off the response path
+        self._update_agent_stats_in_background(success=True, stats=stats)
+        return GenerateStrategyOutput(
+            success=True,
+            message=f"Strategy '{new_strategy_db.name}' (code for {llm_response.file_name}) generated successfully. " + (
+                f"Backtest job {backtest_job_id} queued." if backtest_job_id else "Needs backtesting."
+            ),
+            generated_code_details=llm_response,
+            strategy_name_suggestion=new_strategy_db.name,
+            data={"strategy_id": new_strategy_db.id, "backtest_job_id": backtest_job_id}
         )
 
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt_content}
-        ]
+    async def _start_backtest(self, task_input: GenerateStrategyInput, file_path: str, session: Session) -> Optional[str]:
+        """
+        Queue a backtest for a saved strategy file, returning the job ID (None if it could not be queued).
+        The backtest is queued in-process unless backtestApiUrl points at a remote backtesting service.
+        """
+        backtest_strategy_id = generated_strategy_id(file_path)
+        if backtest_strategy_id is None:
+            self.log_message(f"Cannot backtest {file_path}: not an importable module name", level="warn")
+            return None
+
+        now = datetime.now()
+        backtest_payload = {
+            "strategy_id": backtest_strategy_id,
+            "parameters": {
+                "startDate": (now - timedelta(days=365)).strftime("%Y-%m-%d"),
+                "endDate": now.strftime("%Y-%m-%d"),
+                "initialCapital": 100000.0,
+                "symbol": _DEFAULT_BACKTEST_SYMBOL.get(task_input.target_asset_class, "SPY"),
+                "timeframe": "1d",
+            },
+        }
+
+        if self.config.backtestApiUrl:
+            try:
+                api_response = await self.dependencies.client.post(
+                    self.config.backtestApiUrl,
+                    content=orjson.dumps(backtest_payload),
+                    headers={"Content-Type": "application/json"},
+                    timeout=5.0
+                )
+            except httpx.RequestError as e:
+                # Connection failures were already retried by the shared client's transport
+                self.log_message(f"Could not reach backtest service: {e}", level="warn")
+                return None
+            # Rejections are expected (e.g. no dataset for the symbol); check the status instead of raising
+            if api_response.status_code >= 400:
+                reason = _BACKTEST_STATUS_REASONS.get(
+                    api_response.status_code,
+                    "backtest service error" if api_response.status_code >= 500 else "request rejected"
+                )
+                self.log_message(f"Backtest for {module_name} was not queued ({api_response.status_code}, {reason}): {api_response.text}", level="warn")
+                return None
+            try:
+                job_id = orjson.loads(api_response.content).get("jobId")
+            except (orjson.JSONDecodeError, AttributeError):
+                job_id = None
+            if not job_id:
+                self.log_message(f"Invalid response from backtest service: {api_response.text}", level="warn")
+                return None
+        else:
+            from backend.api.backtesting import BacktestRequest, queue_backtest
+            try:
+                job = await queue_backtest(BacktestRequest(**backtest_payload), session)
+            except HTTPException as e:
+                self.log_message(f"Backtest for {module_name} was not queued: {e.detail}", level="warn")
+                return None
+            job_id = job.jobId
+
+        self.log_message(f"Queued backtest job {job_id} for {module_name}")
+        return job_id
+
+    def _llm_not_configured(self, session: Session) -> Optional[GenerateStrategyOutput]:
+        """Return a failed output if no LLM is configured for strategy generation, otherwise None."""
+        if self.config.llmModelProviderId and self.config.llmModelName:
+            return None
+        msg = "LLM provider or model name not configured for strategy generation."
+        self.log_message(msg, level="error")
+        self._update_agent_stats(success=False, session=session)
+        return GenerateStrategyOutput(success=False, message=msg)
+
+    async def run(
+        self, task_input: GenerateStrategyInput, session: Session, on_code: Optional[Callable[[str], None]] = None
+    ) -> GenerateStrategyOutput:
+        self.log_message("Starting strategy generation task")
+        if self.is_log_enabled("debug"):
+            self.log_message(
+                f"Task input: {orjson.dumps(task_input.model_dump(mode='json', exclude_defaults=True), option=orjson.OPT_INDENT_2).decode()}",
+                level="debug"
+            )
+
+        not_configured = self._llm_not_configured(session)
+        if not_configured:
+            return not_configured
         
         self.log_message(f"Calling pydantic-ai instructor with model: {self.llm_client.model}") # Log the actual model being used
 
         try:
-            # The response model for the LLM call itself is GeneratedStrategyCode
-            llm_response: GeneratedStrategyCode = await self.instructor.chat.completions.create(
-                messages=messages,
-                response_model=GeneratedStrategyCode, # Expecting code and filename
-                max_retries=self.config.codingRetryAttempts or 1,
+            # Stream the response so the code is written to disk while it is still being generated
+            llm_response, code_stream = await self._stream_llm(task_input, on_code=on_code)
+            return await self._persist(task_input, llm_response, session, code_stream=code_stream)
+
+        except Exception as e:
+            self.log_message(f"Error during pydantic-ai LLM call or post-processing: {e}", level="error")
+            self._update_agent_stats(success=False, session=session)
+            return GenerateStrategyOutput(success=False, message="Failed to generate strategy code via LLM.", error_details=str(e))
+
+    async def run_streaming(self, task_input: GenerateStrategyInput, session: Session) -> AsyncIterator[bytes]:
+        """
+        Like run, but yields NDJSON lines as the work progresses: {"event": "code", "delta": ...}
+        for each chunk of generated code, then one {"event": "result", "data": ...} with the task output.
+        Closing the generator early (client disconnected) cancels the generation.
+        """
+        code_chunks: asyncio.Queue = asyncio.Queue()
+
+        async def produce() -> GenerateStrategyOutput:
+            try:
+                return await self.run(task_input, session, on_code=code_chunks.put_nowait)
+            finally:
+                code_chunks.put_nowait(None) # End of the code stream
+
+        task = asyncio.create_task(produce())
+        try:
+            while (chunk := await code_chunks.get()) is not None:
+                yield orjson.dumps({"event": "code", "delta": chunk}) + b"\n"
+            output = await task
+            yield orjson.dumps({"event": "result", "data": output.model_dump(mode="json")}) + b"\n"
+        finally:
+            if not task.done():
+                task.cancel()
+
+    async def run_batch(self, task_inputs: List[GenerateStrategyInput], session: Session) -> List[GenerateStrategyOutput]:
+        """
+        Generate several strategies at once (e.g. a sweep over risk tolerances or asset classes).
+        The LLM calls run concurrently, up to maxConcurrentLLMCalls at a time, and the
+        resulting strategies are inserted together.
+
+        Args:
+            task_inputs: One input per strategy to generate
+            session: Database session for persistence
+
+        Returns:
+            One output per input, in the same order
+        """
+        self.log_message(f"Starting batch strategy generation for {len(task_inputs)} inputs")
+
+        not_configured = self._llm_not_configured(session)
+        if not_configured:
+            return [not_configured] * len(task_inputs)
+
+        llm_responses = await asyncio.gather(
+            *(self._call_llm(task_input) for task_input in task_inputs),
+            return_exceptions=True
+        )
+
+        # Persist concurrently so the new strategies are inserted in one batched commit,
+        # and record the whole batch in the agent stats with one UPDATE.
+        with self.deferred_agent_stats(session) as stats:
+            return list(await asyncio.gather(*(
+                self._persist_or_fail(task_input, llm_response, session, stats)
+                for task_input, llm_response in zip(task_inputs, llm_responses)
+            )))
+
+    async def _persist_or_fail(
+        self, task_input: GenerateStrategyInput, llm_response: Any, session: Session, stats: AgentStats
+    ) -> GenerateStrategyOutput:
+        """Persist one run_batch result, turning an LLM or persistence error into a failed output."""
+        try:
+            if isinstance(llm_response, Exception):
+                raise llm_response
+            return await self._persist(task_input, llm_response, session, stats=stats, validate_in_pool=True)
+        except Exception as e:
+            self.log_message(f"Error during pydantic-ai LLM call or post-processing: {e}", level="error")
+            self._update_agent_stats(success=False, session=session, stats=stats)
+            return GenerateStrategyOutput(success=False, message="Failed to generate strategy code via LLM.", error_details=str(e))
+
+    # --- Batch API (offline bulk generation) ---
+
+    # Batch states after which no more results will arrive. Expired and cancelled batches
+    # may still hold results for the requests that finished in time.
+    _BATCH_FINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+    def _batch_request_line(self, custom_id: str, task_input: GenerateStrategyInput) -> bytes:
+        """Serialize one chat completion request for the Batch API input file."""
+        return orjson.dumps({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": self.config.llmModelName,
+                "messages": self._build_messages(task_input),
+                "response_format": {"type": "json_schema", "json_schema": _GENERATED_CODE_JSON_SCHEMA},
+            },
+        }) + b"\n"
+
+    async def submit_batch(self, task_inputs: List[GenerateStrategyInput], session: Session) -> GenerateStrategyOutput:
+        """
+        Submit strategy generation requests to the OpenAI Batch API.
+        A 'Pending-Batch' strategy row is created per input; collect_batch fills them in once the batch completes.
+
+        Args:
+            task_inputs: One input per strategy to generate
+            session: Database session for persistence
+
+        Returns:
+            Output whose data holds the batch ID and the pending strategy IDs
+        """
+        if not task_inputs:
+            return GenerateStrategyOutput(success=False, message="No strategy generation requests to submit.")
+        not_configured = self._llm_not_configured(session)
+        if not_configured:
+            return not_configured
+        if not self.config.useBatchApi or self.config.llmModelProviderId != "openai":
+            return GenerateStrategyOutput(success=False, message="Batch generation requires useBatchApi and the 'openai' provider.")
+
+        try:
+            client = self.batch_client
+            request_file = b"".join(
+                self._batch_request_line(f"strategy-{i}", task_input) for i, task_input in enumerate(task_inputs)
+            )
+            input_file = await client.files.create(file=("strategy_batch.jsonl", request_file), purpose="batch")
+            batch = await client.batches.create(
+                input_file_id=input_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
             )
-            
-            self.log_message(f"LLM generated code for file: {llm_response.file_name}")
-
-            # --- Post-processing: Save the generated strategy ---
-            # Suggest a strategy name based on generated file name or task input
-            suggested_strat_name = llm_response.file_name.replace(".py", "").replace("_", " ").title()
-            if not suggested_strat_name or len(suggested_strat_name) < 3:
-                suggested_strat_name = f"AI Strategy for {task_input.target_asset_class} ({task_input.risk_tolerance} risk)"
-            
-            strategy_description = llm_response.description or \
-                                   f"AI-Generated strategy ({suggested_strat_name}) based on: {task_input.market_conditions}, risk: {task_input.risk_tolerance}."
-
-            # TODO: Implement actual backtesting here. This could be a separate agent or tool.
-            # For now, we'll skip actual backtesting within this agent's run.
-            # The frontend's "Automated Generation Form" seems to imply generation AND testing.
-            # If using pydantic-ai tools, a `BacktesterTool` could be invoked by the LLM if prompted.
-            # Or, this agent focuses solely on generation, and another process handles backtesting.
-
-            # For this iteration, let's assume backtesting is separate.
-            # Save the strategy to the database (without PnL/WinRate from backtest yet)
-            new_strategy_db = crud.create_strategy(session=session, strategy_in=models.StrategyCreate(
-                name=suggested_strat_name,
-                description=strategy_description,
-                status='Inactive', # AI-generated strategies start as inactive for review
-                source='AI-Generated',
-                file_name=llm_response.file_name, # Store filename
-                # pnl and win_rate will be updated after a separate backtest run
-                pnl=0.0,
-                win_rate=0.0,
-            ))
-            
-            # TODO: Store the generated_code (llm_response.python_code)
-            # This could be to a file system, S3, or a dedicated table/field in the DB.
-            # For now, we're returning it in the output, but it also needs persistence.
-            # Example: save_strategy_code_to_file(new_strategy_db.id, llm_response.file_name, llm_response.python_code)
-            self.log_message(f"Simulating save of code for strategy {new_strategy_db.id} to {llm_response.file_name}")
 
+            # One commit for all the placeholder rows, read back without reloading each of them
+            pending = await asyncio.to_thread(_insert_strategies, [
+                StrategyCreate(
+                    name=f"Pending AI Strategy for {task_input.target_asset_class} ({task_input.risk_tolerance} risk)",
+                    description="Awaiting Batch API result.",
+                    status='Pending-Batch',
+                    source='AI-Generated',
+                    generation_config={
+                        "batch_id": batch.id,
+                        "custom_id": f"strategy-{i}",
+                        "task_input": task_input.model_dump()
+                    },
+                )
+                for i, task_input in enumerate(task_inputs)
+            ])
+            pending_ids = [strategy.id for strategy in pending]
 
-            self._update_agent_stats(success=True, session=session)
+            self.log_message(f"Submitted batch {batch.id} with {len(task_inputs)} strategy generation requests")
             return GenerateStrategyOutput(
                 success=True,
-                message=f"Strategy '{new_strategy_db.name}' (code for {llm_response.file_name}) generated successfully. Needs backtesting.",
-                generated_code_details=llm_response,
-                strategy_name_suggestion=new_strategy_db.name,
-                data={"strategy_id": new_strategy_db.id}
+                message=f"Batch {batch.id} submitted with {len(task_inputs)} requests.",
+                data={"batch_id": batch.id, "strategy_ids": pending_ids}
             )
 
         except Exception as e:
-            self.log_message(f"Error during pydantic-ai LLM call or post-processing: {e}", level="error")
+            self.log_message(f"Error submitting strategy generation batch: {e}", level="error")
             self._update_agent_stats(success=False, session=session)
-            return GenerateStrategyOutput(success=False, message="Failed to generate strategy code via LLM.", error_details=str(e))
+            return GenerateStrategyOutput(success=False, message="Failed to submit strategy generation batch.", error_details=str(e))
+
+    async def collect_batch(self, batch_id: str, session: Session) -> List[GenerateStrategyOutput]:
+        """
+        Fetch the results of a submitted batch and persist them into its pending strategies.
+        Intended to be polled; returns an empty list while the batch is still running.
+        Once the batch has failed, expired or been cancelled, the pending strategies without a result are marked failed.
+
+        Args:
+            batch_id: ID returned by submit_batch
+            session: Database session for persistence
+
+        Returns:
+            One output per pending strategy of the batch, or an empty list if the batch has not finished
+        """
+        client = self.batch_client
+        batch = await client.batches.retrieve(batch_id)
+        if batch.status not in self._BATCH_FINAL_STATUSES:
+            self.log_message(f"Batch {batch_id} is {batch.status}")
+            return []
+
+        pending = {
+            strategy.generation_config["custom_id"]: strategy
+            for strategy in crud.get_strategies_by_status(session=session, status='Pending-Batch')
+            if (strategy.generation_config or {}).get("batch_id") == batch_id
+        }
+        results = {}
+        if batch.output_file_id:
+            content = await client.files.content(batch.output_file_id)
+            for line in content.text.splitlines():
+                result = orjson.loads(line)
+                results[result["custom_id"]] = result
+
+        outputs = []
+        for custom_id, strategy in pending.items():
+            try:
+                result = results.get(custom_id)
+                if result is None or result.get("error"):
+                    raise ValueError(f"No result for {custom_id} (batch {batch.status}): {result and result.get('error')}")
+                message = result["response"]["body"]["choices"][0]["message"]["content"]
+                llm_response = GeneratedStrategyCode.model_validate_json(message)
+                task_input = GenerateStrategyInput.model_validate(strategy.generation_config["task_input"])
+                outputs.append(await self._persist(task_input, llm_response, session, pending_strategy_id=strategy.id))
+            except Exception as e:
+                self.log_message(f"Error processing batch result {custom_id}: {e}", level="error")
+                crud.update_strategy(session=session, strategy_id=strategy.id, strategy_in=StrategyUpdate(status='Inactive', description=f"Batch generation failed: {e}"))
+                self._update_agent_stats(success=False, session=session)
+                outputs.append(GenerateStrategyOutput(success=False, message="Failed to process batch result.", error_details=str(e)))
+        return outputs
 
 # Note: asyncio.sleep is removed as pydantic-ai handles async LLM calls.
+
+# Build the validators at import so the first run() doesn't pay for schema compilation
+for _model in (GenerateStrategyInput, GeneratedStrategyCode, GenerateStrategyOutput):
+    _model.model_rebuild(force=True)
@@ -1,11 +1,15 @@
 # backend/ai_agents/tools.py
 from pydantic import BaseModel, Field
-from typing import Type, List, Callable, Dict, Any, Optional
+from typing import Type, List, Callable, Dict, Any, Optional, Tuple, FrozenSet
+from functools import lru_cache
+import logging
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from backend import schemas
 
+logger = logging.getLogger(__name__)
+
 # --- Tool Definitions ---
 # These tools should correspond to the `ToolNameEnum` in `schemas.py`
 # Each tool needs a Pydantic model for its input and a `run` method.
@@ -69,21 +73,33 @@ AVAILABLE_TOOLS_MAP: Dict[schemas.ToolNameEnum, Type[BaseModel]] = {
     # schemas.ToolNameEnum.Backtester: BacktesterTool,
 }
 
-def get_enabled_tools_for_instructor(enabled_tool_names: List[schemas.ToolNameEnum]) -> List[Callable]:
+# Tool names already reported as missing an implementation, so each is only warned about once
+_warned_missing_tools: set = set()
+
+
+def get_enabled_tools_for_instructor(enabled_tool_names: List[schemas.ToolNameEnum]) -> Tuple[Callable, ...]:
     """
-    Returns a list of callable tool instances for pydantic-ai's Instructor,
-    based on the names of enabled tools.
+    Returns the tool classes for pydantic-ai's Instructor, based on the names of enabled tools.
+    Results are memoized per set of enabled tools; the order follows ToolNameEnum.
     """
-    tool_instances = []
-    for tool_name in enabled_tool_names:
+    return _enabled_tools_for(frozenset(enabled_tool_names))
+
+
+@lru_cache(maxsize=256)
+def _enabled_tools_for(enabled_tool_names: FrozenSet[schemas.ToolNameEnum]) -> Tuple[Callable, ...]:
+    tool_classes = []
+    for tool_name in schemas.ToolNameEnum:
+        if tool_name not in enabled_tool_names:
+            continue
         tool_class = AVAILABLE_TOOLS_MAP.get(tool_name)
         if tool_class:
             # pydantic-ai's Instructor expects either a function or a Pydantic model class (not an instance)
             # If the tool is a class that has a `run` method, pydantic-ai can usually handle it.
             # Let's pass the class itself.
-            tool_instances.append(tool_class) 
-        else:
-            print(f"Warning: Tool '{tool_name.value}' is enabled in config but no implementation found.")
-    return tool_instances
+            tool_classes.append(tool_class)
+        elif tool_name not in _warned_missing_tools:
+            _warned_missing_tools.add(tool_name)
+            logger.warning("Tool '%s' is enabled in config but no implementation found.", tool_name.value)
+    return tuple(tool_classes)
 
 from typing import Optional
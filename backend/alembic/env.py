@@ -24,11 +24,26 @@ if config.config_file_name is not None:
 # target_metadata = None
 
 # --- SQLModel Integration ---
-# Import your SQLModel models here so Alembic can detect changes
-from backend.models import Strategy, Agent # Import all your SQLModel table models
-from backend.database import SQLModel # Import the base SQLModel
-
-target_metadata = SQLModel.metadata
+# Importing the models pulls in the whole ORM stack, so it only happens for commands
+# that compare against the models (revision --autogenerate, check). Read-only commands
+# such as `alembic current` / `alembic heads` skip it.
+def _needs_metadata() -> bool:
+    cmd_opts = config.cmd_opts
+    if cmd_opts is None: # Invoked programmatically; be safe and load the models
+        return True
+    if getattr(cmd_opts, "autogenerate", False):
+        return True
+    cmd = getattr(cmd_opts, "cmd", None)
+    return bool(cmd) and getattr(cmd[0], "__name__", "") == "check"
+
+
+def _load_metadata():
+    from backend.models import Strategy, Agent # Import all your SQLModel table models
+    from backend.database import SQLModel # Import the base SQLModel
+    return SQLModel.metadata
+
+
+target_metadata = _load_metadata() if _needs_metadata() else None
 # --------------------------
 
 # other values from the config, defined by the needs of env.py,
@@ -75,19 +90,23 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
-    # Ensure connectable uses the URL from config (potentially overridden by env var)
-    connectable_config = config.get_section(config.config_ini_section)
-    if connectable_config:
-        connectable = engine_from_config(
-            connectable_config, # Use the retrieved section directly
-            prefix="sqlalchemy.",
-            poolclass=pool.NullPool,
-        )
-    else:
-        # Fallback if section is not found (shouldn't happen with default ini)
-        from backend.database import engine # type: ignore
-        connectable = engine
-
+    # Reuse the engine when several commands run back-to-back on the same Config
+    # (e.g. an autogenerate/upgrade loop); env.py is re-executed for every command.
+    connectable = config.attributes.get("engine")
+    if connectable is None:
+        # Ensure connectable uses the URL from config (potentially overridden by env var)
+        connectable_config = config.get_section(config.config_ini_section)
+        if connectable_config:
+            connectable = engine_from_config(
+                connectable_config, # Use the retrieved section directly
+                prefix="sqlalchemy.",
+                poolclass=pool.NullPool,
+            )
+        else:
+            # Fallback if section is not found (shouldn't happen with default ini)
+            from backend.database import engine # type: ignore
+            connectable = engine
+        config.attributes["engine"] = connectable
 
     with connectable.connect() as connection:
         context.configure(
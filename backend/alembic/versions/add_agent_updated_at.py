@@ -0,0 +1,29 @@
+"""add_agent_updated_at
+
+Revision ID: add_agent_updated_at
+Revises: auto_generated_placeholder
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_agent_updated_at'
+down_revision: Union[str, None] = 'auto_generated_placeholder'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nullable so existing rows need no backfill; max() in the ETag query skips NULLs
+    op.add_column('agent', sa.Column('updatedAt', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(op.f('ix_agent_updatedAt'), 'agent', ['updatedAt'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_agent_updatedAt'), table_name='agent')
+    op.drop_column('agent', 'updatedAt')
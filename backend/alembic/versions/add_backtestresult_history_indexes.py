@@ -0,0 +1,35 @@
+"""add_backtestresult_history_indexes
+
+Revision ID: add_backtestresult_history_indexes
+Revises: add_agent_updated_at
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_backtestresult_history_indexes'
+down_revision: Union[str, None] = 'add_agent_updated_at'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The table itself is created by create_db_and_tables(), which also creates these indexes
+    # on a fresh database; if_not_exists keeps the migration safe to run after that.
+    op.create_index(
+        'ix_backtestresult_strategy_id_timestamp', 'backtestresult', ['strategy_id', 'timestamp'],
+        unique=False, if_not_exists=True
+    )
+    op.create_index(
+        op.f('ix_backtestresult_timestamp'), 'backtestresult', ['timestamp'],
+        unique=False, if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_backtestresult_timestamp'), table_name='backtestresult', if_exists=True)
+    op.drop_index('ix_backtestresult_strategy_id_timestamp', table_name='backtestresult', if_exists=True)
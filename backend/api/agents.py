@@ -1,8 +1,15 @@
 # backend/api/agents.py
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session
-from typing import List, Any, Dict
-from pydantic import ValidationError as PydanticValidationError, BaseModel, Field
+from typing import List, Any, Dict, Optional
+from pydantic import ValidationError as PydanticValidationError, TypeAdapter
+
+import logging
+from contextlib import contextmanager
+import orjson
+from collections import defaultdict
+from datetime import datetime
 
 import sys
 import os
@@ -11,12 +18,15 @@ import crud
 from backend.models import AgentTypeEnum, AgentStatusEnum
 from backend.schemas import (
     AgentRead, AgentCreate, AgentUpdate, BaseAgentConfig, parse_agent_config,
-    AgentConfigUnion, AgentStatusEnumSchema, AgentStatusUpdate
+    AgentConfigUnion, AgentStatusEnumSchema, AgentStatusUpdate, AgentBulkStatusItem, AgentTypeEnumSchema, CONFIG_BY_TYPE
 )
-from database import get_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from database import engine, get_session, get_async_session
 # Import implementations
 from ai_agents.base_agent import PydanticAIAgent, AgentTaskInput, AgentTaskOutput
-from ai_agents.strategy_coding_agent import GenerateStrategyInput # Specific input
+from ai_agents.strategy_coding_agent import GenerateStrategyInput, GenerateStrategyOutput # Specific input/output
+
+logger = logging.getLogger("algoace.agents")
 
 router = APIRouter(
     prefix="/agents",
@@ -24,133 +34,251 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+# One list adapter per concrete config class, so a page of agents is validated per type in a single call.
+_CONFIG_LIST_ADAPTERS = {t: TypeAdapter(List[cfg_cls]) for t, cfg_cls in CONFIG_BY_TYPE.items()}
+_BASE_CONFIG_LIST_ADAPTER = TypeAdapter(List[BaseAgentConfig])
+
+
+def _parse_configs_bulk(db_agents) -> List[AgentConfigUnion]:
+    """
+    Parse the configs of many agents, grouping them by type and validating each group at once.
+    Identical configs within the page (e.g. defaults) are validated once and share the result.
+    """
+    parsed: List[AgentConfigUnion] = [BaseAgentConfig() for _ in db_agents]
+    # type -> canonical config JSON -> indices of the agents carrying that config
+    buckets: Dict[str, Dict[Any, List[int]]] = defaultdict(dict)
+    for idx, agent_model in enumerate(db_agents):
+        if agent_model.config: # Empty configs keep the BaseAgentConfig default
+            try:
+                config_key = orjson.dumps(agent_model.config, option=orjson.OPT_SORT_KEYS)
+            except TypeError: # Not JSON-serializable; validate it on its own
+                config_key = idx
+            buckets[agent_model.type.value].setdefault(config_key, []).append(idx)
+
+    for type_value, configs in buckets.items():
+        adapter = _CONFIG_LIST_ADAPTERS.get(type_value, _BASE_CONFIG_LIST_ADAPTER)
+        agent_type = type_value if type_value in _CONFIG_LIST_ADAPTERS else AgentTypeEnumSchema.BASE.value
+        groups = list(configs.values())
+        payload = [{'agent_type': agent_type, **db_agents[indices[0]].config} for indices in groups]
+        try:
+            results = adapter.validate_python(payload)
+        except PydanticValidationError:
+            # One bad row fails the whole batch; retry per item so only the bad rows fall back.
+            results = [_parse_stored_config(db_agents[indices[0]]) for indices in groups]
+        for indices, cfg in zip(groups, results):
+            for i in indices:
+                parsed[i] = cfg
+    return parsed
+
+
+def _etag(*parts) -> str:
+    """Weak ETag over the given version parts (timestamps, counts, query parameters)."""
+    return 'W/"%s"' % "-".join(
+        part.isoformat() if isinstance(part, datetime) else str(part) for part in parts
+    )
+
+
+def _not_modified(request: Request, etag: str) -> Optional[Response]:
+    """
+    A bare 304 when the client already holds the representation tagged etag, else None.
+    If-None-Match is a comma-separated list of tags (or "*"), compared weakly as GET requires.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return None
+    opaque_tag = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque_tag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return None
+
+
+def _parse_stored_config(agent_model) -> AgentConfigUnion:
+    """Parse one agent's stored config dict, falling back to BaseAgentConfig if it no longer validates."""
+    if not agent_model.config:
+        return BaseAgentConfig()
+    try:
+        return parse_agent_config(agent_model.type.value, agent_model.config)
+    except PydanticValidationError:
+        logger.warning("Config parsing failed for agent %s.", agent_model.name)
+        return BaseAgentConfig()
+
+
+def _build_agent_read(agent_model, parsed_config=None) -> AgentRead:
+    """
+    Build the AgentRead response for a models.Agent (or a crud.get_agents_lite row).
+    The row was validated when it was written, so its fields are copied with model_construct;
+    only the config is parsed, and not even that when the caller passes parsed_config.
+    """
+    if parsed_config is None:
+        parsed_config = _parse_stored_config(agent_model)
+    return AgentRead.model_construct(
+        id=agent_model.id,
+        name=agent_model.name,
+        type=AgentTypeEnumSchema(agent_model.type.value),
+        description=agent_model.description,
+        associatedStrategyIds=agent_model.associatedStrategyIds,
+        status=AgentStatusEnumSchema(agent_model.status.value),
+        tasksCompleted=agent_model.tasksCompleted,
+        errors=agent_model.errors,
+        isDefault=agent_model.isDefault,
+        config=parsed_config,
+    )
+
+
 @router.post("/", response_model=AgentRead, status_code=status.HTTP_201_CREATED)
-def create_new_agent(
+async def create_new_agent(
     *,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     agent_in: AgentCreate,
 ):
     try:
-        # CRUD should handle config parsing during creation if agent_in.config is a dict
-        agent = crud.create_agent(session=session, agent_in=agent_in)
-        
-        # crud.create_agent returns a models.Agent instance.
-        # For the response, we need AgentRead which expects a parsed config.
-        # The agent.config from DB is likely a dict.
-        parsed_config_for_response = BaseAgentConfig() # Default
-        if agent.config: # agent.config is Dict[str, Any] from models.Agent
-            try:
-                parsed_config_for_response = parse_agent_config(agent.type.value, agent.config)
-            except PydanticValidationError as e_parse:
-                # Log or handle parsing error for response, but agent is already created
-                print(f"Warning: Config parsing failed for response model of new agent {agent.name}: {e_parse}")
-        
-        agent_dict = agent.model_dump(exclude={'config'})
-        agent_dict['type'] = agent.type.value # Ensure enum value for response
-        return AgentRead(**agent_dict, config=parsed_config_for_response)
+        # crud.create_agent returns the models.Agent plus the config it already parsed and validated.
+        agent, parsed_config = await crud.create_agent(session=session, agent_in=agent_in)
+        return _build_agent_read(agent, parsed_config)
 
     except ValueError as e: # Catches errors from crud.create_agent (e.g., config validation)
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
     except Exception as e:
         # Log the full error for debugging
-        print(f"Unexpected error creating agent: {type(e).__name__} - {e}")
+        logger.exception("Unexpected error creating agent %s", agent_in.name)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"An unexpected error occurred: {str(e)}")
 
 
 @router.get("/", response_model=List[AgentRead])
-def read_all_agents(
+async def read_all_agents(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    session: Session = Depends(get_session),
+    after_id: Optional[int] = None,
+    session: AsyncSession = Depends(get_async_session),
 ):
-    db_agents = crud.get_agents(session=session, skip=skip, limit=limit)
-    agents_out = []
-    for agent_model in db_agents: # agent_model is models.Agent
-        parsed_config = BaseAgentConfig() # Default
-        if agent_model.config: # This is a dict from DB
-            try:
-                parsed_config = parse_agent_config(agent_model.type.value, agent_model.config)
-            except PydanticValidationError:
-                 # Fallback, log error
-                print(f"Warning: Config parsing failed for agent {agent_model.name} in list view.")
-        
-        agent_dict = agent_model.model_dump(exclude={'config'})
-        agent_dict['type'] = agent_model.type.value
-        agents_out.append(AgentRead(**agent_dict, config=parsed_config))
-    return agents_out
+    """
+    List agents ordered by ID. For deep pages, pass the X-Next-After-Id header value of the
+    previous page as after_id instead of using skip.
+    Responses carry an ETag; polling clients sending it back as If-None-Match get a 304
+    without the page being loaded or serialized while no agent has changed.
+    """
+    latest, count = await crud.get_agents_version(session=session)
+    etag = _etag(latest, count, skip, limit, after_id)
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+    response.headers["ETag"] = etag
+
+    # Column rows, not ORM instances: the list is read-only
+    db_agents = await crud.get_agents_lite(session=session, skip=skip, limit=limit, after_id=after_id)
+    if db_agents and len(db_agents) == limit:
+        response.headers["X-Next-After-Id"] = str(db_agents[-1].id)
+    parsed_configs = _parse_configs_bulk(db_agents)
+    return [
+        _build_agent_read(agent_row, parsed_config)
+        for agent_row, parsed_config in zip(db_agents, parsed_configs)
+    ]
 
 
 @router.get("/{agent_id}", response_model=AgentRead)
-def read_single_agent(
+async def read_single_agent(
     *,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     agent_id: int,
+    request: Request,
+    response: Response,
 ):
-    agent_model = crud.get_agent(session=session, agent_id=agent_id) # models.Agent
+    agent_model = await crud.get_agent(session=session, agent_id=agent_id) # models.Agent
     if not agent_model:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Agent not found")
-    
-    parsed_config = BaseAgentConfig()
-    if agent_model.config:
-        try:
-            parsed_config = parse_agent_config(agent_model.type.value, agent_model.config)
-        except PydanticValidationError:
-            print(f"Warning: Config parsing failed for agent {agent_model.name} in single view.")
 
-    agent_dict = agent_model.model_dump(exclude={'config'})
-    agent_dict['type'] = agent_model.type.value
-    return AgentRead(**agent_dict, config=parsed_config)
+    # The row is needed for its updatedAt anyway; a match still skips config parsing and serialization
+    etag = _etag(agent_model.id, agent_model.updatedAt)
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+    response.headers["ETag"] = etag
+    return _build_agent_read(agent_model)
 
 
 @router.patch("/{agent_id}", response_model=AgentRead)
-def update_existing_agent(
+async def update_existing_agent(
     *,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     agent_id: int,
     agent_in: AgentUpdate, # agent_in.config is Optional[Dict[str, Any]]
 ):
     try:
         # crud.update_agent will handle parsing/validation of agent_in.config if provided
-        updated_agent_model = crud.update_agent(session=session, agent_id=agent_id, agent_in=agent_in) # models.Agent
+        result = await crud.update_agent(session=session, agent_id=agent_id, agent_in=agent_in) # (models.Agent, parsed config or None)
     except ValueError as e: # Catches errors from crud.update_agent (e.g., config validation)
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
     
-    if not updated_agent_model:
+    if not result:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Agent not found")
     
-    parsed_config_for_response = BaseAgentConfig()
-    if updated_agent_model.config: # This is a dict from DB after update
-        try:
-            parsed_config_for_response = parse_agent_config(updated_agent_model.type.value, updated_agent_model.config)
-        except PydanticValidationError:
-             print(f"Warning: Config parsing failed for response model of updated agent {updated_agent_model.name}.")
-    
-    agent_dict = updated_agent_model.model_dump(exclude={'config'})
-    agent_dict['type'] = updated_agent_model.type.value
-    return AgentRead(**agent_dict, config=parsed_config_for_response)
+    updated_agent_model, parsed_config = result
+    # The config is only re-parsed when it was not part of this update.
+    return _build_agent_read(updated_agent_model, parsed_config)
 
 
 @router.delete("/{agent_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_existing_agent(
+async def delete_existing_agent(
     *,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     agent_id: int,
 ):
-    agent = crud.get_agent(session=session, agent_id=agent_id)
-    if not agent:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Agent not found")
-    if agent.isDefault:
+    deleted_id = await crud.delete_agent_if_not_default(session=session, agent_id=agent_id)
+    if deleted_id is None:
+        # Only the failure path needs a second query, to tell a missing agent from a default one
+        if not await crud.get_agent(session=session, agent_id=agent_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Agent not found")
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Default agents cannot be deleted.")
-        
-    deleted = crud.delete_agent(session=session, agent_id=agent_id) # crud.delete_agent handles isDefault check too
-    if not deleted:
-        # This might occur if delete_agent returns False due to isDefault or other reasons
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Agent not found or deletion failed (e.g., default agent).")
     return None
 
 
 # --- Agent Task Execution Endpoints ---
 
+def _get_agent_instance(agent_id: int, session: Session):
+    """
+    The (cached) PydanticAIAgent for an agent, reused across task requests.
+    SimplifiedAgent is not used: it only returns mock output and cannot build a Strategy Coding Agent.
+    """
+    return PydanticAIAgent.get_cached_agent_instance(agent_id=agent_id, session=session)
+
+
+@contextmanager
+def _agent_task_errors(description: str, *args):
+    """
+    Turn the errors raised while building an agent or running its task into HTTP errors:
+    404 for a missing agent or bad config, 501 for an unimplemented type, 503 for an unusable LLM.
+    Anything else is logged ("Unexpected error " + description, with args) and returned as a 500.
+    """
+    try:
+        yield
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except NotImplementedError as e:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(e))
+    except ConnectionError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    except Exception as e:
+        logger.exception("Unexpected error " + description, *args)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"An unexpected error occurred: {str(e)}")
+
+
+def _get_strategy_agent(agent_id: int, session: Session):
+    """
+    The (cached) Strategy Coding Agent behind every strategy endpoint, so single, streamed and batch
+    generations all run the same implementation. Raises a 400 for an agent of any other type.
+    """
+    agent_instance = _get_agent_instance(agent_id, session)
+    if agent_instance.agent_model.type != AgentTypeEnum.STRATEGY_CODING:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Agent is not a Strategy Coding Agent or type mismatch.")
+    return agent_instance
+
+
 @router.post("/{agent_id}/run-generate-strategy", response_model=AgentTaskOutput) # Keep AgentTaskOutput as generic base for now
 async def run_generate_strategy_task(
     agent_id: int,
@@ -160,102 +288,136 @@ async def run_generate_strategy_task(
     """
     Execute the 'generate strategy' task for a Strategy Coding Agent using pydantic-ai.
     """
-    try:
-        # PydanticAIAgent.get_agent_instance returns a specific agent instance like StrategyCodingAIAgent
-        # Try to use the simplified agent first
-        try:
-            agent_instance = SimplifiedAgent.get_agent_instance(agent_id=agent_id, session=session)
-        except (ImportError, NotImplementedError):
-            # Fall back to PydanticAIAgent if simplified version fails
-            agent_instance = PydanticAIAgent.get_agent_instance(agent_id=agent_id, session=session)
-        
-        if agent_instance.agent_model.type != AgentTypeEnum.STRATEGY_CODING:
-             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Agent is not a Strategy Coding Agent or type mismatch.")
+    with _agent_task_errors("running agent task for agent %s", agent_id):
+        # Returns a specific agent instance like StrategyCodingAIAgent
+        agent_instance = _get_strategy_agent(agent_id, session)
         
         # agent_instance is now the specific agent type, e.g., StrategyCodingAIAgent
         # Its `run` method expects `GenerateStrategyInput` if it's a StrategyCodingAIAgent.
         # FastAPI handles request body validation against `GenerateStrategyInput`.
         result = await agent_instance.run(task_input, session=session) # Pass task_input directly
         return result
-    except ValueError as e: # Catches agent not found, config errors from factory/constructor
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
-    except NotImplementedError as e: # Catches agent type not having implementation or LLM client issues
-        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(e))
-    except ConnectionError as e: # Specific error for LLM client issues
-        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
-    except Exception as e:
-        print(f"Unexpected error running agent task for agent {agent_id}: {type(e).__name__} - {e}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"An unexpected error occurred: {str(e)}")
 
 
-class GenericTaskInputWrapper(BaseModel):
-    task_specific_input: Dict[str, Any] = Field(description="The actual input data for the agent's task.")
+@router.post("/{agent_id}/run-generate-strategy/stream")
+async def run_generate_strategy_task_streaming(
+    agent_id: int,
+    task_input: GenerateStrategyInput,
+    session: Session = Depends(get_session),
+):
+    """
+    Like /run-generate-strategy, but streams NDJSON: the generated code as it arrives
+    ({"event": "code", "delta": ...}), then the task output ({"event": "result", "data": ...}).
+    """
+    with _agent_task_errors("preparing streamed generation for agent %s", agent_id):
+        agent_instance = _get_strategy_agent(agent_id, session)
+
+    async def stream():
+        # The body is sent after the request dependencies may have been torn down, so it gets its own session
+        with Session(engine) as stream_session:
+            async for line in agent_instance.run_streaming(task_input, session=stream_session):
+                yield line
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@router.post("/{agent_id}/generate_batch", response_model=List[GenerateStrategyOutput])
+async def run_generate_strategy_batch(
+    agent_id: int,
+    task_inputs: List[GenerateStrategyInput] = Body(..., min_length=1),
+    session: Session = Depends(get_session),
+):
+    """
+    Generate several strategies with one Strategy Coding Agent.
+    The LLM calls run concurrently and the agent stats are updated once for the whole batch.
+    """
+    with _agent_task_errors("running batch generation for agent %s", agent_id):
+        agent_instance = _get_strategy_agent(agent_id, session)
+        return await agent_instance.run_batch(task_inputs, session=session)
+
+
+@router.post("/{agent_id}/generate_batch/submit", response_model=GenerateStrategyOutput)
+async def submit_generate_strategy_batch(
+    agent_id: int,
+    task_inputs: List[GenerateStrategyInput] = Body(..., min_length=1),
+    session: Session = Depends(get_session),
+):
+    """
+    Submit several strategy generations to the provider's Batch API (useBatchApi, OpenAI only).
+    One 'Pending-Batch' strategy is created per input; poll /generate_batch/{batch_id}/collect for the results.
+    """
+    with _agent_task_errors("submitting batch generation for agent %s", agent_id):
+        agent_instance = _get_strategy_agent(agent_id, session)
+        return await agent_instance.submit_batch(task_inputs, session=session)
+
+
+@router.post("/{agent_id}/generate_batch/{batch_id}/collect", response_model=List[GenerateStrategyOutput])
+async def collect_generate_strategy_batch(
+    agent_id: int,
+    batch_id: str,
+    session: Session = Depends(get_session),
+):
+    """
+    Store the results of a batch submitted with /generate_batch/submit into its pending strategies.
+    Returns an empty list while the batch is still running.
+    """
+    with _agent_task_errors("collecting batch %s for agent %s", batch_id, agent_id):
+        agent_instance = _get_strategy_agent(agent_id, session)
+        return await agent_instance.collect_batch(batch_id, session=session)
+
 
 @router.post("/{agent_id}/run-task", response_model=AgentTaskOutput, deprecated=True)
 async def run_generic_agent_task( # Renamed to avoid conflict
     agent_id: int,
-    task_input_payload: GenericTaskInputWrapper = Body(...),
+    # Embedded so the body keeps its {"task_specific_input": {...}} shape without a wrapper model
+    task_specific_input: Dict[str, Any] = Body(..., embed=True, description="The actual input data for the agent's task."),
     session: Session = Depends(get_session),
 ):
     """
     DEPRECATED: Execute a generic task. Use specific task endpoints like /run-generate-strategy.
     """
-    try:
-        # Try to use the simplified agent first
-        try:
-            agent_instance = SimplifiedAgent.get_agent_instance(agent_id=agent_id, session=session)
-        except (ImportError, NotImplementedError):
-            # Fall back to PydanticAIAgent if simplified version fails
-            agent_instance = PydanticAIAgent.get_agent_instance(agent_id=agent_id, session=session)
+    with _agent_task_errors("running generic agent task for agent %s", agent_id):
+        agent_instance = _get_agent_instance(agent_id, session)
         
         # Validate and parse task_specific_input against the agent's specific input_schema
         try:
-            concrete_task_input = agent_instance.input_schema(**task_input_payload.task_specific_input)
+            # Validated once, against the model's own cached validator, straight from the parsed body
+            concrete_task_input = agent_instance.input_schema.model_validate(task_specific_input)
         except PydanticValidationError as e_val:
             raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Invalid task input: {e_val.errors()}")
             
         result = await agent_instance.run(concrete_task_input, session=session)
         return result
-    except ValueError as e:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
-    except NotImplementedError as e:
-        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(e))
-    except ConnectionError as e:
-        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
-    except Exception as e:
-        print(f"Unexpected error running generic agent task for agent {agent_id}: {type(e).__name__} - {e}")
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"An unexpected error occurred: {str(e)}")
+
+
+@router.post("/bulk-status", response_model=List[AgentRead])
+async def set_agents_status_bulk(
+    status_updates: List[AgentBulkStatusItem],
+    session: AsyncSession = Depends(get_async_session)
+):
+    """Set the status of several agents with one UPDATE; unknown IDs are skipped in the response."""
+    status_map = {item.id: AgentStatusEnum(item.status.value) for item in status_updates}
+    db_agents = await crud.bulk_set_status(session=session, status_map=status_map)
+    parsed_configs = _parse_configs_bulk(db_agents)
+    return [
+        _build_agent_read(agent_model, parsed_config)
+        for agent_model, parsed_config in zip(db_agents, parsed_configs)
+    ]
 
 
 @router.post("/{agent_id}/set-status", response_model=AgentRead)
-def set_agent_status_endpoint(
+async def set_agent_status_endpoint(
     agent_id: int,
     status_in: AgentStatusUpdate,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
-    db_agent_model = crud.get_agent(session=session, agent_id=agent_id)
-    if not db_agent_model:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Agent not found")
-
     try:
         new_status_enum = AgentStatusEnum(status_in.status.value) # status_in.status is AgentStatusEnumSchema
     except ValueError:
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Invalid status value provided.")
 
-    db_agent_model.status = new_status_enum
-    session.add(db_agent_model)
-    session.commit()
-    session.refresh(db_agent_model)
-    
-    parsed_config_for_response = BaseAgentConfig()
-    if db_agent_model.config:
-        try:
-            parsed_config_for_response = parse_agent_config(db_agent_model.type.value, db_agent_model.config)
-        except PydanticValidationError:
-            print(f"Warning: Config parsing failed for response after status update for agent {db_agent_model.name}.")
+    updated = await crud.bulk_set_status(session=session, status_map={agent_id: new_status_enum})
+    if not updated:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Agent not found")
 
-    agent_dict = db_agent_model.model_dump(exclude={'config'})
-    agent_dict['type'] = db_agent_model.type.value
-    return AgentRead(**agent_dict, config=parsed_config_for_response)
+    return _build_agent_read(updated[0])
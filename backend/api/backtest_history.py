@@ -2,62 +2,49 @@
 API endpoints for managing backtest history.
 """
 from fastapi import APIRouter, HTTPException, Depends, Query
-from sqlmodel import Session
+from fastapi.responses import ORJSONResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List, Optional
-import json
 
-from backend.database import get_session
-from backend.models.backtest import BacktestResult
+from backend.database import get_async_session
 from backend.crud_backtest import (
     get_backtest_result,
-    get_backtest_results_by_strategy,
+    get_backtest_result_summaries,
     delete_backtest_result,
     delete_old_backtest_results,
-    update_backtest_result_analysis
+    update_backtest_result_analysis,
+    create_backtest_result,
+    get_backtest_result_locked,
+    set_backtest_result_locked
 )
 
 router = APIRouter(
     prefix="/backtest-history",
     tags=["backtest-history"],
     responses={404: {"description": "Not found"}},
-)
-
-# Import the create_backtest_result function
-from backend.crud_backtest import (
-    get_backtest_result,
-    get_backtest_results_by_strategy,
-    delete_backtest_result,
-    delete_old_backtest_results,
-    update_backtest_result_analysis,
-    create_backtest_result
+    # Results carry long equity_curve/trades lists of floats; orjson encodes them (and datetimes) natively
+    default_response_class=ORJSONResponse,
 )
 
 @router.get("/", response_model=List[dict])
 async def list_backtest_results(
     strategy_id: Optional[str] = None,
     limit: int = Query(10, ge=1, le=100),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """
     List backtest results, optionally filtered by strategy ID.
     """
-    if strategy_id:
-        results = get_backtest_results_by_strategy(session, strategy_id, limit)
-    else:
-        # Get all results, limited by the limit parameter
-        from sqlmodel import select
-        statement = select(BacktestResult).order_by(BacktestResult.timestamp.desc()).limit(limit)
-        results = session.exec(statement).all()
-    
-    # Convert SQLModel objects to dictionaries
+    # Summary columns only; the full curves and trades are served by GET /{backtest_id}
+    results = await get_backtest_result_summaries(session, strategy_id or None, limit)
     return [
         {
             "id": result.id,
             "strategy_id": result.strategy_id,
-            "timestamp": result.timestamp.isoformat(),
+            "timestamp": result.timestamp,
             "parameters": result.parameters,
             "summary_metrics": result.summary_metrics,
-            "has_ai_analysis": result.ai_analysis is not None,
+            "has_ai_analysis": result.has_ai_analysis,
             "locked": result.locked
         }
         for result in results
@@ -66,19 +53,19 @@ async def list_backtest_results(
 @router.get("/{backtest_id}", response_model=dict)
 async def get_backtest_result_by_id(
     backtest_id: int,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """
     Get a specific backtest result by ID.
     """
-    result = get_backtest_result(session, backtest_id)
+    result = await get_backtest_result(session, backtest_id)
     if not result:
         raise HTTPException(status_code=404, detail=f"Backtest result with ID {backtest_id} not found")
     
     return {
         "id": result.id,
         "strategy_id": result.strategy_id,
-        "timestamp": result.timestamp.isoformat(),
+        "timestamp": result.timestamp,
         "parameters": result.parameters,
         "summary_metrics": result.summary_metrics,
         "equity_curve": result.equity_curve,
@@ -91,37 +78,31 @@ async def get_backtest_result_by_id(
 @router.delete("/{backtest_id}", response_model=dict)
 async def delete_backtest_result_by_id(
     backtest_id: int,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """
     Delete a specific backtest result by ID.
     Returns 403 if the backtest is locked.
     """
-    # First check if the backtest exists and if it's locked
-    result = get_backtest_result(session, backtest_id)
-    if not result:
-        raise HTTPException(status_code=404, detail=f"Backtest result with ID {backtest_id} not found")
-    
-    if result.locked:
+    # Deletes only unlocked results, in one statement
+    if not await delete_backtest_result(session, backtest_id):
+        # Only the failure path needs a second query, to tell a missing result from a locked one
+        if await get_backtest_result_locked(session, backtest_id) is None:
+            raise HTTPException(status_code=404, detail=f"Backtest result with ID {backtest_id} not found")
         raise HTTPException(status_code=403, detail=f"Backtest result with ID {backtest_id} is locked and cannot be deleted")
     
-    # Now delete the backtest
-    success = delete_backtest_result(session, backtest_id)
-    if not success:
-        raise HTTPException(status_code=500, detail=f"Failed to delete backtest result with ID {backtest_id}")
-    
     return {"message": f"Backtest result with ID {backtest_id} deleted successfully"}
 
 @router.delete("/strategy/{strategy_id}", response_model=dict)
 async def delete_old_results_for_strategy(
     strategy_id: str,
     keep_count: int = Query(5, ge=1, le=100),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """
     Delete old backtest results for a strategy, keeping only the most recent ones.
     """
-    deleted_count = delete_old_backtest_results(session, strategy_id, keep_count)
+    deleted_count = await delete_old_backtest_results(session, strategy_id, keep_count)
     
     return {
         "message": f"Deleted {deleted_count} old backtest results for strategy {strategy_id}",
@@ -131,13 +112,13 @@ async def delete_old_results_for_strategy(
 @router.post("/{backtest_id}/analyze", response_model=dict)
 async def generate_ai_analysis(
     backtest_id: int,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """
     Generate AI analysis for a backtest result.
     """
     # Get the backtest result
-    result = get_backtest_result(session, backtest_id)
+    result = await get_backtest_result(session, backtest_id)
     if not result:
         raise HTTPException(status_code=404, detail=f"Backtest result with ID {backtest_id} not found")
     
@@ -161,7 +142,7 @@ async def generate_ai_analysis(
         analysis = analyze_backtest_results(analysis_input)
         
         # Update the backtest result with the analysis
-        success = update_backtest_result_analysis(session, backtest_id, analysis)
+        success = await update_backtest_result_analysis(session, backtest_id, analysis)
         if not success:
             raise HTTPException(status_code=500, detail="Failed to update backtest result with analysis")
         
@@ -172,13 +153,13 @@ async def generate_ai_analysis(
 @router.get("/{backtest_id}/pdf", response_model=dict)
 async def generate_pdf_report(
     backtest_id: int,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """
     Generate a PDF report for a backtest result.
     """
     # Get the backtest result
-    result = get_backtest_result(session, backtest_id)
+    result = await get_backtest_result(session, backtest_id)
     if not result:
         raise HTTPException(status_code=404, detail=f"Backtest result with ID {backtest_id} not found")
     
@@ -192,7 +173,7 @@ async def generate_pdf_report(
 @router.post("/", response_model=dict)
 async def save_backtest_result(
     backtest_data: dict,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """
     Save a backtest result to the database.
@@ -211,7 +192,7 @@ async def save_backtest_result(
             raise HTTPException(status_code=400, detail="strategy_id is required")
         
         # Create the backtest result
-        result = create_backtest_result(
+        result = await create_backtest_result(
             session=session,
             strategy_id=strategy_id,
             parameters=parameters,
@@ -225,7 +206,7 @@ async def save_backtest_result(
         return {
             "id": result.id,
             "strategy_id": result.strategy_id,
-            "timestamp": result.timestamp.isoformat(),
+            "timestamp": result.timestamp,
             "parameters": result.parameters,
             "summary_metrics": result.summary_metrics,
             "has_ai_analysis": result.ai_analysis is not None
@@ -237,30 +218,26 @@ async def save_backtest_result(
 async def update_backtest_lock_status(
     backtest_id: int,
     lock_data: dict,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """
     Update the lock status of a backtest result.
     """
     try:
-        # Get the backtest result
-        result = get_backtest_result(session, backtest_id)
-        if not result:
-            raise HTTPException(status_code=404, detail=f"Backtest result with ID {backtest_id} not found")
-        
-        # Update the lock status
         locked = lock_data.get("locked", False)
         
-        # Update the locked field in the database
-        result.locked = locked
-        session.add(result)
-        session.commit()
+        # Update the locked field and read back the response fields in one statement
+        result = await set_backtest_result_locked(session, backtest_id, locked)
+        if not result:
+            raise HTTPException(status_code=404, detail=f"Backtest result with ID {backtest_id} not found")
         
         return {
             "id": result.id,
             "strategy_id": result.strategy_id,
-            "timestamp": result.timestamp.isoformat(),
+            "timestamp": result.timestamp,
             "locked": result.locked
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update lock status: {str(e)}")
\ No newline at end of file
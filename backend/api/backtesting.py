@@ -15,9 +15,10 @@ from importlib import import_module
 import glob
 import threading
 
-from backend.database import get_session, engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from backend.database import get_session, get_async_session, async_session_maker, engine
 from backend import crud
-from backend.models import dataset
+from backend.models import dataset, Strategy
 from backend.crud_datasets import search_datasets
 def validate_dataset_file(dataset_record, session=None):
     """
@@ -255,6 +256,16 @@ async def run_backtest(
     """
     Queue a new backtest job.
     """
+    return await queue_backtest(request, session, timeout)
+
+async def queue_backtest(request: BacktestRequest, session: Session, timeout: int = 300) -> BacktestJobResponse:
+    """
+    Validate a backtest request and queue the job.
+    Called directly by in-process callers (e.g. the Strategy Coding Agent) to skip the HTTP round trip.
+    
+    Raises:
+        HTTPException: If the strategy or a usable dataset is not found
+    """
     try:
         # Handle both file-based strategies (strat-name_of_strategy) and database strategies (strat-123)
         strategy_id_match = request.strategy_id.split("-")
@@ -382,7 +393,7 @@ async def get_backtest_job_status(job_id: str):
     return response
 
 @router.get("/results/{strategy_id}")
-async def get_backtest_results(strategy_id: str, session: Session = Depends(get_session)):
+async def get_backtest_results(strategy_id: str, session: AsyncSession = Depends(get_async_session)):
     """
     Get the results of the most recent backtest for a strategy.
     """
@@ -391,7 +402,7 @@ async def get_backtest_results(strategy_id: str, session: Session = Depends(get_
     # First, check if we have stored results in the database
     # For file-based strategies, we need to use the strategy ID as is
     db_strategy_id = strategy_id
-    stored_result = get_latest_backtest_result(session, db_strategy_id)
+    stored_result = await get_latest_backtest_result(session, db_strategy_id)
     if stored_result:
         # Return the stored results
         return {
@@ -427,7 +438,7 @@ async def get_backtest_results(strategy_id: str, session: Session = Depends(get_
         numeric_id = int(strategy_identifier)
         
         # Check if strategy exists in database
-        strategy = crud.get_strategy(session=session, strategy_id=numeric_id)
+        strategy = await session.get(Strategy, numeric_id)
         if not strategy:
             raise HTTPException(status_code=404, detail=f"Strategy with ID {strategy_id} not found")
     
@@ -479,6 +490,26 @@ async def get_backtest_results(strategy_id: str, session: Session = Depends(get_
         )
 
 # Helper functions for real backtest execution
+def load_strategy_class(strategy_name: str):
+    """
+    Import backend.strategies.<strategy_name> and return its strategy class.
+    The class is named after the module in CamelCase, with or without a "Strategy" suffix; generated
+    strategies live in subpackages (e.g. "generated.shard_3f.s42.my_strategy") but keep that naming.
+    """
+    module_name = strategy_name.rsplit(".", 1)[-1]
+    try:
+        strategy_module = import_module(f"backend.strategies.{strategy_name}")
+        # First try with Strategy suffix (common convention)
+        strategy_class_name = ''.join(word.capitalize() for word in module_name.split('_')) + 'Strategy'
+        try:
+            return getattr(strategy_module, strategy_class_name)
+        except AttributeError:
+            # If not found, try without Strategy suffix
+            strategy_class_name = ''.join(word.capitalize() for word in module_name.split('_'))
+            return getattr(strategy_module, strategy_class_name)
+    except (ImportError, AttributeError) as e:
+        raise Exception(f"Failed to import strategy {strategy_name}: {str(e)}")
+
 async def simulate_backtest_execution(job_id: str, timeout: int = 300):
     """
     Execute a backtest job.
@@ -516,21 +547,7 @@ async def simulate_backtest_execution(job_id: str, timeout: int = 300):
             strategy_name = strategy_id.split("-")[1]
         else:
             strategy_name = strategy_id
-        
-        # Import the strategy module
-        try:
-            strategy_module = import_module(f"backend.strategies.{strategy_name}")
-            # Get the strategy class
-            # First try with Strategy suffix (common convention)
-            strategy_class_name = ''.join(word.capitalize() for word in strategy_name.split('_')) + 'Strategy'
-            try:
-                strategy_class = getattr(strategy_module, strategy_class_name)
-            except AttributeError:
-                # If not found, try without Strategy suffix
-                strategy_class_name = ''.join(word.capitalize() for word in strategy_name.split('_'))
-                strategy_class = getattr(strategy_module, strategy_class_name)
-        except (ImportError, AttributeError) as e:
-            raise Exception(f"Failed to import strategy {strategy_name}: {str(e)}")
+        strategy_class = load_strategy_class(strategy_name)
         
         # Load dataset based on symbol and timeframe
         symbol = parameters["symbol"]
@@ -1065,8 +1082,8 @@ async def simulate_backtest_execution(job_id: str, timeout: int = 300):
             }
             
             # Store the results in the database
-            with Session(engine) as db_session:
-                create_backtest_result(
+            async with async_session_maker() as db_session:
+                await create_backtest_result(
                     session=db_session,
                     strategy_id=strategy_id,
                     parameters=parameters,
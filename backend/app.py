@@ -3,9 +3,13 @@ Simple FastAPI application for AlgoAce Trader.
 This file is designed to be run directly with uvicorn.
 """
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
 import asyncio
+import logging
+import queue
 # Import scheduler function
 try:
     # When running as a module from project root
@@ -14,11 +18,28 @@ except ImportError:
     # When running directly from backend directory
     from scheduler import run_scheduler_on_startup
 
+def start_queue_logging() -> QueueListener:
+    """
+    Route root-logger records through a queue so the configured handlers write
+    from a background thread instead of the request path.
+    """
+    root = logging.getLogger()
+    handlers = root.handlers[:] or [logging.StreamHandler()]
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    log_queue = queue.SimpleQueue()
+    root.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
 # Define lifespan context manager for startup/shutdown events
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # --- Startup ---
     print("FastAPI application starting up...")
+    log_listener = start_queue_logging()
+
     # In a real application, we would initialize the database here
     # For now, we'll just print a message
     # Create database tables
@@ -47,6 +68,25 @@ async def lifespan(app: FastAPI):
 
     # --- Shutdown ---
     print("FastAPI application shutting down...")
+    # Close the HTTP client shared by agent runs
+    try:
+        try:
+            from backend.ai_agents.base_agent import close_http_client
+        except ImportError:
+            from ai_agents.base_agent import close_http_client
+        await close_http_client()
+    except Exception as e:
+        print(f"Error closing agent HTTP client: {e}")
+    # Stop the worker processes that validate batch-generated strategy code
+    try:
+        try:
+            from backend.ai_agents.strategy_coding_agent import shutdown_validation_pool
+        except ImportError:
+            from ai_agents.strategy_coding_agent import shutdown_validation_pool
+        shutdown_validation_pool()
+    except Exception as e:
+        print(f"Error stopping strategy validation workers: {e}")
+    log_listener.stop() # Flushes queued records
 
 # Create the FastAPI app instance with the lifespan manager
 app = FastAPI(
@@ -54,6 +94,8 @@ app = FastAPI(
     description="Backend API for the multi-agent hedge fund trading platform.",
     version="0.1.0",
     lifespan=lifespan,
+    # Render JSON responses with orjson instead of the stdlib encoder
+    default_response_class=ORJSONResponse,
 )
 
 # --- CORS Middleware ---
@@ -71,6 +113,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"], # Allows all methods (GET, POST, PUT, DELETE, etc.)
     allow_headers=["*"], # Allows all headers
+    expose_headers=["X-Next-After-Id", "ETag"], # Pagination cursor and cache validator of GET /agents/
 )
 
 # --- Include Routers ---
@@ -628,5 +671,23 @@ async def get_broker_assets(broker_id: str):
 # Use the command: uvicorn backend.app:app --reload --host 0.0.0.0 --port 8000
 # The command is typically run from the project root directory.
 if __name__ == "__main__":
+    import importlib.util
+    import os
     import uvicorn
-    uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    # Agent runs are I/O bound (LLM, HTTP, DB); uvloop's libuv event loop lowers per-await overhead
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    # httptools (C parser) instead of the pure-Python h11; both come with uvicorn[standard]
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    # WEB_CONCURRENCY > 1 runs that many worker processes, each with its own DB pools (see .env.example).
+    # Auto-reload only works with a single process, so it is on for development runs only.
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    uvicorn.run(
+        "app:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        reload=workers == 1,
+        workers=workers,
+        loop=loop,
+        http=http,
+        backlog=4096,
+    )
\ No newline at end of file
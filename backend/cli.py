@@ -13,6 +13,11 @@ import json
 
 from sqlmodel import Session, select
 
+try:
+    import uvloop
+except ImportError:  # uvloop is POSIX-only; fall back to the default asyncio loop
+    uvloop = None
+
 from backend import models
 from backend.database import engine, get_session
 from backend.config_loader import load_config, get_agent_config, get_broker_config
@@ -55,6 +60,12 @@ class BacktestEngine(str, Enum):
     INTERNAL = "internal_mock"
 
 # Helper functions
+def run_async(coro):
+    """Run a coroutine to completion, on uvloop when it is available."""
+    if uvloop is not None and sys.platform != "win32":
+        return uvloop.run(coro)
+    return asyncio.run(coro)
+
 def get_agent_by_name_or_id(session: Session, name_or_id: str) -> Optional[models.Agent]:
     """Get agent by name or ID."""
     try:
@@ -247,8 +258,8 @@ def run_agent(
         # Run the agent
         typer.echo(f"Running agent {agent.name}...")
         
-        # Use asyncio to run the async method
-        result = asyncio.run(agent_instance.run(task_input=task_input, session=session))
+        # Use asyncio (on uvloop where available) to run the async method
+        result = run_async(agent_instance.run(task_input=task_input, session=session))
         
         # Print result
         typer.echo(f"Agent run completed: {result.success}")
@@ -1,9 +1,8 @@
-from typing import List, Optional, Type, Union
-from sqlmodel import Session, select
-from pydantic import ValidationError, BaseModel as PydanticBaseModel # Import for catching validation errors
-
-from typing import List, Optional, Type, Union
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Type, Union
 from sqlmodel import Session, select
+from sqlalchemy import Row, update, delete, case, literal, func
+from sqlmodel.ext.asyncio.session import AsyncSession
 from pydantic import ValidationError, BaseModel as PydanticBaseModel # Import for catching validation errors
 
 # Import specific models and enums from backend.models
@@ -28,6 +27,16 @@ def create_strategy(*, session: Session, strategy_in: StrategyCreate) -> Strateg
     session.refresh(db_strategy)
     return db_strategy
 
+def create_strategies(*, session: Session, strategies_in: List[StrategyCreate]) -> List[Strategy]:
+    """
+    Creates several strategy records with a single commit.
+    Use a session with expire_on_commit=False to read the returned objects without reloading each row.
+    """
+    db_strategies = [Strategy.model_validate(strategy_in) for strategy_in in strategies_in]
+    session.add_all(db_strategies)
+    session.commit()
+    return db_strategies
+
 def get_strategy(*, session: Session, strategy_id: int) -> Optional[Strategy]:
     """Gets a single strategy by its ID."""
     statement = select(Strategy).where(Strategy.id == strategy_id)
@@ -85,14 +94,20 @@ def get_strategies_by_schedule(*, session: Session, schedule_type: Optional[str]
     strategies = session.exec(statement).all()
     return strategies
 
+def get_strategies_by_status(*, session: Session, status: str) -> List[Strategy]:
+    """Gets all strategies with the given status (e.g. 'Pending-Batch')."""
+    statement = select(Strategy).where(Strategy.status == status)
+    return session.exec(statement).all()
+
 
 # === Agent CRUD ===
 
-def create_agent(*, session: Session, agent_in: AgentCreate) -> Agent:
+async def create_agent(*, session: AsyncSession, agent_in: AgentCreate) -> Tuple[Agent, AgentConfigUnion]:
     """
     Creates a new agent record in the database.
     The agent_in.config (Optional[Dict[str, Any]]) is parsed into a specific Pydantic config model.
     The .model_dump() of this parsed config is stored in the DB as JSON.
+    Returns the agent together with the typed config, so callers don't need to parse it again.
     """
     try:
         # agent_in.type is AgentTypeEnumSchema. Use its .value (string) for parsing.
@@ -126,41 +141,72 @@ def create_agent(*, session: Session, agent_in: AgentCreate) -> Agent:
     db_agent = Agent.model_validate(db_agent_data)
 
     session.add(db_agent)
-    session.commit()
-    session.refresh(db_agent)
-    return db_agent
+    await session.commit()
+    await session.refresh(db_agent)
+    return db_agent, parsed_config_obj
 
 
-def get_agent(*, session: Session, agent_id: int) -> Optional[Agent]:
+async def get_agent(*, session: AsyncSession, agent_id: int) -> Optional[Agent]:
     """
     Gets a single agent by its ID. The agent's `config` field will be a dict (from JSON).
     The caller (e.g., API layer) is responsible for parsing this dict into a Pydantic model if needed.
+    Uses the primary-key lookup, which returns an agent already loaded in this session without a query.
     """
-    statement = select(Agent).where(Agent.id == agent_id)
-    agent = session.exec(statement).first()
-    return agent
+    return await session.get(Agent, agent_id)
 
-def get_agents(*, session: Session, skip: int = 0, limit: int = 100) -> List[Agent]:
+async def get_agents_version(*, session: AsyncSession) -> Tuple[Optional[datetime], int]:
     """
-    Gets a list of agents. Each agent's `config` field will be a dict.
+    Returns (latest updatedAt, row count) of the agent table in one query.
+    The max is read from the updatedAt index; the count still scans the table, which is cheap for
+    the agent table's size. Any insert or update moves the timestamp and any delete moves the count,
+    so the pair changes whenever a list response could.
     """
-    statement = select(Agent).offset(skip).limit(limit)
-    agents = session.exec(statement).all()
-    return agents
+    statement = select(func.max(Agent.updatedAt), func.count(Agent.id))
+    latest, count = (await session.exec(statement)).one()
+    return latest, count
 
 
-def update_agent(*, session: Session, agent_id: int, agent_in: AgentUpdate) -> Optional[Agent]:
+# The columns AgentRead is built from, so list views can skip loading ORM instances
+_AGENT_READ_COLUMNS = (
+    Agent.id, Agent.name, Agent.type, Agent.status, Agent.description,
+    Agent.tasksCompleted, Agent.errors, Agent.isDefault, Agent.config, Agent.associatedStrategyIds,
+)
+
+
+async def get_agents_lite(
+    *, session: AsyncSession, skip: int = 0, limit: int = 100, after_id: Optional[int] = None
+) -> List[Row]:
+    """
+    Gets a page of agents ordered by ID, as plain rows of only the columns AgentRead needs.
+    Rows skip the identity map and change tracking; the API builds each AgentRead from a row
+    with model_construct. Use get_agent when you need to modify an agent.
+    Pass after_id (the last ID of the previous page) for keyset pagination, which seeks on the
+    primary key instead of scanning and discarding `skip` rows.
+    """
+    statement = select(*_AGENT_READ_COLUMNS).order_by(Agent.id)
+    if after_id is not None:
+        statement = statement.where(Agent.id > after_id)
+    if skip:
+        statement = statement.offset(skip)
+    return (await session.exec(statement.limit(limit))).all()
+
+
+async def update_agent(
+    *, session: AsyncSession, agent_id: int, agent_in: AgentUpdate
+) -> Optional[Tuple[Agent, Optional[AgentConfigUnion]]]:
     """
     Updates an existing agent.
     If agent_in.config is provided, it's a Dict[str, Any]. This dict is parsed into the
     specific Pydantic config model for the agent's type, and then its .model_dump()
     is stored in the DB.
+    Returns the agent and the typed config (None when the config was not part of the update).
     """
-    db_agent = get_agent(session=session, agent_id=agent_id)
+    db_agent = await get_agent(session=session, agent_id=agent_id)
     if not db_agent:
         return None
 
     update_data = agent_in.model_dump(exclude_unset=True) # Get only fields that were provided
+    parsed_config_update_obj = None
 
     # If 'config' is part of the update, it needs to be parsed and validated
     if 'config' in update_data and update_data['config'] is not None:
@@ -190,22 +236,54 @@ def update_agent(*, session: Session, agent_id: int, agent_in: AgentUpdate) -> O
         setattr(db_agent, key, value)
 
     session.add(db_agent)
-    session.commit()
-    session.refresh(db_agent)
-    return db_agent
-
+    await session.commit()
+    await session.refresh(db_agent)
+    return db_agent, parsed_config_update_obj
 
-def delete_agent(*, session: Session, agent_id: int) -> bool:
-    """Deletes an agent by its ID, unless it's a default agent."""
-    db_agent = get_agent(session=session, agent_id=agent_id)
-    if not db_agent:
-        return False
-    if db_agent.isDefault:
-        # UI should prevent this, but good to have a safeguard
-        # Alternatively, raise an error here. For now, just return False.
-        print(f"Attempted to delete default agent {db_agent.name} (ID: {agent_id}). Operation denied.")
-        return False
 
-    session.delete(db_agent)
-    session.commit()
-    return True
+async def bulk_set_status(*, session: AsyncSession, status_map: Dict[int, AgentStatusEnum]) -> List[Agent]:
+    """
+    Sets the status of several agents with one UPDATE ... CASE ... RETURNING statement
+    and one commit. Unknown IDs are ignored.
+    """
+    if not status_map:
+        return []
+    ids = list(status_map)
+    # Bind each status with the column's Enum type so CASE results are stored the same way as ORM writes
+    status_type = Agent.__table__.c.status.type
+    status_case = case(
+        {agent_id: literal(new_status, status_type) for agent_id, new_status in status_map.items()},
+        value=Agent.id,
+    )
+    # RETURNING hands back the updated rows, so no follow-up SELECT/refresh is needed
+    # (PostgreSQL, and SQLite >= 3.35)
+    result = await session.execute(
+        update(Agent)
+        .where(Agent.id.in_(ids))
+        .values(status=status_case)
+        .returning(Agent)
+        .execution_options(synchronize_session=False)
+    )
+    updated = result.scalars().all()
+    # Detach the returned rows so the commit can't expire them (async sessions can't lazily reload)
+    for db_agent in updated:
+        session.expunge(db_agent)
+    await session.commit()
+    return updated
+
+
+async def delete_agent_if_not_default(*, session: AsyncSession, agent_id: int) -> Optional[int]:
+    """
+    Deletes an agent unless it's a default agent, in a single DELETE ... RETURNING statement.
+    Returns the deleted agent's ID, or None if nothing was deleted (missing or default agent;
+    callers that need to tell these apart can look the agent up on that path only).
+    """
+    result = await session.execute(
+        delete(Agent)
+        .where(Agent.id == agent_id, Agent.isDefault == False) # noqa: E712 (SQL expression)
+        .returning(Agent.id)
+        .execution_options(synchronize_session=False)
+    )
+    deleted_id = result.scalar_one_or_none()
+    await session.commit()
+    return deleted_id
@@ -1,11 +1,13 @@
 from typing import List, Optional, Dict, Any
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlalchemy import Row, delete, update
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import datetime
 
 from backend.models.backtest import BacktestResult
 
-def create_backtest_result(
-    session: Session,
+async def create_backtest_result(
+    session: AsyncSession,
     strategy_id: str,
     parameters: Dict[str, Any],
     summary_metrics: Dict[str, Any],
@@ -28,49 +30,93 @@ def create_backtest_result(
         ai_analysis=ai_analysis
     )
     session.add(backtest_result)
-    session.commit()
-    session.refresh(backtest_result)
+    await session.commit()
+    await session.refresh(backtest_result)
     return backtest_result
 
-def get_backtest_result(session: Session, backtest_id: int) -> Optional[BacktestResult]:
+async def get_backtest_result(session: AsyncSession, backtest_id: int) -> Optional[BacktestResult]:
     """
     Get a backtest result by ID.
     """
-    return session.get(BacktestResult, backtest_id)
+    return await session.get(BacktestResult, backtest_id)
 
-def get_backtest_results_by_strategy(session: Session, strategy_id: str, limit: int = 10) -> List[BacktestResult]:
+async def get_backtest_results_by_strategy(session: AsyncSession, strategy_id: str, limit: int = 10) -> List[BacktestResult]:
     """
     Get all backtest results for a strategy, ordered by timestamp (most recent first).
     """
     statement = select(BacktestResult).where(BacktestResult.strategy_id == strategy_id).order_by(BacktestResult.timestamp.desc()).limit(limit)
-    return session.exec(statement).all()
+    return (await session.exec(statement)).all()
 
-def get_latest_backtest_result(session: Session, strategy_id: str) -> Optional[BacktestResult]:
+async def get_backtest_result_summaries(
+    session: AsyncSession, strategy_id: Optional[str] = None, limit: int = 10
+) -> List[Row]:
+    """
+    Get the list-view fields of the most recent backtest results, optionally for one strategy.
+    Only scalar and small JSON columns are selected: equity_curve, trades, log_output and
+    ai_analysis can be megabytes per row, so the analysis is reduced to a has_ai_analysis flag.
+    """
+    statement = select(
+        BacktestResult.id,
+        BacktestResult.strategy_id,
+        BacktestResult.timestamp,
+        BacktestResult.parameters,
+        BacktestResult.summary_metrics,
+        BacktestResult.ai_analysis.is_not(None).label("has_ai_analysis"),
+        BacktestResult.locked,
+    )
+    if strategy_id is not None:
+        statement = statement.where(BacktestResult.strategy_id == strategy_id)
+    statement = statement.order_by(BacktestResult.timestamp.desc()).limit(limit)
+    return (await session.exec(statement)).all()
+
+async def get_latest_backtest_result(session: AsyncSession, strategy_id: str) -> Optional[BacktestResult]:
     """
     Get the most recent backtest result for a strategy.
     """
     statement = select(BacktestResult).where(BacktestResult.strategy_id == strategy_id).order_by(BacktestResult.timestamp.desc()).limit(1)
-    results = session.exec(statement).all()
+    results = (await session.exec(statement)).all()
     return results[0] if results else None
 
-def delete_backtest_result(session: Session, backtest_id: int) -> bool:
+async def delete_backtest_result(session: AsyncSession, backtest_id: int) -> bool:
     """
-    Delete a backtest result by ID.
-    Returns False if the backtest result doesn't exist or is locked.
+    Delete a backtest result by ID, in a single DELETE ... RETURNING statement.
+    Returns False if the backtest result doesn't exist or is locked (see get_backtest_result_locked
+    to tell these apart).
     """
-    backtest_result = session.get(BacktestResult, backtest_id)
-    if not backtest_result:
-        return False
-    
-    # Check if the backtest is locked
-    if backtest_result.locked:
-        return False
-        
-    session.delete(backtest_result)
-    session.commit()
-    return True
+    result = await session.execute(
+        delete(BacktestResult)
+        .where(BacktestResult.id == backtest_id, BacktestResult.locked == False) # noqa: E712 (SQL expression)
+        .returning(BacktestResult.id)
+        .execution_options(synchronize_session=False)
+    )
+    deleted_id = result.scalar_one_or_none()
+    await session.commit()
+    return deleted_id is not None
+
+async def get_backtest_result_locked(session: AsyncSession, backtest_id: int) -> Optional[bool]:
+    """
+    Get only the lock flag of a backtest result, or None if it doesn't exist.
+    """
+    statement = select(BacktestResult.locked).where(BacktestResult.id == backtest_id)
+    return (await session.exec(statement)).first()
+
+async def set_backtest_result_locked(session: AsyncSession, backtest_id: int, locked: bool) -> Optional[Row]:
+    """
+    Set the lock flag of a backtest result in a single UPDATE ... RETURNING statement.
+    Returns the row's (id, strategy_id, timestamp, locked), or None if it doesn't exist.
+    """
+    result = await session.execute(
+        update(BacktestResult)
+        .where(BacktestResult.id == backtest_id)
+        .values(locked=locked)
+        .returning(BacktestResult.id, BacktestResult.strategy_id, BacktestResult.timestamp, BacktestResult.locked)
+        .execution_options(synchronize_session=False)
+    )
+    row = result.one_or_none()
+    await session.commit()
+    return row
 
-def delete_old_backtest_results(session: Session, strategy_id: str, keep_count: int = 5) -> int:
+async def delete_old_backtest_results(session: AsyncSession, strategy_id: str, keep_count: int = 5) -> int:
     """
     Delete old backtest results for a strategy, keeping only the most recent ones.
     Skips locked backtest results.
@@ -78,7 +124,7 @@ def delete_old_backtest_results(session: Session, strategy_id: str, keep_count:
     """
     # Get all backtest results for the strategy
     statement = select(BacktestResult).where(BacktestResult.strategy_id == strategy_id).order_by(BacktestResult.timestamp.desc())
-    results = session.exec(statement).all()
+    results = (await session.exec(statement)).all()
     
     # If we have more results than we want to keep, delete the oldest ones
     if len(results) <= keep_count:
@@ -93,22 +139,22 @@ def delete_old_backtest_results(session: Session, strategy_id: str, keep_count:
         if result.locked:
             continue
             
-        session.delete(result)
+        await session.delete(result)
         deleted_count += 1
     
-    session.commit()
+    await session.commit()
     return deleted_count
 
-def update_backtest_result_analysis(session: Session, backtest_id: int, ai_analysis: str) -> bool:
+async def update_backtest_result_analysis(session: AsyncSession, backtest_id: int, ai_analysis: str) -> bool:
     """
     Update the AI analysis for a backtest result.
     """
-    backtest_result = session.get(BacktestResult, backtest_id)
+    backtest_result = await session.get(BacktestResult, backtest_id)
     if not backtest_result:
         return False
     
     backtest_result.ai_analysis = ai_analysis
     session.add(backtest_result)
-    session.commit()
-    session.refresh(backtest_result)
+    await session.commit()
+    await session.refresh(backtest_result)
     return True
\ No newline at end of file
@@ -1,5 +1,7 @@
 import os
 from sqlmodel import create_engine, SQLModel, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -7,21 +9,45 @@ load_dotenv()
 # Default to SQLite for development, but use PostgreSQL in production
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./algoace.db")
 
+# SQL statement logging is off unless SQL_ECHO=1; it writes every query to stdout
+SQL_ECHO = os.getenv("SQL_ECHO", "0") == "1"
+
+# Connection pool for PostgreSQL, shared by the sync and async engines (each gets its own pool).
+# Postgres max_connections must be >= 2 * (DB_POOL_SIZE + DB_MAX_OVERFLOW) * number of workers.
+POOL_OPTIONS = dict(
+    pool_size=int(os.getenv("DB_POOL_SIZE", "25")),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "25")),
+    pool_timeout=30,
+    pool_recycle=1800,
+    pool_pre_ping=True, # Drop connections the server closed instead of failing a request on them
+    pool_use_lifo=True, # Reuse the warmest connections; idle extras can time out server-side
+)
+
 # Configure SQLAlchemy engine
 if DATABASE_URL.startswith("sqlite"):
     # SQLite-specific configuration
     connect_args = {"check_same_thread": False}
-    engine = create_engine(DATABASE_URL, echo=True, connect_args=connect_args)
+    engine = create_engine(DATABASE_URL, echo=SQL_ECHO, connect_args=connect_args)
 else:
     # PostgreSQL configuration
-    engine = create_engine(
-        DATABASE_URL,
-        echo=True,
-        pool_size=5,
-        max_overflow=10,
-        pool_timeout=30,
-        pool_recycle=1800
-    )
+    engine = create_engine(DATABASE_URL, echo=SQL_ECHO, **POOL_OPTIONS)
+
+# Async engine for the async API routes, using the asyncio driver for the same database
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg", "postgres": "postgresql+asyncpg"}
+
+def _async_database_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return _ASYNC_DRIVERS.get(scheme.split("+", 1)[0], scheme) + sep + rest
+
+ASYNC_DATABASE_URL = _async_database_url(DATABASE_URL)
+
+if ASYNC_DATABASE_URL.startswith("sqlite"):
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=SQL_ECHO)
+else:
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=SQL_ECHO, **POOL_OPTIONS)
+
+# expire_on_commit=False: attributes can't be lazily reloaded outside an await, so keep them after commit
+async_session_maker = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
 
 def create_db_and_tables():
     # Import models here to avoid circular imports
@@ -44,6 +70,10 @@ def get_session():
     with Session(engine) as session:
         yield session
 
+async def get_async_session():
+    async with async_session_maker() as session:
+        yield session
+
 # Optional: Function to initialize DB, useful for first run or testing
 if __name__ == "__main__":
     print(f"Initializing database at: {DATABASE_URL}")
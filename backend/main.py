@@ -3,7 +3,8 @@ from typing import Optional
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from sqlmodel import Session
-from backend.database import get_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from backend.database import get_session, get_async_session
 
 from backend.database import create_db_and_tables, engine # Import engine for potential disconnect
 from backend.api import strategies # Import the strategies router
@@ -16,6 +17,8 @@ from backend.api import datasets # Import datasets router
 from backend.api import recommendations # Import recommendations router
 from backend.api import backtesting # Import backtesting router
 from backend.api import backtest_history # Import backtest history router
+from backend.ai_agents.base_agent import close_http_client
+from backend.ai_agents.strategy_coding_agent import shutdown_validation_pool
  
 # Define lifespan context manager for startup/shutdown events
 @asynccontextmanager
@@ -38,6 +41,10 @@ async def lifespan(app: FastAPI):
 
     # --- Shutdown ---
     print("FastAPI application shutting down...")
+    # Close the HTTP client shared by agent runs
+    await close_http_client()
+    # Stop the worker processes that validate batch-generated strategy code
+    shutdown_validation_pool()
     # Dispose of the database engine connection pool
     if engine:
         try:
@@ -123,7 +130,7 @@ async def handle_backtesting_job_status(job_id: str):
     from backend.api.backtesting import get_backtest_job_status
     return await get_backtest_job_status(job_id=job_id)
 @app.get("/api/backtesting/results/{strategy_id}")
-async def handle_backtesting_results(strategy_id: str, session: Session = Depends(get_session)):
+async def handle_backtesting_results(strategy_id: str, session: AsyncSession = Depends(get_async_session)):
     from backend.api.backtesting import get_backtest_results
     return await get_backtest_results(strategy_id=strategy_id, session=session)
 
@@ -132,18 +139,18 @@ async def handle_backtesting_results(strategy_id: str, session: Session = Depend
 async def handle_backtest_history_list(
     strategy_id: Optional[str] = None,
     limit: int = Query(10, ge=1, le=100),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     from backend.api.backtest_history import list_backtest_results
     return await list_backtest_results(strategy_id=strategy_id, limit=limit, session=session)
 
 @app.get("/api/backtest-history/{backtest_id}")
-async def handle_backtest_history_get(backtest_id: int, session: Session = Depends(get_session)):
+async def handle_backtest_history_get(backtest_id: int, session: AsyncSession = Depends(get_async_session)):
     from backend.api.backtest_history import get_backtest_result_by_id
     return await get_backtest_result_by_id(backtest_id=backtest_id, session=session)
 
 @app.delete("/api/backtest-history/{backtest_id}")
-async def handle_backtest_history_delete(backtest_id: int, session: Session = Depends(get_session)):
+async def handle_backtest_history_delete(backtest_id: int, session: AsyncSession = Depends(get_async_session)):
     from backend.api.backtest_history import delete_backtest_result_by_id
     return await delete_backtest_result_by_id(backtest_id=backtest_id, session=session)
 
@@ -151,18 +158,18 @@ async def handle_backtest_history_delete(backtest_id: int, session: Session = De
 async def handle_backtest_history_delete_old(
     strategy_id: str,
     keep_count: int = Query(5, ge=1, le=100),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     from backend.api.backtest_history import delete_old_results_for_strategy
     return await delete_old_results_for_strategy(strategy_id=strategy_id, keep_count=keep_count, session=session)
 
 @app.post("/api/backtest-history/{backtest_id}/analyze")
-async def handle_backtest_history_analyze(backtest_id: int, session: Session = Depends(get_session)):
+async def handle_backtest_history_analyze(backtest_id: int, session: AsyncSession = Depends(get_async_session)):
     from backend.api.backtest_history import generate_ai_analysis
     return await generate_ai_analysis(backtest_id=backtest_id, session=session)
 
 @app.get("/api/backtest-history/{backtest_id}/pdf")
-async def handle_backtest_history_pdf(backtest_id: int, session: Session = Depends(get_session)):
+async def handle_backtest_history_pdf(backtest_id: int, session: AsyncSession = Depends(get_async_session)):
     from backend.api.backtest_history import generate_pdf_report
     return await generate_pdf_report(backtest_id=backtest_id, session=session)
  
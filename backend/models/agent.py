@@ -1,6 +1,7 @@
 from typing import Optional, List, Dict, Any
 from sqlmodel import Field, SQLModel, Column
-from sqlalchemy import JSON
+from sqlalchemy import JSON, DateTime
+from datetime import datetime, timezone
 from enum import Enum
 
 class AgentStatusEnum(str, Enum):
@@ -23,6 +24,9 @@ class BaseAgentConfigModel(SQLModel):
     llmModelProviderId: str = Field(default='groq')
     llmModelName: Optional[str] = None
 
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
 class Agent(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str = Field(index=True, unique=True)  # Agent names should be unique
@@ -42,6 +46,11 @@ class Agent(SQLModel, table=True):
     # This can be a JSON list of strategy IDs or a relationship table if preferred
     associatedStrategyIds: Optional[List[str]] = Field(default_factory=list, sa_column=Column(JSON))
 
+    # Bumped on every UPDATE (ORM flush or update(Agent)); the agents API derives its ETags from it
+    updatedAt: Optional[datetime] = Field(
+        default_factory=_utcnow, index=True, sa_type=DateTime(timezone=True), sa_column_kwargs={"onupdate": _utcnow}
+    )
+
 class AgentCreate(SQLModel):
     name: str
     type: AgentTypeEnum
@@ -1,13 +1,19 @@
 from typing import Optional, List, Dict, Any
 from sqlmodel import Field, SQLModel, Column, Relationship
-from sqlalchemy import JSON, String, Text
+from sqlalchemy import JSON, String, Text, Index
 from datetime import datetime
 
 class BacktestResult(SQLModel, table=True):
     """Model for storing backtest results"""
+    # History queries filter by strategy and/or list newest first; both orders are index scans
+    # (read backwards for DESC) instead of a sort of the whole table.
+    __table_args__ = (
+        Index("ix_backtestresult_strategy_id_timestamp", "strategy_id", "timestamp"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     strategy_id: str = Field(index=True)
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=datetime.utcnow, index=True)
     parameters: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON))
     summary_metrics: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON))
     equity_curve: List[Dict[str, Any]] = Field(default_factory=list, sa_column=Column(JSON))
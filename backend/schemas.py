@@ -1,8 +1,10 @@
 # backend/schemas.py
-from pydantic import BaseModel, Field, field_validator, model_validator
+from pydantic import BaseModel, Field, TypeAdapter, field_validator, model_validator
 from typing import List, Optional, Literal, Union, Dict, Any, ClassVar
 from enum import Enum
 from datetime import datetime
+from functools import lru_cache
+import orjson
 
 # --- Tool Definitions (Mirroring frontend) ---
 class ToolNameEnum(str, Enum):
@@ -87,6 +89,11 @@ class StrategyCodingAgentConfig(BaseAgentConfig):
         description="System prompt for the strategy generation LLM. Use placeholders like {riskTolerance}, {marketConditions}, {historicalData}, {targetAssetClass}, {customRequirements}."
     )
     codingRetryAttempts: int = Field(default=2, ge=0, le=5, description="Number of attempts to generate and debug code if errors occur.")
+    autoBacktest: bool = Field(default=False, description="Queue a backtest for each generated strategy as soon as its code is saved.")
+    backtestApiUrl: Optional[str] = Field(default=None, description="URL of a remote backtesting service's /backtesting/run endpoint. If unset, backtests are queued in-process.")
+    useBatchApi: bool = Field(default=False, description="Submit bulk strategy generation through the provider's Batch API (cheaper, results within 24h). OpenAI only.")
+    maxConcurrentLLMCalls: int = Field(default=8, ge=1, le=64, description="Maximum number of strategy generation LLM calls in flight at once during batch generation.")
+    timeoutSeconds: int = Field(default=60, ge=5, le=600, description="Upper bound in seconds for one strategy generation LLM call, including its retries.")
 
 class WatchedAsset(BaseModel):
     brokerId: str = Field(description="ID of the broker providing this asset.")
@@ -180,39 +187,59 @@ class AgentRead(AgentBase): # Inherits name, type, description, associatedStrate
     errors: int
     isDefault: bool
     # config in AgentRead is the parsed Pydantic model union
-    config: AgentConfigUnion 
-
-    class Config:
-        from_attributes = True
+    config: AgentConfigUnion
 
 
 class AgentStatusUpdate(BaseModel):
     status: AgentStatusEnumSchema
 
 
+class AgentBulkStatusItem(BaseModel):
+    id: int
+    status: AgentStatusEnumSchema
+
+
+# Concrete config class per agent type string; unknown types fall back to BaseAgentConfig.
+CONFIG_BY_TYPE: Dict[str, type] = {
+    AgentTypeEnumSchema.STRATEGY_CODING.value: StrategyCodingAgentConfig,
+    AgentTypeEnumSchema.RESEARCH.value: ResearchAgentConfig,
+    AgentTypeEnumSchema.PORTFOLIO.value: PortfolioAgentConfig,
+    AgentTypeEnumSchema.RISK.value: RiskAgentConfig,
+    AgentTypeEnumSchema.EXECUTION.value: ExecutionAgentConfig,
+}
+
+
 # --- Utility for parsing config based on agent type ---
+# Built once at import: parsing is a dict lookup plus one validate_python on a prebuilt validator.
+_CONFIG_ADAPTERS: Dict[str, TypeAdapter] = {t: TypeAdapter(cfg_cls) for t, cfg_cls in CONFIG_BY_TYPE.items()}
+_BASE_CONFIG_ADAPTER = TypeAdapter(BaseAgentConfig)
+
 def parse_agent_config(agent_type_str: str, config_data: Optional[Dict[str, Any]]) -> AgentConfigUnion:
+    """
+    Parse a stored/submitted config dict into the config model for the agent type.
+    Results are memoized on the config's canonical JSON, so agents sharing a config (e.g. the
+    defaults) share one parsed model, which callers must treat as read-only.
+    """
     config_data = config_data or {} # Ensure config_data is a dict
+    try:
+        config_key = orjson.dumps(config_data, option=orjson.OPT_SORT_KEYS)
+    except TypeError: # Not JSON-serializable, so it can't be a cache key; parse directly
+        return _parse_agent_config_uncached(agent_type_str, config_data)
+    return _parse_agent_config_cached(agent_type_str, config_key)
+
+
+@lru_cache(maxsize=512)
+def _parse_agent_config_cached(agent_type_str: str, config_key: bytes) -> AgentConfigUnion:
+    return _parse_agent_config_uncached(agent_type_str, orjson.loads(config_key))
+
 
-    # Add 'agent_type' to config_data if not already present, for discriminated union parsing
-    # This helps if we were to use AgentConfigUnion.model_validate(config_data_with_type) directly.
-    # However, the current explicit if/else based on agent_type_str is also clear.
-
-    if agent_type_str == AgentTypeEnumSchema.STRATEGY_CODING.value:
-        return StrategyCodingAgentConfig(**{'agent_type': AgentTypeEnumSchema.STRATEGY_CODING.value, **config_data})
-    elif agent_type_str == AgentTypeEnumSchema.RESEARCH.value:
-        return ResearchAgentConfig(**{'agent_type': AgentTypeEnumSchema.RESEARCH.value, **config_data})
-    elif agent_type_str == AgentTypeEnumSchema.PORTFOLIO.value:
-        return PortfolioAgentConfig(**{'agent_type': AgentTypeEnumSchema.PORTFOLIO.value, **config_data})
-    elif agent_type_str == AgentTypeEnumSchema.RISK.value:
-        return RiskAgentConfig(**{'agent_type': AgentTypeEnumSchema.RISK.value, **config_data})
-    elif agent_type_str == AgentTypeEnumSchema.EXECUTION.value:
-        return ExecutionAgentConfig(**{'agent_type': AgentTypeEnumSchema.EXECUTION.value, **config_data})
-    else:
+def _parse_agent_config_uncached(agent_type_str: str, config_data: Dict[str, Any]) -> AgentConfigUnion:
+    adapter = _CONFIG_ADAPTERS.get(agent_type_str)
+    if adapter is None:
         # Fallback to BaseAgentConfig for unknown or generic types
-        # Or raise an error if the type is strictly one of the above.
-        # For flexibility, let's assume a base config can exist.
-        return BaseAgentConfig(**{'agent_type': AgentTypeEnumSchema.BASE.value, **config_data})
+        return _BASE_CONFIG_ADAPTER.validate_python({'agent_type': AgentTypeEnumSchema.BASE.value, **config_data})
+    # 'agent_type' is the discriminator field of each config model; default it to the agent's type
+    return adapter.validate_python({'agent_type': agent_type_str, **config_data})
 
 
 # --- Strategy Config Schemas ---
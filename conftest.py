@@ -0,0 +1,72 @@
+import contextlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.models import Agent, AgentTypeEnum
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A fresh SQLite database with the app's tables, as (sync engine, async engine)."""
+    path = tmp_path / "test.db"
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    # NullPool: every request opens its own connection on the test client's event loop
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    yield engine, async_engine
+    engine.dispose()
+
+
+@pytest.fixture
+def make_client(db):
+    """
+    Build a TestClient for a router, with the given session dependencies bound to the test database.
+    Routers resolve their dependencies through the module they imported them from, so callers pass those.
+    """
+    engine, async_engine = db
+
+    def override_get_session():
+        with Session(engine) as session:
+            yield session
+
+    async def override_get_async_session():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+    with contextlib.ExitStack() as stack:
+        def make(router, get_session=None, get_async_session=None) -> TestClient:
+            app = FastAPI()
+            app.include_router(router)
+            if get_session is not None:
+                app.dependency_overrides[get_session] = override_get_session
+            if get_async_session is not None:
+                app.dependency_overrides[get_async_session] = override_get_async_session
+            return stack.enter_context(TestClient(app))
+
+        yield make
+
+
+@pytest.fixture
+def add_agent(db):
+    """Insert an agent and return its ID."""
+    engine, _ = db
+
+    def add(name: str, **fields) -> int:
+        with Session(engine) as session:
+            agent = Agent(**{
+                "name": name,
+                "type": AgentTypeEnum.RESEARCH,
+                "description": f"{name} description",
+                **fields,
+            })
+            session.add(agent)
+            session.commit()
+            return agent.id
+
+    return add
@@ -0,0 +1,104 @@
+import pytest
+
+from backend.api import agents as agents_api
+from backend.models import AgentStatusEnum
+
+
+@pytest.fixture
+def client(make_client):
+    return make_client(
+        agents_api.router,
+        get_session=agents_api.get_session,
+        get_async_session=agents_api.get_async_session,
+    )
+
+
+def test_delete_default_agent_returns_403(client, add_agent):
+    agent_id = add_agent("default", isDefault=True)
+
+    assert client.delete(f"/agents/{agent_id}").status_code == 403
+    assert client.get(f"/agents/{agent_id}").status_code == 200
+
+
+def test_delete_missing_agent_returns_404(client):
+    assert client.delete("/agents/999").status_code == 404
+
+
+def test_delete_agent(client, add_agent):
+    agent_id = add_agent("custom")
+
+    assert client.delete(f"/agents/{agent_id}").status_code == 204
+    assert client.get(f"/agents/{agent_id}").status_code == 404
+
+
+def test_bulk_status_skips_unknown_ids(client, add_agent):
+    first = add_agent("first")
+    second = add_agent("second")
+
+    response = client.post("/agents/bulk-status", json=[
+        {"id": first, "status": "Running"},
+        {"id": 999, "status": "Running"},
+        {"id": second, "status": "Stopped"},
+    ])
+    assert response.status_code == 200
+    statuses = {agent["id"]: agent["status"] for agent in response.json()}
+    assert statuses == {first: "Running", second: "Stopped"}
+    assert client.get(f"/agents/{first}").json()["status"] == "Running"
+
+
+def test_list_keyset_pagination(client, add_agent):
+    ids = [add_agent(f"agent-{i}") for i in range(5)]
+
+    first_page = client.get("/agents/", params={"limit": 2})
+    assert [agent["id"] for agent in first_page.json()] == ids[:2]
+    after_id = first_page.headers["X-Next-After-Id"]
+    assert after_id == str(ids[1])
+
+    second_page = client.get("/agents/", params={"limit": 2, "after_id": after_id})
+    assert [agent["id"] for agent in second_page.json()] == ids[2:4]
+
+    last_page = client.get("/agents/", params={"limit": 2, "after_id": ids[3]})
+    assert [agent["id"] for agent in last_page.json()] == ids[4:]
+    # A short page is the last one
+    assert "X-Next-After-Id" not in last_page.headers
+
+
+def test_list_etag_returns_304_until_an_agent_changes(client, add_agent):
+    agent_id = add_agent("watched")
+
+    response = client.get("/agents/")
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    for if_none_match in (etag, f'W/"stale", {etag}', etag.removeprefix("W/"), "*"):
+        not_modified = client.get("/agents/", headers={"If-None-Match": if_none_match})
+        assert not_modified.status_code == 304, if_none_match
+        assert not_modified.headers["ETag"] == etag
+        assert not_modified.content == b""
+
+    assert client.get("/agents/", headers={"If-None-Match": 'W/"stale"'}).status_code == 200
+
+    client.post("/agents/bulk-status", json=[{"id": agent_id, "status": "Running"}])
+    changed = client.get("/agents/", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_single_agent_etag(client, add_agent):
+    agent_id = add_agent("single")
+
+    etag = client.get(f"/agents/{agent_id}").headers["ETag"]
+    assert client.get(f"/agents/{agent_id}", headers={"If-None-Match": etag}).status_code == 304
+
+    client.post("/agents/bulk-status", json=[{"id": agent_id, "status": AgentStatusEnum.STOPPED.value}])
+    assert client.get(f"/agents/{agent_id}", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_strategy_endpoints_return_404_for_a_missing_agent(client):
+    task_input = {"market_conditions": "volatile", "risk_tolerance": "low"}
+
+    assert client.post("/agents/999/run-generate-strategy", json=task_input).status_code == 404
+    assert client.post("/agents/999/run-generate-strategy/stream", json=task_input).status_code == 404
+    assert client.post("/agents/999/generate_batch", json=[task_input]).status_code == 404
+    assert client.post("/agents/999/generate_batch/submit", json=[task_input]).status_code == 404
+    assert client.post("/agents/999/generate_batch/batch_1/collect").status_code == 404
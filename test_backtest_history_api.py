@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlmodel import Session
+
+from backend.api.backtest_history import router
+from backend.database import get_async_session
+from backend.models import BacktestResult
+
+
+@pytest.fixture
+def client(make_client):
+    return make_client(router, get_async_session=get_async_session)
+
+
+def add_result(db, **fields) -> int:
+    """Insert a backtest result and return its ID."""
+    engine, _ = db
+    with Session(engine) as session:
+        result = BacktestResult(**{"strategy_id": "strat-1", "timestamp": datetime.now(timezone.utc), **fields})
+        session.add(result)
+        session.commit()
+        return result.id
+
+
+def test_delete_missing_result_returns_404(client):
+    response = client.delete("/backtest-history/999")
+    assert response.status_code == 404
+
+
+def test_delete_locked_result_returns_403_and_keeps_it(client, db):
+    backtest_id = add_result(db, locked=True)
+
+    response = client.delete(f"/backtest-history/{backtest_id}")
+    assert response.status_code == 403
+    assert client.get(f"/backtest-history/{backtest_id}").status_code == 200
+
+
+def test_delete_unlocked_result(client, db):
+    backtest_id = add_result(db)
+
+    response = client.delete(f"/backtest-history/{backtest_id}")
+    assert response.status_code == 200
+    assert client.get(f"/backtest-history/{backtest_id}").status_code == 404
+
+
+def test_lock_returns_updated_row(client, db):
+    backtest_id = add_result(db, strategy_id="strat-7")
+
+    response = client.post(f"/backtest-history/{backtest_id}/lock", json={"locked": True})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["id"] == backtest_id
+    assert body["strategy_id"] == "strat-7"
+    assert body["locked"] is True
+    # Locking is what makes the delete refuse
+    assert client.delete(f"/backtest-history/{backtest_id}").status_code == 403
+
+    response = client.post(f"/backtest-history/{backtest_id}/lock", json={"locked": False})
+    assert response.json()["locked"] is False
+    assert client.delete(f"/backtest-history/{backtest_id}").status_code == 200
+
+
+def test_lock_missing_result_returns_404(client):
+    response = client.post("/backtest-history/999/lock", json={"locked": True})
+    assert response.status_code == 404
+
+
+def test_list_returns_newest_summaries_first(client, db):
+    now = datetime.now(timezone.utc)
+    older = add_result(db, timestamp=now - timedelta(days=1))
+    newer = add_result(db, timestamp=now, ai_analysis="Looks good")
+    add_result(db, strategy_id="strat-2", timestamp=now + timedelta(days=1))
+
+    response = client.get("/backtest-history/", params={"strategy_id": "strat-1"})
+    assert response.status_code == 200
+    results = response.json()
+    assert [result["id"] for result in results] == [newer, older]
+    assert [result["has_ai_analysis"] for result in results] == [True, False]
+    # Summaries leave out the full curves and trades
+    assert "equity_curve" not in results[0]
+
+    response = client.get("/backtest-history/", params={"limit": 1})
+    assert len(response.json()) == 1
@@ -0,0 +1,44 @@
+import asyncio
+
+from backend.ai_agents.base_agent import AgentDependencies, close_http_client, compile_prompt_template
+
+
+def test_compile_prompt_template_splits_the_static_prefix():
+    prefix, template = compile_prompt_template("You write trading strategies.\nMarket: {market}, risk: {risk}.")
+
+    assert prefix == "You write trading strategies.\n"
+    assert template.substitute(market="bullish", risk="low") == "Market: bullish, risk: low."
+
+
+def test_compile_prompt_template_handles_braces_like_str_format():
+    prompt = 'Return {{"code": ...}} as JSON.\nUse {asset}, e.g. {{ "symbol": "AAPL" }}.\ndef f(): return {1: 2}'
+    prefix, template = compile_prompt_template(prompt)
+
+    assert prefix == 'Return {"code": ...} as JSON.\n'
+    # Escaped braces become literal ones; a brace that is not a placeholder is kept verbatim
+    assert template.substitute(asset="stocks") == 'Use stocks, e.g. { "symbol": "AAPL" }.\ndef f(): return {1: 2}'
+
+
+def test_compile_prompt_template_keeps_dollar_signs_literal():
+    prefix, template = compile_prompt_template("Costs $5.\nRisk {risk} per $100, not ${risk} or $risk.")
+
+    assert prefix == "Costs $5.\n"
+    assert template.substitute(risk="1%") == "Risk 1% per $100, not $1% or $risk."
+
+
+def test_compile_prompt_template_without_placeholders():
+    prefix, template = compile_prompt_template("A fixed {{prompt}}.")
+
+    assert prefix == "A fixed {prompt}."
+    assert template.substitute() == ""
+
+
+def test_agent_dependencies_never_hand_out_a_closed_client():
+    dependencies = AgentDependencies()
+    client = dependencies.client
+    assert dependencies.client is client
+
+    asyncio.run(close_http_client())
+    assert client.is_closed
+    assert not dependencies.client.is_closed
+    asyncio.run(close_http_client())
@@ -0,0 +1,66 @@
+import asyncio
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend import crud
+from backend.models import AgentStatusEnum
+
+
+def run(db, query):
+    """Run an async crud call with a fresh AsyncSession and return its result."""
+    _, async_engine = db
+
+    async def main():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            return await query(session)
+
+    return asyncio.run(main())
+
+
+def test_delete_agent_if_not_default(db, add_agent):
+    default_id = add_agent("default", isDefault=True)
+    custom_id = add_agent("custom")
+
+    assert run(db, lambda s: crud.delete_agent_if_not_default(session=s, agent_id=default_id)) is None
+    assert run(db, lambda s: crud.delete_agent_if_not_default(session=s, agent_id=999)) is None
+    assert run(db, lambda s: crud.delete_agent_if_not_default(session=s, agent_id=custom_id)) == custom_id
+
+    assert run(db, lambda s: crud.get_agent(session=s, agent_id=default_id)) is not None
+    assert run(db, lambda s: crud.get_agent(session=s, agent_id=custom_id)) is None
+
+
+def test_bulk_set_status_returns_updated_rows_only(db, add_agent):
+    first = add_agent("first")
+    second = add_agent("second")
+
+    updated = run(db, lambda s: crud.bulk_set_status(session=s, status_map={
+        first: AgentStatusEnum.RUNNING,
+        999: AgentStatusEnum.ERROR,
+        second: AgentStatusEnum.STOPPED,
+    }))
+    assert {agent.id: agent.status for agent in updated} == {
+        first: AgentStatusEnum.RUNNING,
+        second: AgentStatusEnum.STOPPED,
+    }
+    assert run(db, lambda s: crud.get_agent(session=s, agent_id=first)).status == AgentStatusEnum.RUNNING
+    assert run(db, lambda s: crud.bulk_set_status(session=s, status_map={})) == []
+
+
+def test_bulk_set_status_moves_the_agents_version(db, add_agent):
+    agent_id = add_agent("watched")
+
+    before = run(db, lambda s: crud.get_agents_version(session=s))
+    run(db, lambda s: crud.bulk_set_status(session=s, status_map={agent_id: AgentStatusEnum.RUNNING}))
+    after = run(db, lambda s: crud.get_agents_version(session=s))
+    assert after[1] == before[1] == 1
+    assert after[0] > before[0]
+
+
+def test_get_agents_lite_keyset_pagination(db, add_agent):
+    ids = [add_agent(f"agent-{i}") for i in range(5)]
+
+    first_page = run(db, lambda s: crud.get_agents_lite(session=s, limit=2))
+    assert [row.id for row in first_page] == ids[:2]
+    second_page = run(db, lambda s: crud.get_agents_lite(session=s, limit=2, after_id=first_page[-1].id))
+    assert [row.id for row in second_page] == ids[2:4]
+    assert second_page[0].name == "agent-2"
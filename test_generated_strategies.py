@@ -0,0 +1,70 @@
+import asyncio
+import contextlib
+import os
+import shutil
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import Session
+
+from backend.ai_agents.strategy_coding_agent import (
+    _strategy_file_path,
+    generated_strategy_id,
+    save_strategy_code,
+    strategy_relative_path,
+)
+from backend.api.backtesting import BacktestRequest, load_strategy_class, queue_backtest
+
+STRATEGY_CODE = '''
+class MomentumBreakoutStrategy:
+    pass
+'''
+
+
+@pytest.fixture
+def generated_file():
+    """Save a generated strategy the way the Strategy Coding Agent does, removing its directory afterwards."""
+    relative_path = strategy_relative_path("momentum_breakout.py", uuid.uuid4().hex[:12])
+    file_path = asyncio.run(save_strategy_code(_strategy_file_path(relative_path), STRATEGY_CODE))
+    yield file_path
+    shutil.rmtree(os.path.dirname(file_path))
+    with contextlib.suppress(OSError):
+        # The shard directory, if no other strategy shares it
+        os.rmdir(os.path.dirname(os.path.dirname(file_path)))
+
+
+def test_strategy_relative_path_keeps_the_module_name():
+    first = strategy_relative_path("../momentum_breakout.py", 42)
+    second = strategy_relative_path("momentum_breakout.py", 43)
+
+    assert first.endswith(os.path.join("s42", "momentum_breakout.py"))
+    assert first.startswith("shard_")
+    assert os.path.basename(second) == os.path.basename(first)
+    assert second != first
+
+
+def test_generated_strategy_is_queued_and_loaded(db, generated_file):
+    strategy_id = generated_strategy_id(generated_file)
+    assert strategy_id.startswith("strat-generated.shard_")
+
+    request = BacktestRequest(strategy_id=strategy_id, parameters={
+        "startDate": "2024-01-01",
+        "endDate": "2024-12-31",
+        "initialCapital": 100000.0,
+        "symbol": "SPY",
+        "timeframe": "1d",
+    })
+    engine, _ = db
+    with Session(engine) as session, pytest.raises(HTTPException) as error:
+        asyncio.run(queue_backtest(request, session))
+    # The ID is accepted as a file-based strategy; only the missing dataset stops the job
+    assert error.value.status_code == 400
+    assert "No dataset available" in error.value.detail
+
+    strategy_class = load_strategy_class(strategy_id.split("-")[1])
+    assert strategy_class.__name__ == "MomentumBreakoutStrategy"
+
+
+def test_generated_strategy_id_rejects_unimportable_names():
+    assert generated_strategy_id(_strategy_file_path(strategy_relative_path("momentum-breakout.py", 42))) is None
@@ -0,0 +1,30 @@
+from backend.schemas import AgentTypeEnumSchema, StrategyCodingAgentConfig, parse_agent_config
+
+STRATEGY_CODING = AgentTypeEnumSchema.STRATEGY_CODING.value
+
+
+def test_parse_agent_config_reuses_the_parsed_model_for_equal_configs():
+    first = parse_agent_config(STRATEGY_CODING, {"codingRetryAttempts": 3, "autoBacktest": True})
+    # Key order does not matter: the cache key is the canonical JSON
+    second = parse_agent_config(STRATEGY_CODING, {"autoBacktest": True, "codingRetryAttempts": 3})
+
+    assert isinstance(first, StrategyCodingAgentConfig)
+    assert first.codingRetryAttempts == 3
+    assert second is first
+
+
+def test_parse_agent_config_parses_other_configs_anew():
+    first = parse_agent_config(STRATEGY_CODING, {"codingRetryAttempts": 3})
+
+    assert parse_agent_config(STRATEGY_CODING, {"codingRetryAttempts": 4}) is not first
+    # The same config for another agent type parses into that type's model
+    assert parse_agent_config(AgentTypeEnumSchema.RESEARCH.value, {}) is not parse_agent_config(STRATEGY_CODING, {})
+    assert parse_agent_config(STRATEGY_CODING, None) is parse_agent_config(STRATEGY_CODING, {})
+
+
+def test_parse_agent_config_parses_unserializable_configs_without_caching():
+    config = {"codingRetryAttempts": 1, "tags": {"momentum"}}
+
+    first = parse_agent_config(STRATEGY_CODING, config)
+    assert first.codingRetryAttempts == 1
+    assert parse_agent_config(STRATEGY_CODING, config) is not first
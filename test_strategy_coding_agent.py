@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+from pydantic import BaseModel, ValidationError
+from sqlmodel import Session, select
+from tenacity import RetryError
+
+from backend.ai_agents import strategy_coding_agent
+from backend.ai_agents.strategy_coding_agent import StrategyInsertBatcher, _llm_retry_policy
+from backend.models import Strategy, StrategyCreate
+
+
+@pytest.fixture
+def batch_sizes(db, monkeypatch):
+    """Point the batcher at the test database and record the size of each committed batch."""
+    engine, _ = db
+    sizes = []
+    create_strategies = strategy_coding_agent.crud.create_strategies
+
+    def recording_create_strategies(*, session, strategies_in):
+        sizes.append(len(strategies_in))
+        return create_strategies(session=session, strategies_in=strategies_in)
+
+    monkeypatch.setattr(strategy_coding_agent, "engine", engine)
+    monkeypatch.setattr(strategy_coding_agent.crud, "create_strategies", recording_create_strategies)
+    return sizes
+
+
+def strategy_in(name: str) -> StrategyCreate:
+    return StrategyCreate(name=name, description=f"{name} description", status="Inactive", source="AI-Generated")
+
+
+def test_insert_batcher_commits_concurrent_submits_together(db, batch_sizes):
+    batcher = StrategyInsertBatcher(max_batch_size=32, max_delay=0.01)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit(strategy_in(f"strategy-{i}")) for i in range(5)))
+
+    inserted = asyncio.run(main())
+    assert batch_sizes == [5]
+    assert [strategy.name for strategy in inserted] == [f"strategy-{i}" for i in range(5)]
+
+    engine, _ = db
+    with Session(engine) as session:
+        assert sorted(session.exec(select(Strategy.id)).all()) == sorted(strategy.id for strategy in inserted)
+
+
+def test_insert_batcher_flushes_a_full_batch_at_once(batch_sizes):
+    # A delay far above the test's run time, so only the size limit can flush
+    batcher = StrategyInsertBatcher(max_batch_size=2, max_delay=60)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit(strategy_in(f"strategy-{i}")) for i in range(4)))
+
+    assert len({strategy.id for strategy in asyncio.run(main())}) == 4
+    assert batch_sizes == [2, 2]
+
+
+def test_insert_batcher_fails_every_submit_of_a_failed_batch(monkeypatch):
+    def failing_insert(strategies_in):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(strategy_coding_agent, "_insert_strategies", failing_insert)
+    batcher = StrategyInsertBatcher(max_delay=0.01)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit(strategy_in(f"strategy-{i}")) for i in range(2)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert [str(result) for result in results] == ["database is locked"] * 2
+
+
+class StrategyReply(BaseModel):
+    python_code: str
+
+
+def count_attempts(policy, errors) -> int:
+    """Run the policy over a call that raises the given errors in turn, returning how many attempts it made."""
+    attempts = 0
+
+    async def main():
+        nonlocal attempts
+        async for attempt in policy:
+            with attempt:
+                error = errors[attempts]
+                attempts += 1
+                raise error
+
+    with pytest.raises(RetryError):
+        asyncio.run(main())
+    return attempts
+
+
+def validation_error(value) -> ValidationError:
+    try:
+        StrategyReply.model_validate(value)
+    except ValidationError as e:
+        return e
+
+
+def test_llm_retry_policy_stops_on_a_repeated_validation_error():
+    # Same error type and location; the offending input differs, which does not make it a new error
+    errors = [validation_error({"python_code": 1}), validation_error({"python_code": 2}), validation_error({})]
+    assert count_attempts(_llm_retry_policy(3), errors) == 2
+
+
+def test_llm_retry_policy_retries_new_errors_up_to_the_cap():
+    errors = [validation_error({}), validation_error({"python_code": 1}), ValueError("bad code"), ValueError("other")]
+    assert count_attempts(_llm_retry_policy(10), errors) == 3
+    assert count_attempts(_llm_retry_policy(0), errors) == 1